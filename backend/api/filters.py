@@ -1,27 +1,45 @@
 from django_filters.rest_framework import FilterSet, filters
-from rest_framework.filters import SearchFilter
 
-from recipes.models import Recipe, Tag
+from recipes.models import Recipe
+from recipes.registry import tag_registry
+from recipes.search import search_recipes
 
+RECIPE_ORDERINGS = {
+    'pub_date': ('pub_date', 'id'),
+    '-pub_date': ('-pub_date', '-id'),
+    'favorites_count': ('favorites_count', 'id'),
+    '-favorites_count': ('-favorites_count', '-id'),
+}
 
-class IngredientSearchFilter(SearchFilter):
-    search_param = 'name'
+
+def get_tag_choices():
+    return [(tag.slug, tag.name) for tag in tag_registry.all().values()]
 
 
 class RecipeFilter(FilterSet):
-    tags = filters.ModelMultipleChoiceFilter(
-        field_name='tags__slug',
-        to_field_name='slug',
-        queryset=Tag.objects.all(),
+    tags = filters.MultipleChoiceFilter(
+        choices=get_tag_choices,
+        method='filter_tags',
     )
     is_in_shopping_cart = filters.NumberFilter(
         method='filter_is_in_shopping_cart')
     is_favorited = filters.NumberFilter(
         method='filter_is_favorited')
+    search = filters.CharFilter(method='filter_search')
+    ordering = filters.ChoiceFilter(
+        choices=[(value, value) for value in RECIPE_ORDERINGS],
+        method='filter_ordering')
 
     class Meta:
         model = Recipe
-        fields = ('tags', 'author', 'is_favorited', 'is_in_shopping_cart')
+        fields = ('tags', 'author', 'is_favorited', 'is_in_shopping_cart',
+                  'search', 'ordering')
+
+    def filter_tags(self, queryset, name, value):
+        slugs = set(value)
+        return queryset.filter(tags__in=[
+            tag.id for tag in tag_registry.all().values()
+            if tag.slug in slugs]).distinct()
 
     def filter_is_favorited(self, queryset, name, value):
         if self.request.user.is_authenticated and value:
@@ -32,3 +50,9 @@ class RecipeFilter(FilterSet):
         if self.request.user.is_authenticated and value:
             return queryset.filter(shopping_cart__user=self.request.user)
         return queryset
+
+    def filter_search(self, queryset, name, value):
+        return search_recipes(queryset, value)
+
+    def filter_ordering(self, queryset, name, value):
+        return queryset.order_by(*RECIPE_ORDERINGS[value])
@@ -1,6 +1,148 @@
-from rest_framework.pagination import PageNumberPagination
+import json
+from base64 import b64decode, b64encode
+from binascii import Error as BinasciiError
+from collections import OrderedDict
+from functools import reduce
+from operator import or_
+
+from django.core.exceptions import ValidationError
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination, PageNumberPagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
+
+
+class KeysetPagination(BasePagination):
+    """Постраничный вывод по курсору без COUNT и OFFSET.
+
+    Курсор хранит значения полей ordering у крайнего объекта страницы,
+    следующая страница выбирается условием по этим значениям, поэтому
+    её стоимость не зависит от глубины прокрутки.
+    """
+
+    cursor_query_param = 'cursor'
+    invalid_cursor_message = 'Неверный курсор.'
+
+    def __init__(self, ordering, page_size, page_size_query_param=None,
+                 max_page_size=None):
+        self.ordering = ordering
+        self.page_size = page_size
+        self.page_size_query_param = page_size_query_param
+        self.max_page_size = max_page_size
+
+    def get_page_size(self, request):
+        try:
+            page_size = int(request.query_params[self.page_size_query_param])
+        except (KeyError, TypeError, ValueError):
+            return self.page_size
+        if page_size <= 0:
+            return self.page_size
+        if self.max_page_size:
+            return min(page_size, self.max_page_size)
+        return page_size
+
+    def decode_cursor(self, request):
+        encoded = request.query_params.get(self.cursor_query_param)
+        if not encoded:
+            return None, False
+        try:
+            cursor = json.loads(b64decode(encoded.encode('ascii')))
+            position, reverse = cursor['p'], bool(cursor.get('r'))
+        except (BinasciiError, UnicodeError, ValueError, KeyError, TypeError):
+            raise NotFound(self.invalid_cursor_message)
+        if not isinstance(position, list) or (
+                len(position) != len(self.ordering)) or not all(
+                isinstance(value, (str, int, float)) for value in position):
+            raise NotFound(self.invalid_cursor_message)
+        return position, reverse
+
+    def encode_cursor(self, instance, reverse=False):
+        position = [getattr(instance, field.lstrip('-'))
+                    for field in self.ordering]
+        cursor = {'p': position}
+        if reverse:
+            cursor['r'] = 1
+        encoded = b64encode(
+            json.dumps(cursor, default=str).encode()).decode('ascii')
+        return replace_query_param(
+            self.base_url, self.cursor_query_param, encoded)
+
+    def get_seek_filter(self, position, reverse):
+        conditions = []
+        for index, field in enumerate(self.ordering):
+            name = field.lstrip('-')
+            descending = field.startswith('-') != reverse
+            lookup = f'{name}__lt' if descending else f'{name}__gt'
+            condition = Q(**{lookup: position[index]})
+            for previous, value in zip(self.ordering[:index], position):
+                condition &= Q(**{previous.lstrip('-'): value})
+            conditions.append(condition)
+        return reduce(or_, conditions)
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.base_url = request.build_absolute_uri()
+        page_size = self.get_page_size(request)
+        position, reverse = self.decode_cursor(request)
+        ordering = self.ordering
+        if reverse:
+            ordering = [field[1:] if field.startswith('-') else f'-{field}'
+                        for field in ordering]
+        queryset = queryset.order_by(*ordering)
+        if position is not None:
+            queryset = queryset.filter(
+                self.get_seek_filter(position, reverse))
+        try:
+            results = list(queryset[:page_size + 1])
+        except (ValidationError, ValueError):
+            raise NotFound(self.invalid_cursor_message)
+        has_more = len(results) > page_size
+        results = results[:page_size]
+        if reverse:
+            results.reverse()
+        self.next = self.previous = None
+        has_next = has_more or reverse
+        has_previous = has_more if reverse else position is not None
+        if results:
+            if has_next:
+                self.next = self.encode_cursor(results[-1])
+            if has_previous:
+                self.previous = self.encode_cursor(results[0], reverse=True)
+        elif position is not None:
+            self.previous = replace_query_param(
+                self.base_url, self.cursor_query_param, '')
+        return results
+
+    def get_paginated_response(self, data):
+        return Response(OrderedDict([
+            ('next', self.next),
+            ('previous', self.previous),
+            ('results', data),
+        ]))
 
 
 class ApiPagination(PageNumberPagination):
+    """Постраничный вывод по номеру страницы или по курсору.
+
+    Режим курсора включается параметром cursor (пустое значение - первая
+    страница) в представлениях, у которых задан keyset_ordering.
+    """
+
     page_size_query_param = 'limit'
     page_size = 6
+    keyset = None
+
+    def paginate_queryset(self, queryset, request, view=None):
+        ordering = getattr(view, 'keyset_ordering', None)
+        if ordering and (
+                KeysetPagination.cursor_query_param in request.query_params):
+            self.keyset = KeysetPagination(
+                ordering, self.page_size, self.page_size_query_param,
+                self.max_page_size)
+            return self.keyset.paginate_queryset(queryset, request, view)
+        return super().paginate_queryset(queryset, request, view)
+
+    def get_paginated_response(self, data):
+        if self.keyset is not None:
+            return self.keyset.get_paginated_response(data)
+        return super().get_paginated_response(data)
@@ -1,15 +1,19 @@
 from django.core.validators import MaxValueValidator, MinValueValidator
-from drf_extra_fields.fields import Base64ImageField
+from django.db import transaction
 from rest_framework import serializers, status
 from rest_framework.exceptions import ValidationError
 
-from core.serializers import Hex2NameColor
+from core.profiling import ProfiledModelSerializer
+from core.serializers import (Hex2NameColor, HybridImageField,
+                              load_for_page)
+from recipes.images import image_url, image_urls
 from recipes.models import (Favorite, Ingredient, IngredientRecipe,
-                            Recipe, ShoppingCart, Tag)
+                            Recipe, ShoppingCart, ShoppingCartIngredient, Tag)
+from recipes.registry import ingredient_registry, tag_registry
 from users.serializers import UserSerializer
 
 
-class TagSerializer(serializers.ModelSerializer):
+class TagSerializer(ProfiledModelSerializer):
     color = Hex2NameColor()
 
     class Meta:
@@ -18,27 +22,31 @@ class TagSerializer(serializers.ModelSerializer):
         read_only_fields = fields
 
 
-class IngredientSerializer(serializers.ModelSerializer):
+class IngredientSerializer(ProfiledModelSerializer):
     class Meta:
         model = Ingredient
         fields = ('id', 'name', 'measurement_unit')
         read_only_fields = fields
 
 
-class IngredientRecipeSerializer(serializers.ModelSerializer):
+class IngredientRecipeSerializer(ProfiledModelSerializer):
     id = serializers.ReadOnlyField(
-        source='ingredient.id')
-    name = serializers.ReadOnlyField(
-        source='ingredient.name')
-    measurement_unit = serializers.ReadOnlyField(
-        source='ingredient.measurement_unit')
+        source='ingredient_id')
+    name = serializers.SerializerMethodField()
+    measurement_unit = serializers.SerializerMethodField()
 
     class Meta:
         model = IngredientRecipe
         fields = ('id', 'name', 'measurement_unit', 'amount')
 
+    def get_name(self, obj):
+        return ingredient_registry.get(obj.ingredient_id).name
 
-class AddIngredientSerializer(serializers.ModelSerializer):
+    def get_measurement_unit(self, obj):
+        return ingredient_registry.get(obj.ingredient_id).measurement_unit
+
+
+class AddIngredientSerializer(ProfiledModelSerializer):
     id = serializers.PrimaryKeyRelatedField(
         queryset=Ingredient.objects.all())
     amount = serializers.IntegerField(
@@ -52,8 +60,8 @@ class AddIngredientSerializer(serializers.ModelSerializer):
         fields = ('id', 'amount')
 
 
-class WriteRecipeSerialzer(serializers.ModelSerializer):
-    image = Base64ImageField()
+class WriteRecipeSerialzer(ProfiledModelSerializer):
+    image = HybridImageField()
     ingredients = AddIngredientSerializer(
         many=True,
         write_only=True)
@@ -112,6 +120,7 @@ class WriteRecipeSerialzer(serializers.ModelSerializer):
             ignore_conflicts=True)
         model.tags.set(tags)
 
+    @transaction.atomic
     def create(self, validated_data):
         ingredients = validated_data.pop('ingredients')
         tags = validated_data.pop('tags')
@@ -121,19 +130,28 @@ class WriteRecipeSerialzer(serializers.ModelSerializer):
         self.add_tags_ingredients(ingredients, tags, recipe)
         return recipe
 
+    @transaction.atomic
     def update(self, instance, validated_data):
         ingredients = validated_data.pop('ingredients')
         tags = validated_data.pop('tags')
+        old_amounts = dict(instance.recipe_ingredients.values_list(
+            'ingredient_id', 'amount'))
         instance.ingredients.clear()
         self.add_tags_ingredients(ingredients, tags, instance)
+        ShoppingCartIngredient.objects.change_recipe(
+            instance,
+            old_amounts,
+            {ingredient['id'].id: ingredient['amount']
+             for ingredient in ingredients})
         return super().update(instance, validated_data)
 
 
-class ReadRecipeSerialzer(serializers.ModelSerializer):
+class ReadRecipeSerialzer(ProfiledModelSerializer):
     image = serializers.SerializerMethodField()
+    images = serializers.SerializerMethodField()
     ingredients = IngredientRecipeSerializer(
         many=True, source='recipe_ingredients')
-    tags = TagSerializer(many=True)
+    tags = serializers.SerializerMethodField()
     is_favorited = serializers.BooleanField(read_only=True)
     is_in_shopping_cart = serializers.BooleanField(read_only=True)
     author = UserSerializer(read_only=True)
@@ -142,21 +160,38 @@ class ReadRecipeSerialzer(serializers.ModelSerializer):
         model = Recipe
         fields = ('id', 'tags', 'author', 'ingredients',
                   'is_favorited', 'is_in_shopping_cart',
-                  'name', 'image', 'text', 'cooking_time')
+                  'name', 'image', 'images', 'text', 'cooking_time',
+                  'favorites_count')
         read_only_fields = ('author', 'tags', 'ingredients', )
 
     def get_image(self, recipe):
-        return recipe.image.url
+        return image_url(recipe, self.context.get('image_size'))
+
+    def get_images(self, recipe):
+        return image_urls(recipe)
+
+    def get_tags(self, recipe):
+        tag_ids = load_for_page(self, 'tag_ids', Recipe.objects.tag_ids)
+        return TagSerializer(
+            tag_registry.get_many(tag_ids.get(recipe.id, [])),
+            many=True).data
+
+
+class CookRecipeSerializer(ReadRecipeSerialzer):
+    missing_ingredients = serializers.IntegerField(read_only=True)
+
+    class Meta(ReadRecipeSerialzer.Meta):
+        fields = ReadRecipeSerialzer.Meta.fields + ('missing_ingredients', )
 
 
-class SelectRecipeSerializer(serializers.ModelSerializer):
+class SelectRecipeSerializer(ProfiledModelSerializer):
 
     class Meta:
         model = Recipe
         fields = ('id', 'name', 'image', 'coocking_time')
 
 
-class FavoriteSerializer(serializers.ModelSerializer):
+class FavoriteSerializer(ProfiledModelSerializer):
 
     class Meta:
         model = Favorite
@@ -176,7 +211,7 @@ class FavoriteSerializer(serializers.ModelSerializer):
         return data
 
 
-class ShoppingCartSerializer(serializers.ModelSerializer):
+class ShoppingCartSerializer(ProfiledModelSerializer):
 
     class Meta:
         model = ShoppingCart
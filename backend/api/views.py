@@ -1,21 +1,30 @@
-from django.db.models import Sum
+from django.db.models import F
 from django.shortcuts import get_object_or_404
 from django_filters.rest_framework import DjangoFilterBackend
 from rest_framework import status, viewsets
 from rest_framework.decorators import action
+from rest_framework.exceptions import ValidationError
+from rest_framework.parsers import JSONParser, MultiPartParser
 from rest_framework.permissions import SAFE_METHODS, AllowAny, IsAuthenticated
 from rest_framework.response import Response
 
-from .filters import IngredientSearchFilter, RecipeFilter
+from .filters import RECIPE_ORDERINGS, RecipeFilter
 from .paginations import ApiPagination
 from .permissions import IsAuthorOrReadOnly
-from .serializers import (FavoriteSerializer, IngredientSerializer,
-                          ReadRecipeSerialzer, ShoppingCartSerializer,
-                          TagSerializer, WriteRecipeSerialzer)
-from core.mixins import RetrieveListViewSet
+from .renderers import CSVRenderer, PlainTextRenderer
+from .serializers import (CookRecipeSerializer, FavoriteSerializer,
+                          IngredientSerializer, ReadRecipeSerialzer,
+                          ShoppingCartSerializer, TagSerializer,
+                          WriteRecipeSerialzer)
+from core.constants import LIST_IMAGE_SIZE, RECIPES_CACHE_NAMESPACE
+from core.mixins import (AnonymousCacheMixin, EagerLoadingMixin,
+                         RetrieveListViewSet)
+from core.uploads import ImageUploadHandler
 from core.utils import shopping_cart
-from recipes.models import (Favorite, Ingredient, IngredientRecipe,
-                            Recipe, ShoppingCart, Tag)
+from recipes.autocomplete import ingredient_index
+from recipes.models import Favorite, Ingredient, Recipe, ShoppingCart, Tag
+from recipes.postings import recipe_postings
+from recipes.search import RANKED_ORDERING, get_terms
 from users.serializers import MiniRecipeSerialzer
 
 
@@ -28,25 +37,51 @@ class TagViewSet(RetrieveListViewSet):
 class IngredientViewSet(RetrieveListViewSet):
     queryset = Ingredient.objects.all()
     serializer_class = IngredientSerializer
-    filter_backends = (IngredientSearchFilter, )
     permission_classes = (AllowAny, )
-    search_fields = ('^name',)
 
+    def list(self, request, *args, **kwargs):
+        ingredients = ingredient_index.search(
+            request.query_params.get('name', ''))
+        return Response(self.get_serializer(ingredients, many=True).data)
 
-class RecipeViewSet(viewsets.ModelViewSet):
+
+class RecipeViewSet(AnonymousCacheMixin, EagerLoadingMixin,
+                    viewsets.ModelViewSet):
+    queryset = Recipe.objects.all()
     permission_classes = (IsAuthorOrReadOnly, )
     http_method_names = ['get', 'post', 'patch', 'delete']
     filter_backends = (DjangoFilterBackend, )
     pagination_class = ApiPagination
     filterset_class = RecipeFilter
+    cache_namespace = RECIPES_CACHE_NAMESPACE
+    cache_query_params = ('page', 'limit', 'cursor', 'tags', 'author',
+                          'is_favorited', 'is_in_shopping_cart', 'search',
+                          'ordering')
+    keyset_ordering = ('-pub_date', '-id')
+    parser_classes = (JSONParser, MultiPartParser)
+
+    def initialize_request(self, request, *args, **kwargs):
+        request.upload_handlers.insert(0, ImageUploadHandler(request))
+        return super().initialize_request(request, *args, **kwargs)
+
+    def initial(self, request, *args, **kwargs):
+        super().initial(request, *args, **kwargs)
+        if self.action != 'list':
+            return
+        params = request.query_params
+        if get_terms(params.get('search', '')):
+            if 'ordering' in params:
+                raise ValidationError({'ordering': (
+                    'Результаты поиска упорядочены по релевантности, '
+                    'ordering с search не используется.')})
+            self.keyset_ordering = RANKED_ORDERING
+            return
+        ordering = RECIPE_ORDERINGS.get(params.get('ordering'))
+        if ordering:
+            self.keyset_ordering = ordering
 
     def get_queryset(self):
-        return Recipe.objects.select_related(
-            'author'
-        ).prefetch_related(
-            'tags',
-            'ingredients'
-        ).all().annotate_is_fav_and_is_in_shop_cart(
+        return super().get_queryset().annotate_is_fav_and_is_in_shop_cart(
             self.request.user)
 
     def get_serializer_class(self):
@@ -54,22 +89,61 @@ class RecipeViewSet(viewsets.ModelViewSet):
             return ReadRecipeSerialzer
         return WriteRecipeSerialzer
 
+    def get_serializer_context(self):
+        context = super().get_serializer_context()
+        if not self.detail:
+            context['image_size'] = LIST_IMAGE_SIZE
+        return context
+
     @action(detail=False,
             methods=['get'],
-            permission_classes=[IsAuthenticated])
+            permission_classes=[IsAuthenticated],
+            renderer_classes=[PlainTextRenderer, CSVRenderer])
     def download_shopping_cart(self, request):
         user = self.request.user
         if user.shopping_cart.exists():
-            sum_ingredients_in_recipes = IngredientRecipe.objects.filter(
-                recipe__shopping_cart__user=user
-            ).values(
-                'ingredient__name', 'ingredient__measurement_unit'
-            ).annotate(
-                amounts=Sum('amount')).order_by('ingredient__name')
-            return shopping_cart(self, request, sum_ingredients_in_recipes)
+            sum_ingredients_in_recipes = user.shopping_cart_ingredients.values(
+                'ingredient__name', 'ingredient__measurement_unit',
+                amounts=F('amount')
+            ).order_by('ingredient__name')
+            return shopping_cart(sum_ingredients_in_recipes,
+                                 request.accepted_renderer.format)
         return Response('Список покупок пуст.',
                         status=status.HTTP_404_NOT_FOUND)
 
+    @action(detail=False,
+            methods=['get'],
+            keyset_ordering=None)
+    def cook(self, request):
+        try:
+            ingredient_ids = [
+                int(value)
+                for values in request.query_params.getlist('ingredients')
+                for value in values.split(',') if value.strip()]
+            max_missing = request.query_params.get('max_missing')
+            max_missing = None if max_missing is None else int(max_missing)
+        except ValueError:
+            raise ValidationError(
+                {'error': 'Ингредиенты и max_missing задаются числами.'})
+        if not ingredient_ids:
+            raise ValidationError({'ingredients': 'Укажите ингредиенты.'})
+        if max_missing is not None and max_missing < 0:
+            raise ValidationError(
+                {'max_missing': 'max_missing не может быть отрицательным.'})
+        page = self.paginate_queryset(
+            recipe_postings.cook(ingredient_ids, max_missing))
+        recipes = self.get_queryset().in_bulk(
+            [recipe_id for recipe_id, _ in page])
+        for recipe_id, missing in page:
+            if recipe_id in recipes:
+                recipes[recipe_id].missing_ingredients = missing
+        serializer = CookRecipeSerializer(
+            [recipes[recipe_id] for recipe_id, _ in page
+             if recipe_id in recipes],
+            many=True,
+            context=self.get_serializer_context())
+        return self.get_paginated_response(serializer.data)
+
     def shopping_cart_favorite_create(self, request, pk, serializer_class):
         recipe = get_object_or_404(Recipe, pk=pk)
         user = self.request.user
@@ -0,0 +1,37 @@
+from django.contrib import admin
+from django.core.paginator import Paginator
+from django.forms.models import BaseInlineFormSet
+
+
+class PaginatedInlineFormSet(BaseInlineFormSet):
+    """Формсет, который показывает только одну страницу связанных строк."""
+
+    per_page = 20
+    request = None
+    page = None
+
+    @property
+    def page_param(self):
+        return f'{self.prefix}-page'
+
+    def get_queryset(self):
+        if self.page is None:
+            queryset = super().get_queryset()
+            params = self.request.GET if self.request else {}
+            self.page = Paginator(queryset, self.per_page).get_page(
+                params.get(self.page_param))
+            self._queryset = queryset.filter(
+                pk__in=[obj.pk for obj in self.page.object_list])
+        return self._queryset
+
+
+class PaginatedTabularInline(admin.TabularInline):
+    formset = PaginatedInlineFormSet
+    template = 'admin/edit_inline/paginated_tabular.html'
+    per_page = 20
+
+    def get_formset(self, request, obj=None, **kwargs):
+        formset = super().get_formset(request, obj, **kwargs)
+        formset.request = request
+        formset.per_page = self.per_page
+        return formset
@@ -0,0 +1,47 @@
+from functools import wraps
+
+from asgiref.sync import sync_to_async
+from django.db import close_old_connections
+from django.urls import URLPattern
+
+from .db.instrumentation import attach_recorders
+
+
+def offload(view):
+    """Асинхронная обёртка синхронного представления для режима ASGI.
+
+    Django под ASGI выполняет синхронные представления в одном общем
+    потоке, поэтому запросы к ним идут по очереди. Обёртка выполняет
+    представление и отрисовку ответа в пуле потоков, а цикл событий
+    тем временем принимает другие запросы и отдаёт ответы медленным
+    клиентам. Соединение с базой данных закрывается в том же потоке, а
+    счётчики запросов к базе (метрики, Server-Timing, профилировщик)
+    подключаются к соединениям этого потока.
+    """
+    def run(request, *args, **kwargs):
+        close_old_connections()
+        try:
+            with attach_recorders():
+                response = view(request, *args, **kwargs)
+                if callable(getattr(response, 'render', None)):
+                    response = response.render()
+            return response
+        finally:
+            close_old_connections()
+
+    run_in_thread = sync_to_async(run, thread_sensitive=False)
+
+    @wraps(view)
+    async def async_view(request, *args, **kwargs):
+        return await run_in_thread(request, *args, **kwargs)
+
+    return async_view
+
+
+def offload_patterns(patterns, names):
+    """Заменяет представления маршрутов с именами из names обёртками."""
+    return [
+        URLPattern(pattern.pattern, offload(pattern.callback),
+                   pattern.default_args, pattern.name)
+        if pattern.name in names else pattern
+        for pattern in patterns]
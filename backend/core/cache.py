@@ -0,0 +1,77 @@
+from uuid import uuid4
+
+from django.conf import settings
+from django.core.cache import DEFAULT_CACHE_ALIAS, cache
+from django.core.exceptions import ImproperlyConfigured
+
+from .metrics import CACHE_LOOKUPS
+
+
+LOCAL_CACHE_BACKENDS = (
+    'django.core.cache.backends.locmem.LocMemCache',
+    'django.core.cache.backends.dummy.DummyCache',
+)
+
+
+def is_shared_cache(alias=DEFAULT_CACHE_ALIAS):
+    """Видят ли записи кэша другие процессы сервера."""
+    return settings.CACHES[alias]['BACKEND'] not in LOCAL_CACHE_BACKENDS
+
+
+def check_shared_cache(reason):
+    if not is_shared_cache():
+        raise ImproperlyConfigured(
+            f'{reason} нужен общий для процессов кэш: задайте CACHE_BACKEND '
+            f'(memcached или FileBasedCache), а не '
+            f'{settings.CACHES[DEFAULT_CACHE_ALIAS]["BACKEND"]}.')
+
+
+def get_version(key):
+    version = cache.get(key)
+    if version is None:
+        cache.add(key, uuid4().hex, None)
+        version = cache.get(key)
+    return version
+
+
+def bump_version(key):
+    cache.set(key, uuid4().hex, None)
+
+
+def record_lookup(namespace, hit):
+    CACHE_LOOKUPS.labels(namespace, 'hit' if hit else 'miss').inc()
+    key = f'{namespace}:stats:{"hits" if hit else "misses"}'
+    cache.add(key, 0, None)
+    try:
+        cache.incr(key)
+    except ValueError:
+        pass
+
+
+def get_stats(namespace):
+    stats = cache.get_many(
+        [f'{namespace}:stats:hits', f'{namespace}:stats:misses'])
+    return {
+        'hits': stats.get(f'{namespace}:stats:hits', 0),
+        'misses': stats.get(f'{namespace}:stats:misses', 0),
+    }
+
+
+def list_version_key(namespace):
+    return f'{namespace}:list:version'
+
+
+def detail_version_key(namespace, pk):
+    return f'{namespace}:detail:{pk}:version'
+
+
+def invalidate_details(namespace, pks):
+    """Сбрасывает только детальные ответы объектов pks."""
+    cache.set_many({detail_version_key(namespace, pk): uuid4().hex
+                    for pk in pks}, None)
+
+
+def invalidate_responses(namespace, pks=()):
+    """Сбрасывает закэшированные списки и детальные ответы объектов pks."""
+    invalidate_details(namespace, pks)
+    bump_version(list_version_key(namespace))
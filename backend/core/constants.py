@@ -9,3 +9,13 @@ OTHER_NAME_LIMIT = 200
 USERNAME_PATTERN = r'[\w\.@+-]+'
 
 HEX_NAME_PATTERN = r'#([A-Fa-f0-9]{6}|[A-Fa-f0-9]{3})'
+
+SHOPPING_CART_CHUNK_SIZE = 2000
+
+RECIPES_CACHE_NAMESPACE = 'recipes'
+
+IMAGE_SIZES = {'small': 320, 'medium': 640, 'large': 1280}
+
+IMAGE_FORMATS = {'jpeg': 'JPEG', 'webp': 'WEBP'}
+
+LIST_IMAGE_SIZE = 'small'
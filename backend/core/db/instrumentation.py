@@ -0,0 +1,174 @@
+import json
+import logging
+import random
+import re
+from contextlib import ExitStack, contextmanager
+from contextvars import ContextVar
+from time import perf_counter
+
+from django.conf import settings
+from django.db import connections
+
+logger = logging.getLogger(__name__)
+
+FORCE_HEADER = 'HTTP_X_SERVER_TIMING'
+TIMING_REPEATS = 3
+DESCRIPTION_LENGTH = 80
+LOG_SQL_LENGTH = 300
+
+LITERALS = re.compile(r"'(?:[^']|'')*'|\b\d+(?:\.\d+)?\b")
+PARAMETER_LISTS = re.compile(
+    r'\(\s*(?:%s|\?)(?:\s*,\s*(?:%s|\?))*\s*\)')
+
+active_recorders = ContextVar('query_recorders', default=())
+
+
+def fingerprint(sql):
+    """Форма запроса: литералы и списки параметров IN заменены."""
+    sql = LITERALS.sub('?', sql)
+    sql = PARAMETER_LISTS.sub('(...)', sql)
+    return ' '.join(sql.split())
+
+
+class QueryRecorder:
+    """Считает запросы всех соединений за время одного HTTP-запроса.
+
+    Во время запроса копится только число выполнений и время по тексту
+    SQL; приведение к форме выполняется один раз в конце и только для
+    различающихся текстов.
+    """
+
+    def __init__(self):
+        self.count = 0
+        self.duration = 0.0
+        self.elapsed = 0.0
+        self.statements = {}
+
+    @contextmanager
+    def record(self):
+        """Подключает счётчик ко всем соединениям на время блока.
+
+        Соединения у каждого потока свои, поэтому счётчик ещё и
+        запоминается в контексте запроса: потоки, в которые передан этот
+        контекст, подключают его через attach_recorders.
+        """
+        start = perf_counter()
+        token = active_recorders.set(active_recorders.get() + (self, ))
+        try:
+            with attach_recorders():
+                yield self
+        finally:
+            active_recorders.reset(token)
+            self.elapsed = perf_counter() - start
+
+    def __call__(self, execute, sql, params, many, context):
+        start = perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            elapsed = perf_counter() - start
+            self.count += 1
+            self.duration += elapsed
+            entry = self.statements.get(sql)
+            if entry is None:
+                self.statements[sql] = [1, elapsed]
+            else:
+                entry[0] += 1
+                entry[1] += elapsed
+
+    def repeated(self, threshold=2):
+        """Формы запросов, выполненные не меньше threshold раз."""
+        groups = {}
+        for sql, (count, duration) in self.statements.items():
+            group = groups.setdefault(fingerprint(sql), [0, 0.0])
+            group[0] += count
+            group[1] += duration
+        return sorted(
+            ((sql, count, duration)
+             for sql, (count, duration) in groups.items()
+             if count >= threshold),
+            key=lambda item: (-item[1], -item[2]))
+
+
+@contextmanager
+def attach_recorders():
+    """Подключает счётчики текущего запроса к соединениям этого потока."""
+    with ExitStack() as stack:
+        for recorder in active_recorders.get():
+            for connection in connections.all():
+                if recorder not in connection.execute_wrappers:
+                    stack.enter_context(connection.execute_wrapper(recorder))
+        yield
+
+
+def quote(text, length=DESCRIPTION_LENGTH):
+    if len(text) > length:
+        text = text[:length - 3] + '...'
+    text = text.encode('ascii', 'replace').decode()
+    return '"{}"'.format(text.replace('\\', '\\\\').replace('"', '\\"'))
+
+
+def server_timing(recorder, elapsed):
+    metrics = [
+        f'app;dur={elapsed * 1000:.1f}',
+        f'db;dur={recorder.duration * 1000:.1f};'
+        f'desc={quote(f"{recorder.count} queries")}',
+    ]
+    for sql, count, duration in recorder.repeated()[:TIMING_REPEATS]:
+        metrics.append(f'sql;dur={duration * 1000:.1f};'
+                       f'desc={quote(f"{count}x {sql}")}')
+    return ', '.join(metrics)
+
+
+class QueryInstrumentationMiddleware:
+    """Замеряет запросы к базе данных и время ответа.
+
+    Замеряется доля SQL_INSTRUMENTATION_SAMPLE_RATE запросов, все запросы
+    в режиме DEBUG и запросы с заголовком X-Server-Timing. Замеры
+    отдаются в заголовке Server-Timing сотрудникам и в режиме DEBUG.
+    Запрос дольше SLOW_REQUEST_MS, с числом запросов к базе от
+    SLOW_REQUEST_QUERIES или с запросом одной формы, повторённым
+    REPEATED_QUERY_THRESHOLD раз, пишется в журнал строкой JSON.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def sampled(self, request):
+        return (settings.DEBUG or FORCE_HEADER in request.META
+                or random.random() < settings.SQL_INSTRUMENTATION_SAMPLE_RATE)
+
+    def __call__(self, request):
+        if not self.sampled(request):
+            return self.get_response(request)
+        recorder = QueryRecorder()
+        with recorder.record():
+            response = self.get_response(request)
+        elapsed = recorder.elapsed
+        user = getattr(request, 'user', None)
+        if settings.DEBUG or getattr(user, 'is_staff', False):
+            response['Server-Timing'] = server_timing(recorder, elapsed)
+        self.log_slow_request(request, response, recorder, elapsed)
+        return response
+
+    def log_slow_request(self, request, response, recorder, elapsed):
+        repeated = recorder.repeated(settings.REPEATED_QUERY_THRESHOLD)
+        if (elapsed * 1000 < settings.SLOW_REQUEST_MS
+                and recorder.count < settings.SLOW_REQUEST_QUERIES
+                and not repeated):
+            return
+        user = getattr(request, 'user', None)
+        logger.warning(json.dumps({
+            'event': 'slow_request',
+            'method': request.method,
+            'path': request.path,
+            'status': response.status_code,
+            'user': getattr(user, 'pk', None),
+            'duration_ms': round(elapsed * 1000, 1),
+            'queries': recorder.count,
+            'db_ms': round(recorder.duration * 1000, 1),
+            'repeated': [
+                {'count': count, 'db_ms': round(duration * 1000, 1),
+                 'sql': sql[:LOG_SQL_LENGTH]}
+                for sql, count, duration in repeated],
+        }, ensure_ascii=False))
@@ -0,0 +1,220 @@
+import os
+import threading
+from collections import deque
+from functools import partial
+from time import monotonic
+
+from django.db import DatabaseError
+
+DEFAULT_POOL = {
+    'MAX_SIZE': 10,
+    'TIMEOUT': 5,
+    'HEALTH_CHECK_INTERVAL': 30,
+    'MAX_LIFETIME': 600,
+}
+
+pools = {}
+pools_lock = threading.Lock()
+
+
+class PoolTimeout(DatabaseError):
+    pass
+
+
+class PooledConnection:
+    __slots__ = ('connection', 'created_at', 'used_at')
+
+    def __init__(self, connection):
+        self.connection = connection
+        self.created_at = self.used_at = monotonic()
+
+
+class ConnectionPool:
+    """Ограниченный пул соединений с базой данных в памяти процесса.
+
+    Свободные соединения выдаются в порядке, обратном возврату, поэтому
+    лишние простаивают и закрываются по MAX_LIFETIME. Соединение,
+    простоявшее дольше HEALTH_CHECK_INTERVAL секунд, перед выдачей
+    проверяется запросом SELECT 1. Когда открыто MAX_SIZE соединений и
+    все заняты, поток ждёт освобождения не дольше TIMEOUT секунд.
+    """
+
+    def __init__(self, alias, options):
+        options = {**DEFAULT_POOL, **options}
+        self.alias = alias
+        self.max_size = options['MAX_SIZE']
+        self.timeout = options['TIMEOUT']
+        self.health_check_interval = options['HEALTH_CHECK_INTERVAL']
+        self.max_lifetime = options['MAX_LIFETIME']
+        self.pid = os.getpid()
+        self.condition = threading.Condition()
+        self.idle = deque()
+        self.in_use = {}
+        self.size = 0
+        self.stats = dict.fromkeys((
+            'checkouts', 'waits', 'timeouts', 'created', 'discarded',
+            'health_checks'), 0)
+        self.checkout_seconds = 0.0
+        self.max_checkout_seconds = 0.0
+
+    def is_usable(self, pooled, now):
+        if now - pooled.created_at > self.max_lifetime:
+            return False
+        if now - pooled.used_at <= self.health_check_interval:
+            return True
+        with self.condition:
+            self.stats['health_checks'] += 1
+        try:
+            cursor = pooled.connection.cursor()
+            try:
+                cursor.execute('SELECT 1')
+            finally:
+                cursor.close()
+            pooled.connection.rollback()
+        except Exception:
+            return False
+        return True
+
+    def discard(self, connection):
+        try:
+            connection.close()
+        except Exception:
+            pass
+        with self.condition:
+            self.size -= 1
+            self.stats['discarded'] += 1
+            self.condition.notify()
+
+    def reserve(self, deadline):
+        """Берёт свободное соединение или место для нового (None)."""
+        with self.condition:
+            if not self.idle and self.size >= self.max_size:
+                self.stats['waits'] += 1
+            while not self.idle and self.size >= self.max_size:
+                remaining = deadline - monotonic()
+                if remaining <= 0:
+                    self.stats['timeouts'] += 1
+                    raise PoolTimeout(
+                        f'Нет свободных соединений с базой {self.alias} '
+                        f'за {self.timeout} с.')
+                self.condition.wait(remaining)
+            if self.idle:
+                return self.idle.pop()
+            self.size += 1
+            return None
+
+    def connect(self, connect):
+        try:
+            pooled = PooledConnection(connect())
+        except Exception:
+            with self.condition:
+                self.size -= 1
+                self.condition.notify()
+            raise
+        with self.condition:
+            self.stats['created'] += 1
+        return pooled
+
+    def checkout(self, connect):
+        start = monotonic()
+        deadline = start + self.timeout
+        while True:
+            pooled = self.reserve(deadline)
+            if pooled is None:
+                pooled = self.connect(connect)
+                break
+            if self.is_usable(pooled, monotonic()):
+                break
+            self.discard(pooled.connection)
+        elapsed = monotonic() - start
+        with self.condition:
+            self.in_use[id(pooled.connection)] = pooled
+            self.stats['checkouts'] += 1
+            self.checkout_seconds += elapsed
+            self.max_checkout_seconds = max(
+                self.max_checkout_seconds, elapsed)
+        return pooled.connection
+
+    def checkin(self, connection):
+        with self.condition:
+            pooled = self.in_use.pop(id(connection), None)
+        if pooled is None:
+            connection.close()
+            return
+        try:
+            connection.rollback()
+        except Exception:
+            self.discard(connection)
+            return
+        pooled.used_at = monotonic()
+        if pooled.used_at - pooled.created_at > self.max_lifetime:
+            self.discard(connection)
+            return
+        with self.condition:
+            self.idle.append(pooled)
+            self.condition.notify()
+
+    def close_idle(self):
+        with self.condition:
+            idle, self.idle = list(self.idle), deque()
+        for pooled in idle:
+            self.discard(pooled.connection)
+
+    def get_stats(self):
+        with self.condition:
+            checkouts = self.stats['checkouts']
+            return {
+                'max_size': self.max_size,
+                'size': self.size,
+                'in_use': len(self.in_use),
+                'idle': len(self.idle),
+                **self.stats,
+                'checkout_ms_avg': round(
+                    self.checkout_seconds * 1000 / checkouts, 3
+                ) if checkouts else 0,
+                'checkout_ms_max': round(
+                    self.max_checkout_seconds * 1000, 3),
+            }
+
+
+def get_pool(alias, options):
+    """Пул текущего процесса: после fork создаётся новый."""
+    with pools_lock:
+        pool = pools.get(alias)
+        if pool is None or pool.pid != os.getpid():
+            pool = pools[alias] = ConnectionPool(alias, options)
+        return pool
+
+
+def pool_stats():
+    return {alias: pool.get_stats() for alias, pool in pools.items()
+            if pool.pid == os.getpid()}
+
+
+def close_pools():
+    """Закрывает свободные соединения, например перед fork."""
+    for pool in list(pools.values()):
+        if pool.pid == os.getpid():
+            pool.close_idle()
+
+
+class PooledDatabaseWrapperMixin:
+    """Берёт соединения DatabaseWrapper из пула и возвращает их в пул.
+
+    Параметры пула задаются ключом POOL в настройках базы данных.
+    CONN_MAX_AGE должен быть 0: тогда Django возвращает соединение в
+    конце каждого запроса, а повторное открытие берёт его из пула.
+    """
+
+    @property
+    def pool(self):
+        return get_pool(self.alias, self.settings_dict.get('POOL', {}))
+
+    def get_new_connection(self, conn_params):
+        return self.pool.checkout(
+            partial(super().get_new_connection, conn_params))
+
+    def _close(self):
+        if self.connection is not None:
+            with self.wrap_database_errors:
+                self.pool.checkin(self.connection)
@@ -0,0 +1,152 @@
+import hashlib
+import logging
+import random
+import threading
+from contextlib import contextmanager
+from contextvars import ContextVar
+from time import monotonic
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS, OperationalError, connections
+
+from ..cache import check_shared_cache
+
+logger = logging.getLogger(__name__)
+
+PRIMARY_MODELS = frozenset(('authtoken.token', 'sessions.session'))
+SAFE_METHODS = frozenset(('GET', 'HEAD', 'OPTIONS'))
+
+read_state = ContextVar('replica_read_state', default=None)
+down_until = {}
+down_lock = threading.Lock()
+
+
+class ReadState:
+    """Выбор базы для чтения в рамках одного запроса."""
+
+    __slots__ = ('replicas', 'alias', 'retried')
+
+    def __init__(self, replicas):
+        self.replicas = replicas
+        self.alias = None
+        self.retried = False
+
+
+def mark_down(alias):
+    with down_lock:
+        down_until[alias] = monotonic() + settings.REPLICA_RETRY_SECONDS
+    logger.warning('Реплика %s недоступна, чтение идёт с основной базы',
+                   alias)
+
+
+def available_replicas():
+    now = monotonic()
+    return [alias for alias in settings.DATABASE_REPLICAS
+            if down_until.get(alias, 0) <= now]
+
+
+def choose_replica():
+    """Случайная доступная реплика или основная база, если таких нет.
+
+    Соединение с репликой открывается сразу: реплика, к которой не
+    удалось подключиться, исключается на REPLICA_RETRY_SECONDS секунд.
+    """
+    replicas = available_replicas()
+    random.shuffle(replicas)
+    for alias in replicas:
+        try:
+            connections[alias].ensure_connection()
+        except OperationalError:
+            mark_down(alias)
+        else:
+            return alias
+    return DEFAULT_DB_ALIAS
+
+
+@contextmanager
+def use_primary():
+    """Читает с основной базы внутри блока, например при сборке индексов."""
+    token = read_state.set(None)
+    try:
+        yield
+    finally:
+        read_state.reset(token)
+
+
+def pin_key(request):
+    credentials = (request.META.get('HTTP_AUTHORIZATION')
+                   or request.COOKIES.get(settings.SESSION_COOKIE_NAME))
+    if not credentials:
+        return None
+    digest = hashlib.sha256(credentials.encode()).hexdigest()[:32]
+    return f'replicas:pin:{digest}'
+
+
+class ReplicaRouter:
+    """Отправляет чтение безопасных запросов на реплики, запись - в default.
+
+    Реплики перечислены в настройке DATABASE_REPLICAS. Чтение идёт с
+    реплики, только если ReplicaMiddleware разрешил это для текущего
+    запроса; команды, фоновые потоки и запросы на изменение читают с
+    основной базы. Токены и сессии всегда читаются с основной базы, чтобы
+    только что выданный токен сразу работал.
+    """
+
+    def db_for_read(self, model, **hints):
+        state = read_state.get()
+        if (state is None or not state.replicas
+                or model._meta.label_lower in PRIMARY_MODELS):
+            return DEFAULT_DB_ALIAS
+        if state.alias is None:
+            state.alias = choose_replica()
+        return state.alias
+
+    def db_for_write(self, model, **hints):
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        return True
+
+
+class ReplicaMiddleware:
+    """Решает, может ли запрос читать с реплики.
+
+    После успешного запроса на изменение клиент закрепляется за основной
+    базой на REPLICA_PIN_SECONDS секунд, чтобы сразу видеть свои изменения:
+    отметка хранится в кэше по заголовку Authorization или cookie
+    сессии. Следующий запрос клиента может попасть в другой worker,
+    поэтому с репликами нужен общий для процессов кэш: с кэшем в памяти
+    процесса сервер не запускается. Если реплика отказала посреди
+    безопасного запроса, он повторяется на основной базе.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if settings.DATABASE_REPLICAS:
+            check_shared_cache('Для чтения с реплик (DATABASE_REPLICAS)')
+
+    def __call__(self, request):
+        key = pin_key(request)
+        safe = request.method in SAFE_METHODS
+        replicas = bool(settings.DATABASE_REPLICAS) and safe and not (
+            key and cache.get(key))
+        token = read_state.set(ReadState(replicas))
+        try:
+            response = self.get_response(request)
+        finally:
+            read_state.reset(token)
+        if key and not safe and response.status_code < 400:
+            cache.set(key, True, settings.REPLICA_PIN_SECONDS)
+        return response
+
+    def process_exception(self, request, exception):
+        state = read_state.get()
+        if (not isinstance(exception, OperationalError) or state is None
+                or state.alias in (None, DEFAULT_DB_ALIAS)
+                or state.retried):
+            return None
+        mark_down(state.alias)
+        state.alias = DEFAULT_DB_ALIAS
+        state.retried = True
+        return self.get_response(request)
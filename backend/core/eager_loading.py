@@ -0,0 +1,73 @@
+from collections import namedtuple
+
+from django.core.exceptions import FieldDoesNotExist
+from django.db.models import Prefetch
+from rest_framework import serializers
+
+LoadingPlan = namedtuple('LoadingPlan', ('select', 'prefetch'))
+
+
+def new_plan():
+    return LoadingPlan(set(), {})
+
+
+def add_field(plan, model, attrs, field, prefix=''):
+    if not attrs:
+        if isinstance(field, serializers.ListSerializer):
+            field = field.child
+        if isinstance(field, serializers.BaseSerializer):
+            add_serializer(plan, model, field, prefix)
+        return
+    attr, rest = attrs[0], attrs[1:]
+    try:
+        relation = model._meta.get_field(attr)
+    except FieldDoesNotExist:
+        return
+    if not relation.is_relation or relation.name != attr:
+        return
+    if relation.many_to_many or relation.one_to_many:
+        path = prefix + attr
+        if path not in plan.prefetch:
+            plan.prefetch[path] = (relation.related_model, new_plan())
+        add_field(plan.prefetch[path][1], relation.related_model, rest,
+                  field)
+        return
+    if (not rest and isinstance(field, serializers.RelatedField)
+            and field.use_pk_only_optimization()):
+        return
+    plan.select.add(prefix + attr)
+    add_field(plan, relation.related_model, rest, field, f'{prefix}{attr}__')
+
+
+def add_serializer(plan, model, serializer, prefix=''):
+    for field in serializer.fields.values():
+        if field.write_only or isinstance(
+                field, serializers.SerializerMethodField):
+            continue
+        attrs = [] if field.source == '*' else field.source_attrs
+        if isinstance(field, serializers.ManyRelatedField):
+            field = field.child_relation
+        add_field(plan, model, attrs, field, prefix)
+
+
+def get_loading_plan(model, serializer):
+    """Собирает select_related и prefetch_related по полям сериализатора.
+
+    Обходит вложенные сериализаторы, source с точками и поля many=True.
+    Поля SerializerMethodField не разбираются: данные для них метод
+    загружает сам.
+    """
+    plan = new_plan()
+    add_serializer(plan, model, serializer)
+    return plan
+
+
+def apply_loading_plan(queryset, plan):
+    if plan.select:
+        queryset = queryset.select_related(*sorted(plan.select))
+    if plan.prefetch:
+        queryset = queryset.prefetch_related(*(
+            Prefetch(path, queryset=apply_loading_plan(
+                model._default_manager.all(), child))
+            for path, (model, child) in sorted(plan.prefetch.items())))
+    return queryset
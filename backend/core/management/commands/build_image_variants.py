@@ -0,0 +1,27 @@
+from django.core.management import BaseCommand
+
+from recipes.images import generate_image_variants
+from recipes.models import Recipe
+
+
+class Command(BaseCommand):
+    help = 'Builds thumbnails and WebP variants of recipe images'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size', type=int, default=100,
+            help='Recipes per batch')
+        parser.add_argument(
+            '--force', action='store_true',
+            help='Rebuild variants that are up to date')
+
+    def handle(self, *args, **options):
+        recipe_ids = list(Recipe.objects.order_by('pk').values_list(
+            'pk', flat=True))
+        batch_size = options['batch_size']
+        updated = 0
+        for start in range(0, len(recipe_ids), batch_size):
+            updated += generate_image_variants(
+                recipe_ids[start:start + batch_size], options['force'])
+        self.stdout.write(self.style.SUCCESS(
+            f'{updated} of {len(recipe_ids)} recipe images processed'))
@@ -0,0 +1,16 @@
+from django.core.management import BaseCommand
+
+from core.cache import get_stats
+from core.constants import RECIPES_CACHE_NAMESPACE
+
+
+class Command(BaseCommand):
+    help = 'Shows hit and miss counts of the anonymous response cache'
+
+    def handle(self, *args, **options):
+        stats = get_stats(RECIPES_CACHE_NAMESPACE)
+        lookups = stats['hits'] + stats['misses']
+        ratio = stats['hits'] / lookups * 100 if lookups else 0
+        self.stdout.write(self.style.SUCCESS(
+            f'{RECIPES_CACHE_NAMESPACE}: {stats["hits"]} hits, '
+            f'{stats["misses"]} misses ({ratio:.1f}% hit ratio)'))
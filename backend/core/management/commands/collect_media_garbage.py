@@ -0,0 +1,75 @@
+import posixpath
+from datetime import timedelta
+
+from django.core.management import BaseCommand
+from django.utils import timezone
+
+from recipes.images import VARIANTS_DIR, variant_stem
+from recipes.models import Recipe
+
+
+def walk(storage, path):
+    if not storage.exists(path):
+        return
+    directories, files = storage.listdir(path)
+    for name in sorted(files):
+        yield posixpath.join(path, name)
+    for directory in sorted(directories):
+        yield from walk(storage, posixpath.join(path, directory))
+
+
+def batches(items, size):
+    for start in range(0, len(items), size):
+        yield items[start:start + size]
+
+
+class Command(BaseCommand):
+    help = 'Deletes recipe images and their variants no recipe refers to'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size', type=int, default=500,
+            help='Files checked per query')
+        parser.add_argument(
+            '--min-age', type=int, default=3600,
+            help='Keep files modified less than this many seconds ago')
+        parser.add_argument(
+            '--dry-run', action='store_true',
+            help='Only report what would be deleted')
+
+    def find_orphans(self, storage, batch_size):
+        field = Recipe._meta.get_field('image')
+        files = list(walk(storage, field.upload_to.rstrip('/')))
+        variants = [name for name in files
+                    if name.startswith(VARIANTS_DIR + '/')]
+        images = [name for name in files
+                  if not name.startswith(VARIANTS_DIR + '/')]
+        orphans = []
+        used_stems = set()
+        for batch in batches(images, batch_size):
+            used = set(Recipe.objects.filter(image__in=batch).values_list(
+                'image', flat=True))
+            for name in batch:
+                if name in used:
+                    used_stems.add(
+                        posixpath.splitext(posixpath.basename(name))[0])
+                else:
+                    orphans.append(name)
+        orphans.extend(name for name in variants
+                       if variant_stem(name) not in used_stems)
+        return orphans
+
+    def handle(self, *args, **options):
+        storage = Recipe._meta.get_field('image').storage
+        cutoff = timezone.now() - timedelta(seconds=options['min_age'])
+        orphans = [
+            name for name in self.find_orphans(storage, options['batch_size'])
+            if storage.get_modified_time(name) < cutoff]
+        size = 0
+        for name in orphans:
+            size += storage.size(name)
+            if not options['dry_run']:
+                storage.delete(name)
+        action = 'would be deleted' if options['dry_run'] else 'deleted'
+        self.stdout.write(self.style.SUCCESS(
+            f'{len(orphans)} files ({size // 1024} KB) {action}'))
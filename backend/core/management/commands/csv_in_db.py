@@ -1,44 +1,103 @@
 import csv
+import io
+import json
+from pathlib import Path
+from time import perf_counter
 
-from django.core.management import BaseCommand
+from django.conf import settings
+from django.core.management import BaseCommand, CommandError
+from django.db import connection, transaction
 
 from recipes.models import Ingredient, Tag
+from recipes.registry import ingredient_registry, tag_registry
+
+DATA_DIR = Path(settings.BASE_DIR).parent / 'data'
+
+REFERENCE_DATA = {
+    'ingredients': (Ingredient, ('name', 'measurement_unit'),
+                    ingredient_registry),
+    'tags': (Tag, ('name', 'color', 'slug'), tag_registry),
+}
+
+
+def read_rows(path, fields, file_format):
+    with open(path, 'r', encoding='utf-8') as file:
+        if file_format == 'json':
+            for item in json.load(file):
+                yield tuple(str(item[field]).strip() for field in fields)
+            return
+        for row in csv.reader(file):
+            if row:
+                yield tuple(value.strip() for value in row[:len(fields)])
+
+
+def copy_rows(model, fields, rows):
+    table = model._meta.db_table
+    columns = ', '.join(connection.ops.quote_name(field) for field in fields)
+    buffer = io.StringIO()
+    csv.writer(buffer).writerows(rows)
+    buffer.seek(0)
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f'CREATE TEMP TABLE tmp_{table} ON COMMIT DROP AS '
+            f'SELECT {columns} FROM {table} WITH NO DATA')
+        cursor.cursor.copy_expert(
+            f'COPY tmp_{table} ({columns}) FROM STDIN WITH (FORMAT csv)',
+            buffer)
+        cursor.execute(
+            f'INSERT INTO {table} ({columns}) '
+            f'SELECT {columns} FROM tmp_{table} ON CONFLICT DO NOTHING')
+        return cursor.rowcount
+
+
+def bulk_create_rows(model, fields, rows, batch_size):
+    before = model.objects.count()
+    model.objects.bulk_create(
+        (model(**dict(zip(fields, row))) for row in rows),
+        batch_size=batch_size,
+        ignore_conflicts=True)
+    return model.objects.count() - before
 
 
 class Command(BaseCommand):
-    help = 'Loads data from ingredients.csv'
+    help = 'Loads ingredients and tags from CSV or JSON files'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--ingredients', default=DATA_DIR / 'ingredients.csv',
+            type=Path, help='Path to ingredients .csv or .json')
+        parser.add_argument(
+            '--tags', default=DATA_DIR / 'tags.csv',
+            type=Path, help='Path to tags .csv or .json')
+        parser.add_argument(
+            '--batch-size', type=int, default=5000,
+            help='Rows per INSERT')
+        parser.add_argument(
+            '--no-copy', action='store_true',
+            help='Do not use COPY on PostgreSQL')
 
     def handle(self, *args, **options):
+        for name, (model, fields, registry) in REFERENCE_DATA.items():
+            path = options[name]
+            try:
+                self.load(model, fields, path, options)
+            except (IOError, ValueError, KeyError) as error:
+                raise CommandError(f'Could not load {path}: {error}')
+            registry.invalidate()
 
-        print('Loading ingredients and tags data')
-
-        try:
-            with open('../data/ingredients.csv',
-                      'r', encoding='utf-8') as file:
-                reader = csv.reader(file)
-                for name, unit in reader:
-                    _, boool = Ingredient.objects.get_or_create(
-                        name=name, measurement_unit=unit
-                    )
-                    if not boool:
-                        print(f'Ingredient {name} with measurement_unit '
-                              f'{unit} already exists')
-                print('The data from the ingredients.csv '
-                      'has been uploaded successfully')
-        except IOError as er:
-            print(f'Could not open ingredients.csv: {er}')
-
-        try:
-            with open('../data/tags.csv',
-                      'r', encoding='utf-8') as file:
-                reader = csv.reader(file)
-                for name, color, slug in reader:
-                    _, boool = Tag.objects.get_or_create(
-                        name=name, color=color, slug=slug
-                    )
-                    if not boool:
-                        print(f'Tag {name} already exists')
-                print('The data from the tags.csv '
-                      'has been uploaded successfully')
-        except IOError as er:
-            print(f'Could not open tags.csv: {er}')
+    @transaction.atomic
+    def load(self, model, fields, path, options):
+        start = perf_counter()
+        file_format = 'json' if path.suffix.lower() == '.json' else 'csv'
+        rows = list(read_rows(path, fields, file_format))
+        unique_rows = list(dict.fromkeys(rows))
+        if connection.vendor == 'postgresql' and not options['no_copy']:
+            created = copy_rows(model, fields, unique_rows)
+        else:
+            created = bulk_create_rows(
+                model, fields, unique_rows, options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(
+            f'{path.name}: {created} created, '
+            f'{len(rows) - created} skipped '
+            f'({len(rows) - len(unique_rows)} duplicates in file) '
+            f'in {perf_counter() - start:.2f}s'))
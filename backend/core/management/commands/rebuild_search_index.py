@@ -0,0 +1,23 @@
+from django.core.management import BaseCommand
+from django.db import connection, transaction
+
+from recipes.models import Recipe
+from recipes.search import install_sqlite_index, update_search_documents
+
+
+class Command(BaseCommand):
+    help = 'Rebuilds recipe search documents and the full-text index'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size', type=int, default=500,
+            help='Recipes per UPDATE')
+
+    @transaction.atomic
+    def handle(self, *args, **options):
+        recipe_ids = list(Recipe.objects.values_list('pk', flat=True))
+        update_search_documents(recipe_ids, options['batch_size'])
+        if connection.vendor == 'sqlite':
+            install_sqlite_index(connection)
+        self.stdout.write(self.style.SUCCESS(
+            f'{len(recipe_ids)} recipes reindexed'))
@@ -0,0 +1,42 @@
+from django.core.management import BaseCommand
+from django.db import transaction
+from django.db.models import Sum
+
+from recipes.models import IngredientRecipe, ShoppingCartIngredient
+
+
+class Command(BaseCommand):
+    help = 'Rebuilds shopping cart ingredient totals from shopping carts'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--user', type=int, action='append', dest='users',
+            help='Rebuild totals only for the user with this id')
+        parser.add_argument(
+            '--batch-size', type=int, default=1000,
+            help='Rows per INSERT')
+
+    @transaction.atomic
+    def handle(self, *args, **options):
+        users = options['users']
+        conditions = {'recipe__shopping_cart__isnull': False}
+        stale = ShoppingCartIngredient.objects.all()
+        if users:
+            # Условия на корзину - в одном filter(): второй вызов добавил бы
+            # ещё одно соединение и умножил суммы на число корзин.
+            conditions = {'recipe__shopping_cart__user__in': users}
+            stale = stale.filter(user__in=users)
+        totals = IngredientRecipe.objects.filter(**conditions).values(
+            'recipe__shopping_cart__user', 'ingredient'
+        ).annotate(total=Sum('amount')).order_by()
+        deleted, _ = stale.delete()
+        created = ShoppingCartIngredient.objects.bulk_create(
+            (ShoppingCartIngredient(
+                user_id=row['recipe__shopping_cart__user'],
+                ingredient_id=row['ingredient'],
+                amount=row['total'])
+             for row in totals.iterator()),
+            batch_size=options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(
+            f'Shopping cart totals rebuilt: {deleted} rows removed, '
+            f'{len(created)} rows created'))
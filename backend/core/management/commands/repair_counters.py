@@ -0,0 +1,32 @@
+from django.core.management import BaseCommand, CommandError
+from django.db import transaction
+
+from recipes.counters import COUNTERS, find_drift, repair_counter
+
+
+class Command(BaseCommand):
+    help = 'Finds and repairs drifted denormalized counters'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--check', action='store_true',
+            help='Only report drift, exit with an error if any is found')
+
+    @transaction.atomic
+    def handle(self, *args, **options):
+        drifted = 0
+        for model, field, related_model, related_field in COUNTERS:
+            pks = find_drift(model, field, related_model, related_field)
+            drifted += len(pks)
+            name = f'{model._meta.label}.{field}'
+            if not pks:
+                self.stdout.write(f'{name}: ok')
+                continue
+            if options['check']:
+                self.stdout.write(f'{name}: {len(pks)} drifted')
+                continue
+            repair_counter(model, field, related_model, related_field, pks)
+            self.stdout.write(self.style.SUCCESS(
+                f'{name}: {len(pks)} repaired'))
+        if options['check'] and drifted:
+            raise CommandError(f'{drifted} counters drifted')
@@ -0,0 +1,115 @@
+import os
+
+from django.http import HttpResponse
+from prometheus_client import (CONTENT_TYPE_LATEST, REGISTRY,
+                               CollectorRegistry, Counter, Gauge, Histogram,
+                               generate_latest, multiprocess)
+
+from .db.instrumentation import QueryRecorder
+from .db.pool import pool_stats
+
+MULTIPROCESS_DIR_ENV = 'PROMETHEUS_MULTIPROC_DIR'
+UNRESOLVED_VIEW = 'unresolved'
+
+SIZE_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304)
+QUERY_BUCKETS = (0, 1, 2, 3, 5, 8, 13, 21, 34, 55, 89, 144)
+
+REQUEST_DURATION = Histogram(
+    'foodgram_request_duration_seconds',
+    'Время ответа по представлениям.',
+    ('view', 'method', 'status'))
+RESPONSE_SIZE = Histogram(
+    'foodgram_response_size_bytes',
+    'Размер тела ответа по представлениям.',
+    ('view', ), buckets=SIZE_BUCKETS)
+DB_QUERIES = Histogram(
+    'foodgram_db_queries',
+    'Число запросов к базе данных на один ответ.',
+    ('view', ), buckets=QUERY_BUCKETS)
+DB_DURATION = Histogram(
+    'foodgram_db_duration_seconds',
+    'Время запросов к базе данных на один ответ.',
+    ('view', ))
+CACHE_LOOKUPS = Counter(
+    'foodgram_response_cache_lookups',
+    'Обращения к кэшу ответов.',
+    ('namespace', 'result'))
+POOL_CONNECTIONS = Gauge(
+    'foodgram_db_pool_connections',
+    'Соединения в пулах worker\'ов.',
+    ('alias', 'state'), multiprocess_mode='livesum')
+
+
+def view_name(request, view_func):
+    """Имя представления: для DRF - класс и действие viewset'а."""
+    view_class = getattr(view_func, 'cls', None)
+    if view_class is None:
+        return request.resolver_match.view_name
+    action = (getattr(view_func, 'actions', None) or {}).get(
+        request.method.lower())
+    if action is None:
+        return view_class.__name__
+    return f'{view_class.__name__}.{action}'
+
+
+def measure_stream(chunks, histogram):
+    """Отдаёт части потокового ответа и замеряет его полный размер."""
+    size = 0
+    for chunk in chunks:
+        size += len(chunk)
+        yield chunk
+    histogram.observe(size)
+
+
+def record_pools():
+    for alias, stats in pool_stats().items():
+        POOL_CONNECTIONS.labels(alias, 'in_use').set(stats['in_use'])
+        POOL_CONNECTIONS.labels(alias, 'idle').set(stats['idle'])
+
+
+class MetricsMiddleware:
+    """Собирает метрики ответов для /metrics.
+
+    Представление DRF подписывается классом и действием viewset'а,
+    например RecipeViewSet.download_shopping_cart, остальные - именем
+    маршрута. Под gunicorn каждый worker пишет значения в файлы
+    каталога PROMETHEUS_MULTIPROC_DIR, и /metrics любого worker'а отдаёт
+    сумму по всем процессам.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        recorder = QueryRecorder()
+        with recorder.record():
+            response = self.get_response(request)
+        view = getattr(request, 'metrics_view', UNRESOLVED_VIEW)
+        REQUEST_DURATION.labels(
+            view, request.method, response.status_code
+        ).observe(recorder.elapsed)
+        if response.streaming:
+            response.streaming_content = measure_stream(
+                response.streaming_content, RESPONSE_SIZE.labels(view))
+        else:
+            RESPONSE_SIZE.labels(view).observe(len(response.content))
+        DB_QUERIES.labels(view).observe(recorder.count)
+        DB_DURATION.labels(view).observe(recorder.duration)
+        record_pools()
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        request.metrics_view = view_name(request, view_func)
+
+
+def get_registry():
+    if not os.environ.get(MULTIPROCESS_DIR_ENV):
+        return REGISTRY
+    registry = CollectorRegistry()
+    multiprocess.MultiProcessCollector(registry)
+    return registry
+
+
+def metrics(request):
+    return HttpResponse(generate_latest(get_registry()),
+                        content_type=CONTENT_TYPE_LATEST)
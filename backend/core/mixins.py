@@ -1,4 +1,15 @@
-from rest_framework import mixins, viewsets
+from hashlib import md5
+from urllib.parse import urlencode
+
+from django.conf import settings
+from django.core.cache import cache
+from rest_framework import mixins, status, viewsets
+from rest_framework.response import Response
+
+from .cache import (detail_version_key, get_version, list_version_key,
+                    record_lookup)
+from .db.replicas import use_primary
+from .eager_loading import apply_loading_plan, get_loading_plan
 
 
 class CreateDestroyViewSet(
@@ -15,3 +26,91 @@ class RetrieveListViewSet(
     viewsets.GenericViewSet,
 ):
     pass
+
+
+class AnonymousCacheMixin:
+    """Кэширует ответы list и retrieve для анонимных пользователей.
+
+    Ключ списка строится из версии списков, хоста и нормализованных
+    параметров cache_query_params, ключ объекта - из его версии. Запросы
+    с другими параметрами в кэш не попадают. Ответ для кэша строится по
+    основной базе: отстающая реплика не должна попасть в кэш на весь
+    cache_timeout.
+    """
+
+    cache_namespace = None
+    cache_query_params = ()
+    cache_timeout = settings.RESPONSE_CACHE_TIMEOUT
+
+    def get_cache_key(self, request):
+        if self.cache_namespace is None or request.user.is_authenticated:
+            return None
+        params = request.query_params
+        if self.action == 'retrieve':
+            if any(param != 'format' for param in params):
+                return None
+            lookup = self.lookup_url_kwarg or self.lookup_field
+            try:
+                pk = int(self.kwargs[lookup])
+            except ValueError:
+                return None
+            version = get_version(detail_version_key(self.cache_namespace, pk))
+            return f'{self.cache_namespace}:detail:{pk}:{version}'
+        allowed = set(self.cache_query_params) | {'format'}
+        if any(param not in allowed for param in params):
+            return None
+        normalized = urlencode(sorted(
+            (param, value.strip())
+            for param in params if param != 'format'
+            for value in set(params.getlist(param))))
+        digest = md5(
+            f'{request.get_host()}?{normalized}'.encode()).hexdigest()
+        version = get_version(list_version_key(self.cache_namespace))
+        return f'{self.cache_namespace}:list:{version}:{digest}'
+
+    def cached_response(self, handler, request, *args, **kwargs):
+        key = self.get_cache_key(request)
+        if key is None:
+            return handler(request, *args, **kwargs)
+        data = cache.get(key)
+        record_lookup(self.cache_namespace, data is not None)
+        if data is not None:
+            response = Response(data)
+            response['X-Cache'] = 'HIT'
+            return response
+        with use_primary():
+            response = handler(request, *args, **kwargs)
+        if response.status_code == status.HTTP_200_OK:
+            cache.set(key, response.data, self.cache_timeout)
+        response['X-Cache'] = 'MISS'
+        return response
+
+    def list(self, request, *args, **kwargs):
+        return self.cached_response(super().list, request, *args, **kwargs)
+
+    def retrieve(self, request, *args, **kwargs):
+        return self.cached_response(
+            super().retrieve, request, *args, **kwargs)
+
+
+class EagerLoadingMixin:
+    """Подгружает связи, которые читает сериализатор представления.
+
+    select_related и prefetch_related выводятся из полей сериализатора,
+    поэтому добавленное в него вложенное поле не приводит к N+1 запросам.
+    """
+
+    loading_plans = {}
+
+    def get_loading_plan(self, model):
+        serializer_class = self.get_serializer_class()
+        key = (model, serializer_class)
+        if key not in self.loading_plans:
+            self.loading_plans[key] = get_loading_plan(
+                model, serializer_class(context=self.get_serializer_context()))
+        return self.loading_plans[key]
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        return apply_loading_plan(
+            queryset, self.get_loading_plan(queryset.model))
@@ -0,0 +1,20 @@
+class CounterFieldsMixin:
+    """Не перезаписывает счётчики при сохранении существующего объекта.
+
+    Счётчики меняются только через change_counter, поэтому save() с
+    устаревшими значениями не должен затирать параллельные изменения.
+    Так же защищены поля derived_fields, которые заполняются в фоне.
+    """
+
+    counter_fields = ()
+    derived_fields = ()
+
+    def save(self, *args, **kwargs):
+        if (not self._state.adding and kwargs.get('update_fields') is None
+                and not kwargs.get('force_insert')):
+            kwargs['update_fields'] = [
+                field.name for field in self._meta.concrete_fields
+                if not field.primary_key
+                and field.name not in self.counter_fields
+                and field.name not in self.derived_fields]
+        super().save(*args, **kwargs)
@@ -0,0 +1,231 @@
+import cProfile
+import os
+from collections import OrderedDict
+from contextvars import ContextVar
+from time import perf_counter, strftime
+from uuid import uuid4
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from rest_framework import serializers
+from rest_framework.fields import SkipField
+from rest_framework.relations import PKOnlyObject
+
+from .db.instrumentation import QueryRecorder
+
+PROFILE_PARAM = 'profile'
+PROFILE_HEADER = 'HTTP_X_PROFILE'
+PROFILE_MODES = ('serializers', 'cprofile')
+RESULT_HEADER = 'X-Serializer-Profile'
+
+active_profiler = ContextVar('serializer_profiler', default=None)
+
+
+class FieldStats:
+    __slots__ = ('field', 'calls', 'time', 'queries')
+
+    def __init__(self, field):
+        self.field = field
+        self.calls = 0
+        self.time = 0.0
+        self.queries = 0
+
+
+class ProfiledField:
+    """Поле сериализатора, время и запросы которого записываются."""
+
+    __slots__ = ('field', 'field_name', 'path', 'profiler')
+
+    def __init__(self, field, path, profiler):
+        self.field = field
+        self.field_name = field.field_name
+        self.path = path + (field.field_name, )
+        self.profiler = profiler
+
+    def get_attribute(self, instance):
+        return self.profiler.measure(
+            self, self.field.get_attribute, instance, calls=0)
+
+    def to_representation(self, value):
+        return self.profiler.measure(
+            self, self.field.to_representation, value)
+
+
+class SerializerProfiler:
+    """Дерево полей ответа с временем, числом вызовов и запросов к базе.
+
+    Время и запросы поля включают вложенные поля и чтение атрибута
+    объекта, в котором обычно и происходят лишние запросы.
+    """
+
+    def __init__(self, request, mode):
+        self.request = request
+        self.mode = mode
+        self.allowed = None
+        self.path = None
+        self.stats = {}
+        self.recorder = QueryRecorder()
+        self.cprofile = None
+
+    def is_allowed(self):
+        """Проверяется при первом сериализаторе, когда DRF уже опознал
+        пользователя."""
+        if self.allowed is None:
+            user = getattr(self.request, 'user', None)
+            self.allowed = bool(
+                settings.DEBUG or getattr(user, 'is_staff', False))
+            if self.allowed and self.mode == 'cprofile':
+                self.cprofile = cProfile.Profile()
+                self.cprofile.enable()
+        return self.allowed
+
+    def stop(self):
+        if self.cprofile is not None:
+            self.cprofile.disable()
+
+    def measure(self, field, call, value, calls=1):
+        previous, self.path = self.path, field.path
+        queries = self.recorder.count
+        start = perf_counter()
+        try:
+            return call(value)
+        finally:
+            elapsed = perf_counter() - start
+            self.path = previous
+            stats = self.stats.get(field.path)
+            if stats is None:
+                stats = self.stats[field.path] = FieldStats(
+                    type(field.field).__name__)
+            stats.calls += calls
+            stats.time += elapsed
+            stats.queries += self.recorder.count - queries
+
+    def tree(self):
+        """Вложенный словарь {сериализатор: {fields: {поле: ...}}}."""
+        roots = {}
+        nodes = {}
+
+        def get_node(path):
+            node = nodes.get(path)
+            if node is None:
+                node = nodes[path] = (
+                    {'field': None, 'calls': 0} if len(path) > 1 else {})
+                node.update({'time_ms': 0.0, 'queries': 0, 'fields': {}})
+                if len(path) > 1:
+                    get_node(path[:-1])['fields'][path[-1]] = node
+                else:
+                    roots[path[0]] = node
+            return node
+
+        for path, stats in self.stats.items():
+            node = get_node(path)
+            node.update(field=stats.field, calls=stats.calls,
+                        time_ms=stats.time * 1000, queries=stats.queries)
+            if len(path) == 2:
+                root = get_node(path[:1])
+                root['time_ms'] += stats.time * 1000
+                root['queries'] += stats.queries
+        for node in nodes.values():
+            node['time_ms'] = round(node['time_ms'], 3)
+            if not node['fields']:
+                del node['fields']
+        return roots
+
+    def folded(self):
+        """Строки «сериализатор;поле;поле время_мкс» без учёта вложенных
+        полей: формат flamegraph.pl и speedscope."""
+        nested = {}
+        for path, stats in self.stats.items():
+            nested[path[:-1]] = nested.get(path[:-1], 0) + stats.time
+        return ''.join(
+            f'{";".join(path)} '
+            f'{round((stats.time - nested.get(path, 0)) * 1e6)}\n'
+            for path, stats in self.stats.items())
+
+    def dump(self):
+        """Сохраняет .prof для cProfile и .folded для flamegraph."""
+        os.makedirs(settings.SERIALIZER_PROFILE_DIR, exist_ok=True)
+        name = f'{strftime("%Y%m%d-%H%M%S")}-{uuid4().hex[:8]}'
+        base = os.path.join(settings.SERIALIZER_PROFILE_DIR, name)
+        self.cprofile.dump_stats(f'{base}.prof')
+        with open(f'{base}.folded', 'w', encoding='utf-8') as file:
+            file.write(self.folded())
+        return name
+
+
+class ProfiledSerializerMixin:
+    """Записывает время и запросы полей сериализатора в профиль запроса.
+
+    Подключается к сериализаторам API. Пока запрос не профилируется,
+    ответ строится обычным to_representation.
+    """
+
+    def to_representation(self, instance):
+        profiler = active_profiler.get()
+        if profiler is None or not profiler.is_allowed():
+            return super().to_representation(instance)
+        path = profiler.path or (type(self).__name__, )
+        data = OrderedDict()
+        for field in self.fields.values():
+            if field.write_only:
+                continue
+            field = ProfiledField(field, path, profiler)
+            try:
+                attribute = field.get_attribute(instance)
+            except SkipField:
+                continue
+            value = (attribute.pk if isinstance(attribute, PKOnlyObject)
+                     else attribute)
+            data[field.field_name] = (
+                None if value is None else field.to_representation(attribute))
+        return data
+
+
+class ProfiledModelSerializer(ProfiledSerializerMixin,
+                              serializers.ModelSerializer):
+    pass
+
+
+class SerializerProfilingMiddleware:
+    """Профилирует сериализацию ответа по запросу сотрудника.
+
+    Режим задаётся параметром ?profile= или заголовком X-Profile:
+    serializers добавляет дерево полей в ответ JSON
+    ({"profile": ..., "data": ...}), cprofile сохраняет профиль cProfile и
+    стеки для flamegraph в SERIALIZER_PROFILE_DIR и возвращает имя файлов
+    в заголовке X-Serializer-Profile. Для остальных пользователей
+    параметр игнорируется. Включается настройкой SERIALIZER_PROFILING;
+    в профиль попадают сериализаторы с ProfiledSerializerMixin.
+    """
+
+    def __init__(self, get_response):
+        if not settings.SERIALIZER_PROFILING:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+
+    def __call__(self, request):
+        mode = (request.GET.get(PROFILE_PARAM)
+                or request.META.get(PROFILE_HEADER))
+        if mode not in PROFILE_MODES:
+            return self.get_response(request)
+        profiler = SerializerProfiler(request, mode)
+        token = active_profiler.set(profiler)
+        try:
+            with profiler.recorder.record():
+                response = self.get_response(request)
+        finally:
+            active_profiler.reset(token)
+            profiler.stop()
+        if profiler.cprofile is not None:
+            response[RESULT_HEADER] = profiler.dump()
+        return response
+
+    def process_template_response(self, request, response):
+        profiler = active_profiler.get()
+        renderer = getattr(response, 'accepted_renderer', None)
+        if (profiler is not None and profiler.allowed
+                and profiler.mode == 'serializers'
+                and getattr(renderer, 'format', None) == 'json'):
+            response.data = {'profile': profiler.tree(),
+                             'data': response.data}
+        return response
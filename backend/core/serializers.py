@@ -1,7 +1,15 @@
-import webcolors
+import base64
+import binascii
 
+import webcolors
+from django.conf import settings
+from django.core.files.uploadedfile import UploadedFile
+from drf_extra_fields.fields import Base64ImageField
 from rest_framework import serializers
 
+from .uploads import (IMAGE_HEADER_SIZE, INVALID_IMAGE_MESSAGE,
+                      detect_image_type, too_large_message)
+
 
 class Hex2NameColor(serializers.Field):
     def to_representation(self, value):
@@ -14,3 +22,41 @@ class Hex2NameColor(serializers.Field):
             raise serializers.ValidationError('Для этого цвета нет имени')
         else:
             return data
+
+
+class HybridImageField(Base64ImageField):
+    """Картинка строкой base64 в JSON или файлом в multipart-запросе.
+
+    Строка base64 проверяется по длине и сигнатуре до декодирования.
+    Файлы из multipart уже проверены ImageUploadHandler при чтении запроса.
+    """
+
+    def to_internal_value(self, data):
+        if isinstance(data, UploadedFile):
+            return serializers.ImageField.to_internal_value(self, data)
+        if isinstance(data, str):
+            encoded = data.partition(';base64,')[2] or data
+            if len(encoded) * 3 // 4 > settings.MAX_IMAGE_UPLOAD_SIZE:
+                raise serializers.ValidationError(too_large_message())
+            try:
+                header = base64.b64decode(encoded[:16])
+            except (binascii.Error, ValueError):
+                raise serializers.ValidationError(self.INVALID_FILE_MESSAGE)
+            if not detect_image_type(header[:IMAGE_HEADER_SIZE]):
+                raise serializers.ValidationError(INVALID_IMAGE_MESSAGE)
+        return super().to_internal_value(data)
+
+
+def load_for_page(serializer, key, loader):
+    """Вызывает loader один раз для всех объектов сериализуемой страницы.
+
+    Результат сохраняется в общем контексте сериализатора, поэтому
+    вложенные поля каждого объекта списка используют одну выборку.
+    """
+    if key not in serializer.context:
+        parent = serializer.parent
+        instances = (parent.instance
+                     if isinstance(parent, serializers.ListSerializer)
+                     else [serializer.instance])
+        serializer.context[key] = loader(instances)
+    return serializer.context[key]
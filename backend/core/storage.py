@@ -0,0 +1,84 @@
+import hashlib
+import os
+import posixpath
+from tempfile import mkstemp
+
+from django.core.files import File
+from django.core.files.storage import FileSystemStorage
+from django.utils.deconstruct import deconstructible
+
+HASH_LENGTH = 32
+
+UMASK = os.umask(0)
+os.umask(UMASK)
+
+
+@deconstructible
+class ContentHashStorage(FileSystemStorage):
+    """Хранилище, которое называет файлы по SHA-256 их содержимого.
+
+    Одинаковые файлы сохраняются один раз, а имя файла никогда не
+    указывает на другое содержимое, поэтому такие файлы можно кэшировать
+    бессрочно. Удалять файлы при изменении объектов нельзя - их могут
+    использовать другие объекты; неиспользуемые файлы удаляет команда
+    collect_media_garbage.
+
+    Одно и то же содержимое могут сохранять одновременно несколько
+    запросов: файл пишется во временный и атомарно переименовывается,
+    поэтому повторная запись заменяет файл тем же содержимым, а не
+    создаёт копию с другим именем.
+    """
+
+    def hashed_name(self, name, content):
+        digest = hashlib.sha256()
+        if hasattr(content, 'seek'):
+            content.seek(0)
+        for chunk in content.chunks():
+            digest.update(chunk)
+        if hasattr(content, 'seek'):
+            content.seek(0)
+        directory, filename = posixpath.split(name)
+        extension = posixpath.splitext(filename)[1].lower()
+        return posixpath.join(
+            directory, digest.hexdigest()[:HASH_LENGTH] + extension)
+
+    def save(self, name, content, max_length=None):
+        if name is None:
+            name = content.name
+        if not hasattr(content, 'chunks'):
+            content = File(content, name)
+        name = self.hashed_name(self.generate_filename(name), content)
+        if self.exists(name):
+            # Свежая дата изменения защищает файл от сборки мусора.
+            os.utime(self.path(name))
+            return name
+        return super().save(name, content, max_length)
+
+    def get_available_name(self, name, max_length=None):
+        return name
+
+    def _save(self, name, content):
+        full_path = self.path(name)
+        directory = os.path.dirname(full_path)
+        if self.directory_permissions_mode is not None:
+            old_umask = os.umask(0o777 & ~self.directory_permissions_mode)
+            try:
+                os.makedirs(directory, self.directory_permissions_mode,
+                            exist_ok=True)
+            finally:
+                os.umask(old_umask)
+        else:
+            os.makedirs(directory, exist_ok=True)
+        descriptor, temp_path = mkstemp(dir=directory, suffix='.tmp')
+        try:
+            with os.fdopen(descriptor, 'wb') as file:
+                for chunk in content.chunks():
+                    file.write(chunk)
+            mode = self.file_permissions_mode
+            os.chmod(temp_path, 0o666 & ~UMASK if mode is None else mode)
+            os.replace(temp_path, full_path)
+        except BaseException:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+            raise
+        return name
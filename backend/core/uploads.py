@@ -0,0 +1,56 @@
+from django.conf import settings
+from django.core.files.uploadhandler import FileUploadHandler
+from rest_framework.exceptions import ValidationError
+
+IMAGE_SIGNATURES = (
+    (b'\xff\xd8\xff', 'jpeg'),
+    (b'\x89PNG\r\n\x1a\n', 'png'),
+    (b'GIF87a', 'gif'),
+    (b'GIF89a', 'gif'),
+)
+IMAGE_HEADER_SIZE = 12
+INVALID_IMAGE_MESSAGE = 'Загрузите картинку в формате JPEG, PNG, GIF или WebP.'
+
+
+def detect_image_type(header):
+    if header[:4] == b'RIFF' and header[8:12] == b'WEBP':
+        return 'webp'
+    for signature, image_type in IMAGE_SIGNATURES:
+        if header.startswith(signature):
+            return image_type
+    return None
+
+
+def too_large_message():
+    return (f'Размер картинки больше '
+            f'{settings.MAX_IMAGE_UPLOAD_SIZE // (1024 * 1024)} МБ.')
+
+
+class ImageUploadHandler(FileUploadHandler):
+    """Проверяет загружаемые файлы по мере чтения тела запроса.
+
+    Стоит первым в цепочке обработчиков: файл, который не начинается с
+    сигнатуры картинки или превышает MAX_IMAGE_UPLOAD_SIZE, отклоняется
+    на первом же лишнем фрагменте, до чтения остального тела. Остальные
+    фрагменты передаются стандартным обработчикам, которые пишут большие
+    файлы во временный файл на диске.
+    """
+
+    def new_file(self, field_name, *args, **kwargs):
+        super().new_file(field_name, *args, **kwargs)
+        self.received = 0
+        if (self.content_length
+                and self.content_length > settings.MAX_IMAGE_UPLOAD_SIZE):
+            raise ValidationError({field_name: [too_large_message()]})
+
+    def receive_data_chunk(self, raw_data, start):
+        self.received += len(raw_data)
+        if self.received > settings.MAX_IMAGE_UPLOAD_SIZE:
+            raise ValidationError({self.field_name: [too_large_message()]})
+        if start == 0 and not detect_image_type(
+                raw_data[:IMAGE_HEADER_SIZE]):
+            raise ValidationError({self.field_name: [INVALID_IMAGE_MESSAGE]})
+        return raw_data
+
+    def file_complete(self, file_size):
+        return None
@@ -1,19 +1,63 @@
+import csv
 from datetime import date
+from itertools import chain
 
-from django.http import HttpResponse
+from django.db.models import F
+from django.http import StreamingHttpResponse
 
+from core import constants
 
-def shopping_cart(self, request, sum_ingredients_in_recipes):
+
+def change_counter(queryset, field, delta):
+    """Атомарно меняет счётчик field, не опуская его ниже нуля."""
+    if not delta:
+        return 0
+    if delta < 0:
+        queryset = queryset.filter(**{f'{field}__gte': -delta})
+    return queryset.update(**{field: F(field) + delta})
+
+
+class Echo:
+    def write(self, value):
+        return value
+
+
+def shopping_cart_txt(ingredients):
     today = date.today().strftime('%d-%m-%Y')
-    shopping_list = f'Список покупок на: {today}\n\n'
-    for ingredient in sum_ingredients_in_recipes:
-        shopping_list += (
-            f'{ingredient["ingredient__name"]} - '
-            f'{ingredient["amounts"]} '
-            f'{ingredient["ingredient__measurement_unit"]}\n'
-        )
-    shopping_list += '\n\nFoodgram (2022)'
-    filename = 'shopping_list.txt'
-    response = HttpResponse(shopping_list, content_type='text/plain')
+    return chain(
+        (f'Список покупок на: {today}\n\n', ),
+        (f'{ingredient["ingredient__name"]} - '
+         f'{ingredient["amounts"]} '
+         f'{ingredient["ingredient__measurement_unit"]}\n'
+         for ingredient in ingredients),
+        ('\n\nFoodgram (2022)', ),
+    )
+
+
+def shopping_cart_csv(ingredients):
+    writer = csv.writer(Echo())
+    return chain(
+        ('\ufeff', writer.writerow(
+            ('Ингредиент', 'Количество', 'Единица измерения'))),
+        (writer.writerow((ingredient['ingredient__name'],
+                          ingredient['amounts'],
+                          ingredient['ingredient__measurement_unit']))
+         for ingredient in ingredients),
+    )
+
+
+SHOPPING_CART_FORMATS = {
+    'txt': (shopping_cart_txt, 'text/plain'),
+    'csv': (shopping_cart_csv, 'text/csv'),
+}
+
+
+def shopping_cart(sum_ingredients_in_recipes, file_format='txt'):
+    render, content_type = SHOPPING_CART_FORMATS[file_format]
+    response = StreamingHttpResponse(
+        render(sum_ingredients_in_recipes.iterator(
+            chunk_size=constants.SHOPPING_CART_CHUNK_SIZE)),
+        content_type=f'{content_type}; charset=utf-8')
+    filename = f'shopping_list.{file_format}'
     response['Content-Disposition'] = f'attachment; filename={filename}'
     return response
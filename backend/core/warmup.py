@@ -0,0 +1,60 @@
+import logging
+from importlib import import_module
+from time import perf_counter
+
+from django.apps import apps
+from django.conf import settings
+from django.db import connections
+from django.urls import reverse
+
+logger = logging.getLogger(__name__)
+
+APP_MODULES = ('models', 'admin', 'serializers', 'views', 'signals')
+
+
+def import_apps():
+    """Импортирует модули приложений, которые иначе грузятся по запросу."""
+    for app_config in apps.get_app_configs():
+        for module in APP_MODULES:
+            name = f'{app_config.name}.{module}'
+            try:
+                import_module(name)
+            except ModuleNotFoundError as error:
+                if error.name != name:
+                    raise
+
+
+def resolve_urls():
+    for urlconf in (settings.ROOT_URLCONF, settings.ASGI_URLCONF):
+        reverse('api-root', urlconf=urlconf)
+
+
+def connect_databases():
+    for connection in connections.all():
+        connection.ensure_connection()
+
+
+def prime_caches():
+    from recipes.autocomplete import ingredient_index
+    from recipes.postings import recipe_postings
+    from recipes.registry import tag_registry
+
+    tag_registry.all()
+    ingredient_index.get_state()
+    recipe_postings.get_state()
+
+
+def warmup(prime=True):
+    """Готовит процесс к приёму запросов.
+
+    Импортирует приложения, строит маршруты обеих конфигураций URL,
+    открывает соединения с базами данных и, если prime, загружает
+    справочники и индексы в память процесса.
+    """
+    start = perf_counter()
+    import_apps()
+    resolve_urls()
+    connect_databases()
+    if prime:
+        prime_caches()
+    logger.info('Прогрев занял %.0f мс', (perf_counter() - start) * 1000)
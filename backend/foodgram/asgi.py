@@ -9,8 +9,51 @@ https://docs.djangoproject.com/en/3.2/howto/deployment/asgi/
 
 import os
 
-from django.core.asgi import get_asgi_application
+import django
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.handlers.asgi import ASGIHandler
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'foodgram.settings')
 
-application = get_asgi_application()
+
+class AsyncReadHandler(ASGIHandler):
+    """Направляет запросы в ASGI_URLCONF с асинхронными представлениями.
+
+    Части потокового ответа, например списка покупок, который читается
+    из базы по мере отправки, собираются в синхронном потоке: Django 3.2
+    перебирает их прямо в цикле событий, где запросы к базе запрещены.
+    """
+
+    def create_request(self, scope, body_file):
+        request, error_response = super().create_request(scope, body_file)
+        if request is not None:
+            request.urlconf = settings.ASGI_URLCONF
+        return request, error_response
+
+    async def send_response(self, response, send):
+        if not response.streaming:
+            return await super().send_response(response, send)
+        headers = [
+            (header.encode('ascii'), value.encode('latin1'))
+            for header, value in response.items()]
+        headers += [
+            (b'Set-Cookie', cookie.output(header='').encode('ascii').strip())
+            for cookie in response.cookies.values()]
+        await send({'type': 'http.response.start',
+                    'status': response.status_code, 'headers': headers})
+        parts = iter(response)
+        read_part = sync_to_async(next, thread_sensitive=True)
+        while True:
+            part = await read_part(parts, None)
+            if part is None:
+                break
+            for chunk, _ in self.chunk_bytes(part):
+                await send({'type': 'http.response.body', 'body': chunk,
+                            'more_body': True})
+        await send({'type': 'http.response.body'})
+        await sync_to_async(response.close, thread_sensitive=True)()
+
+
+django.setup(set_prefix=False)
+application = AsyncReadHandler()
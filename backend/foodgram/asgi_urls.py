@@ -0,0 +1,16 @@
+from django.urls import include, path
+
+from api.urls import router
+from core.async_views import offload_patterns
+from .urls import urlpatterns as sync_urlpatterns
+
+ASYNC_ROUTES = (
+    'Recipe-list', 'Recipe-detail', 'tag-list', 'tag-detail',
+    'ingredient-list', 'ingredient-detail', 'user-subscriptions',
+    'Recipe-download-shopping-cart',
+)
+
+urlpatterns = [
+    path('api/', include(offload_patterns(router.urls, ASYNC_ROUTES))),
+    *sync_urlpatterns,
+]
@@ -34,6 +34,9 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'core.metrics.MetricsMiddleware',
+    'core.db.instrumentation.QueryInstrumentationMiddleware',
+    'core.profiling.SerializerProfilingMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'corsheaders.middleware.CorsMiddleware',
@@ -42,10 +45,13 @@ MIDDLEWARE = [
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
+    'core.db.replicas.ReplicaMiddleware',
 ]
 
 ROOT_URLCONF = 'foodgram.urls'
 
+ASGI_URLCONF = 'foodgram.asgi_urls'
+
 TEMPLATES = [
     {
         'BACKEND': 'django.template.backends.django.DjangoTemplates',
@@ -65,6 +71,8 @@ TEMPLATES = [
 WSGI_APPLICATION = 'foodgram.wsgi.application'
 
 
+DB_POOL = os.getenv('DB_POOL', 'False') == 'True'
+
 if os.getenv('DEV_STATUS', 'False') == 'True':
     DATABASES = {
         'default': {
@@ -72,17 +80,82 @@ if os.getenv('DEV_STATUS', 'False') == 'True':
             'NAME': BASE_DIR / os.getenv('DEV_NAME', 'db.sqlite3'),
         }
     }
+    if os.getenv('DEV_REPLICA_NAME'):
+        DATABASES['replica'] = {
+            **DATABASES['default'],
+            'NAME': BASE_DIR / os.getenv('DEV_REPLICA_NAME'),
+        }
 else:
     DATABASES = {
         'default': {
-            'ENGINE': os.getenv('DB_ENGINE', 'django.db.backends.postgresql'),
+            'ENGINE': (
+                'core.db.backends.postgresql' if DB_POOL
+                else os.getenv('DB_ENGINE', 'django.db.backends.postgresql')),
             'NAME': os.getenv('DB_NAME', 'foodgram'),
             'USER': os.getenv('POSTGRES_USER', 'postgres'),
             'PASSWORD': os.getenv('POSTGRES_PASSWORD', 'progpass'),
             'HOST': os.getenv('DB_HOST', 'db'),
-            'PORT': os.getenv('DB_PORT', '5432')
+            'PORT': os.getenv('DB_PORT', '5432'),
+            'CONN_MAX_AGE': (
+                0 if DB_POOL else int(os.getenv('DB_CONN_MAX_AGE', 0))),
+            'POOL': {
+                'MAX_SIZE': int(os.getenv('DB_POOL_MAX_SIZE', 10)),
+                'TIMEOUT': float(os.getenv('DB_POOL_TIMEOUT', 5)),
+                'HEALTH_CHECK_INTERVAL': float(
+                    os.getenv('DB_POOL_HEALTH_CHECK_INTERVAL', 30)),
+                'MAX_LIFETIME': float(os.getenv('DB_POOL_MAX_LIFETIME', 600)),
+            },
         }
     }
+    for number, host in enumerate(
+            filter(None, os.getenv('DB_REPLICA_HOSTS', '').split(','))):
+        DATABASES[f'replica{number}'] = {
+            **DATABASES['default'],
+            'HOST': host.strip(),
+        }
+
+DATABASE_REPLICAS = [alias for alias in DATABASES if alias != 'default']
+
+DATABASE_ROUTERS = ['core.db.replicas.ReplicaRouter']
+
+REPLICA_PIN_SECONDS = int(os.getenv('REPLICA_PIN_SECONDS', 10))
+
+REPLICA_RETRY_SECONDS = int(os.getenv('REPLICA_RETRY_SECONDS', 30))
+
+SQL_INSTRUMENTATION_SAMPLE_RATE = float(
+    os.getenv('SQL_INSTRUMENTATION_SAMPLE_RATE', 0.1))
+
+SLOW_REQUEST_MS = float(os.getenv('SLOW_REQUEST_MS', 500))
+
+SLOW_REQUEST_QUERIES = int(os.getenv('SLOW_REQUEST_QUERIES', 50))
+
+REPEATED_QUERY_THRESHOLD = int(os.getenv('REPEATED_QUERY_THRESHOLD', 10))
+
+SERIALIZER_PROFILING = os.getenv('SERIALIZER_PROFILING', 'False') == 'True'
+
+SERIALIZER_PROFILE_DIR = os.getenv(
+    'SERIALIZER_PROFILE_DIR', '/tmp/foodgram-profiles')
+
+
+# Версии справочников и кэша ответов, журнал индекса рецептов и
+# закрепление за основной базой передаются между процессами через кэш,
+# поэтому он должен быть общим для всех worker'ов.
+CACHES = {
+    'default': {
+        'BACKEND': os.getenv(
+            'CACHE_BACKEND',
+            'django.core.cache.backends.filebased.FileBasedCache'),
+        'LOCATION': os.getenv('CACHE_LOCATION', '/tmp/foodgram-cache'),
+    }
+}
+
+RESPONSE_CACHE_TIMEOUT = int(os.getenv('RESPONSE_CACHE_TIMEOUT', 300))
+
+MAX_IMAGE_UPLOAD_SIZE = int(
+    os.getenv('MAX_IMAGE_UPLOAD_SIZE', 10 * 1024 * 1024))
+
+IMAGE_VARIANTS_BACKGROUND = (
+    os.getenv('IMAGE_VARIANTS_BACKGROUND', 'True') == 'True')
 
 
 AUTH_PASSWORD_VALIDATORS = [
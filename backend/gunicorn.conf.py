@@ -0,0 +1,72 @@
+"""Настройки gunicorn: python3 -m gunicorn -c gunicorn.conf.py <приложение>.
+
+Все параметры задаются переменными окружения GUNICORN_*.
+"""
+import multiprocessing
+import os
+import shutil
+
+bind = os.getenv('GUNICORN_BIND', '0:8000')
+workers = int(os.getenv(
+    'GUNICORN_WORKERS', multiprocessing.cpu_count() * 2 + 1))
+worker_class = os.getenv('GUNICORN_WORKER_CLASS', 'sync')
+threads = int(os.getenv('GUNICORN_THREADS', 1))
+preload_app = os.getenv('GUNICORN_PRELOAD', 'True') == 'True'
+max_requests = int(os.getenv('GUNICORN_MAX_REQUESTS', 1000))
+max_requests_jitter = int(os.getenv('GUNICORN_MAX_REQUESTS_JITTER', 100))
+timeout = int(os.getenv('GUNICORN_TIMEOUT', 30))
+graceful_timeout = int(os.getenv('GUNICORN_GRACEFUL_TIMEOUT', 30))
+keepalive = int(os.getenv('GUNICORN_KEEPALIVE', 5))
+accesslog = os.getenv('GUNICORN_ACCESS_LOG', '-')
+
+# Общий каталог метрик worker'ов, читается /metrics любого из них.
+metrics_dir = os.environ.setdefault(
+    'PROMETHEUS_MULTIPROC_DIR', '/tmp/foodgram-metrics')
+
+
+def on_starting(server):
+    """Проверяет кэш и удаляет метрики прошлого запуска сервера.
+
+    Worker'ы узнают об изменениях друг друга только через общий кэш;
+    с кэшем в памяти процесса каждый отдавал бы свои устаревшие данные.
+    """
+    if server.cfg.workers > 1:
+        os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'foodgram.settings')
+        from core.cache import check_shared_cache
+
+        check_shared_cache(f'Для {server.cfg.workers} worker\'ов')
+    shutil.rmtree(metrics_dir, ignore_errors=True)
+    os.makedirs(metrics_dir, exist_ok=True)
+
+
+def when_ready(server):
+    """С preload_app прогревает главный процесс до запуска worker'ов.
+
+    Справочники и индексы после fork достаются worker'ам готовыми, а
+    соединения с базой данных закрываются: делить их между процессами
+    нельзя.
+    """
+    if not server.cfg.preload_app:
+        return
+    from django.db import connections
+
+    from core.db.pool import close_pools
+    from core.warmup import warmup
+
+    warmup()
+    connections.close_all()
+    close_pools()
+
+
+def post_worker_init(worker):
+    """Прогревает worker до того, как он начнёт принимать соединения."""
+    from core.warmup import warmup
+
+    warmup(prime=not worker.cfg.preload_app)
+
+
+def child_exit(server, worker):
+    """Исключает остановленный worker из текущих значений метрик."""
+    from prometheus_client import multiprocess
+
+    multiprocess.mark_process_dead(worker.pid)
@@ -1,50 +1,64 @@
 from django.contrib import admin
 from django.contrib.auth.models import Group
 
+from core.admin import PaginatedTabularInline
 from .models import (Favorite, Ingredient, IngredientRecipe, Recipe,
                      ShoppingCart, Tag)
 
 
-class IngredientsInline(admin.TabularInline):
+class IngredientsInline(PaginatedTabularInline):
     model = IngredientRecipe
-    extra = 3
+    extra = 1
     min_num = 1
+    autocomplete_fields = ('ingredient', )
+
+    def get_queryset(self, request):
+        return super().get_queryset(request).select_related('ingredient')
 
 
 @admin.register(Favorite)
 class FavoriteAdmin(admin.ModelAdmin):
     list_display = ('user', 'recipe')
-    list_filter = ('user',)
-    search_fields = ('user',)
+    list_select_related = ('user', 'recipe')
+    autocomplete_fields = ('user', 'recipe')
+    search_fields = ('user__username', 'recipe__name')
+    show_full_result_count = False
 
 
 @admin.register(ShoppingCart)
 class ShoppingCartAdmin(admin.ModelAdmin):
     list_display = ('user', 'recipe')
-    list_filter = ('user',)
-    search_fields = ('user',)
+    list_select_related = ('user', 'recipe')
+    autocomplete_fields = ('user', 'recipe')
+    search_fields = ('user__username', 'recipe__name')
+    show_full_result_count = False
 
 
 @admin.register(IngredientRecipe)
 class IngredientRecipeAdmin(admin.ModelAdmin):
     list_display = ('id', 'recipe', 'ingredient', 'amount',)
-    list_filter = ('recipe', 'ingredient')
-    search_fields = ('name',)
+    list_select_related = ('recipe', 'ingredient')
+    autocomplete_fields = ('recipe', 'ingredient')
+    search_fields = ('recipe__name', 'ingredient__name')
+    show_full_result_count = False
 
 
 @admin.register(Recipe)
 class RecipeAdmin(admin.ModelAdmin):
     list_display = ('id', 'author', 'name',
-                    'get_ingredients', 'pub_date', 'in_favorite')
+                    'get_ingredients', 'pub_date', 'favorites_count')
+    list_select_related = ('author', )
     search_fields = ('name',)
-    list_filter = ('pub_date', 'author', 'name', 'tags')
-    filter_horizontal = ('ingredients',)
+    list_filter = ('pub_date', 'tags')
+    autocomplete_fields = ('author', )
+    filter_horizontal = ('tags',)
+    readonly_fields = ('favorites_count', 'shopping_cart_count')
+    show_full_result_count = False
     empty_value_display = '-пусто-'
     inlines = (IngredientsInline, )
 
-    @admin.display(description='В избранном')
-    def in_favorite(self, obj):
-        return obj.favorite.all().count()
+    def get_queryset(self, request):
+        return super().get_queryset(request).prefetch_related('ingredients')
 
     @admin.display(description='Ингредиенты')
     def get_ingredients(self, obj):
@@ -62,8 +76,9 @@ class TagAdmin(admin.ModelAdmin):
 @admin.register(Ingredient)
 class IngredientAdmin(admin.ModelAdmin):
     list_display = ('name', 'measurement_unit')
-    list_filter = ('name',)
+    list_filter = ('measurement_unit',)
     search_fields = ('name',)
+    show_full_result_count = False
 
 
 admin.site.unregister(Group)
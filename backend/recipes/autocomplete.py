@@ -0,0 +1,104 @@
+from bisect import bisect_left
+from collections import Counter, namedtuple
+
+from .registry import ingredient_registry
+
+FUZZY_LIMIT = 20
+MIN_TRIGRAM_SIMILARITY = 0.3
+MAX_EDIT_DISTANCE = 2
+
+IndexState = namedtuple(
+    'IndexState', ('source', 'ingredients', 'names', 'words', 'trigrams'))
+
+
+def get_trigrams(text):
+    text = f'  {text} '
+    return {text[i:i + 3] for i in range(len(text) - 2)}
+
+
+def edit_distance(first, second):
+    previous = list(range(len(second) + 1))
+    for i, first_char in enumerate(first, 1):
+        current = [i]
+        for j, second_char in enumerate(second, 1):
+            current.append(min(previous[j] + 1,
+                               current[j - 1] + 1,
+                               previous[j - 1] + (first_char != second_char)))
+        previous = current
+    return previous[-1]
+
+
+def prefix_range(keys, prefix):
+    return (bisect_left(keys, (prefix, )),
+            bisect_left(keys, (prefix + '\uffff', )))
+
+
+class IngredientIndex:
+    """Индекс названий ингредиентов для автодополнения без запросов к БД.
+
+    Строится по справочнику ingredient_registry и перестраивается, когда
+    справочник перечитан.
+    """
+
+    def __init__(self):
+        self.state = None
+
+    def get_state(self):
+        source = ingredient_registry.all()
+        state = self.state
+        if state is None or state.source is not source:
+            state = self.state = self.build(source)
+        return state
+
+    def build(self, source):
+        ingredients = list(source.values())
+        names = []
+        words = []
+        trigrams = {}
+        for position, ingredient in enumerate(ingredients):
+            name = ingredient.name.lower()
+            names.append((name, position))
+            for word in name.split()[1:]:
+                words.append((word, position))
+            for trigram in get_trigrams(name):
+                trigrams.setdefault(trigram, []).append(position)
+        return IndexState(
+            source, ingredients, sorted(names), sorted(words), trigrams)
+
+    def search(self, query):
+        state = self.get_state()
+        query = query.strip().lower()
+        if not query:
+            return state.ingredients
+        found = []
+        for keys in (state.names, state.words):
+            start, end = prefix_range(keys, query)
+            found.extend(position for _, position in keys[start:end])
+        if not found:
+            found = self.fuzzy_search(state, query)
+        return [state.ingredients[position]
+                for position in dict.fromkeys(found)]
+
+    def fuzzy_search(self, state, query):
+        query_trigrams = get_trigrams(query)
+        common = Counter(
+            position
+            for trigram in query_trigrams
+            for position in state.trigrams.get(trigram, ()))
+        candidates = []
+        for position, count in common.items():
+            name = state.ingredients[position].name.lower()
+            similarity = count / len(query_trigrams)
+            if similarity < MIN_TRIGRAM_SIMILARITY:
+                continue
+            distance, word_match = min(
+                (edit_distance(query, text[:len(query)]), word_match)
+                for word_match, text in enumerate(
+                    (name, *name.split()[1:])))
+            if distance <= MAX_EDIT_DISTANCE:
+                candidates.append(
+                    (distance, word_match > 0, -similarity, name, position))
+        return [position for *_, position in sorted(candidates)[:FUZZY_LIMIT]]
+
+
+ingredient_index = IngredientIndex()
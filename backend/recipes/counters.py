@@ -0,0 +1,32 @@
+from django.db.models import Count, F, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+from users.models import Follow, User
+from .models import Favorite, Recipe, ShoppingCart
+
+COUNTERS = (
+    (Recipe, 'favorites_count', Favorite, 'recipe'),
+    (Recipe, 'shopping_cart_count', ShoppingCart, 'recipe'),
+    (User, 'recipes_count', Recipe, 'author'),
+    (User, 'followers_count', Follow, 'author'),
+)
+
+
+def actual_count(related_model, related_field):
+    return Coalesce(Subquery(
+        related_model.objects.filter(
+            **{related_field: OuterRef('pk')}
+        ).order_by().values(related_field).annotate(
+            total=Count('pk')).values('total')), 0)
+
+
+def find_drift(model, field, related_model, related_field):
+    """Возвращает id объектов, у которых счётчик разошёлся с данными."""
+    return list(model.objects.annotate(
+        actual=actual_count(related_model, related_field)
+    ).exclude(**{field: F('actual')}).values_list('pk', flat=True))
+
+
+def repair_counter(model, field, related_model, related_field, pks):
+    return model.objects.filter(pk__in=pks).update(
+        **{field: actual_count(related_model, related_field)})
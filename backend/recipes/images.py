@@ -0,0 +1,150 @@
+import logging
+import posixpath
+from concurrent.futures import ThreadPoolExecutor
+from io import BytesIO
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.db import close_old_connections, connection
+from PIL import Image, ImageOps, features
+
+from core.cache import invalidate_responses
+from core.constants import (IMAGE_FORMATS, IMAGE_SIZES,
+                            RECIPES_CACHE_NAMESPACE)
+from .models import Recipe
+
+logger = logging.getLogger(__name__)
+
+VARIANTS_DIR = 'static/images/variants'
+SAVE_OPTIONS = {
+    'JPEG': {'quality': 85, 'optimize': True, 'progressive': True},
+    'WEBP': {'quality': 80, 'method': 4},
+}
+
+# Pillow может быть собран без libwebp: такие форматы не строятся, и
+# image_urls отдаёт вместо них оригинал.
+VARIANT_FORMATS = {
+    extension: image_format
+    for extension, image_format in IMAGE_FORMATS.items()
+    if image_format != 'WEBP' or features.check('webp')}
+
+executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='images')
+
+
+def variant_name(source, size, extension):
+    stem = posixpath.splitext(posixpath.basename(source))[0]
+    return f'{VARIANTS_DIR}/{stem}-{size}.{extension}'
+
+
+def variant_stem(name):
+    """Имя исходного файла без расширения по имени варианта."""
+    return posixpath.splitext(posixpath.basename(name))[0].rsplit('-', 1)[0]
+
+
+def save_file(name, content):
+    if default_storage.exists(name):
+        default_storage.delete(name)
+    return default_storage.save(name, ContentFile(content))
+
+
+def render_variants(source, force=False):
+    """Сохраняет уменьшенные копии картинки в JPEG и, если Pillow умеет, WebP.
+
+    Возвращает словарь {размер: {формат: имя файла}}. Картинки меньше
+    заданного размера не увеличиваются. Имена вариантов выводятся из имени
+    исходного файла, поэтому уже построенные варианты той же картинки
+    используются повторно.
+    """
+    names = {size: {extension: variant_name(source, size, extension)
+                    for extension in VARIANT_FORMATS}
+             for size in IMAGE_SIZES}
+    if not force and all(default_storage.exists(name)
+                         for name in variant_files(names)):
+        return names
+    storage = Recipe._meta.get_field('image').storage
+    with storage.open(source) as file, Image.open(file) as image:
+        image = ImageOps.exif_transpose(image).convert('RGB')
+    for size, width in IMAGE_SIZES.items():
+        thumbnail = image.copy()
+        thumbnail.thumbnail((width, width), Image.LANCZOS)
+        for extension, image_format in VARIANT_FORMATS.items():
+            buffer = BytesIO()
+            thumbnail.save(buffer, image_format, **SAVE_OPTIONS[image_format])
+            names[size][extension] = save_file(
+                names[size][extension], buffer.getvalue())
+    return names
+
+
+def variant_files(variants):
+    return {name for size in IMAGE_SIZES
+            for name in variants.get(size, {}).values()}
+
+
+def generate_image_variants(recipe_ids, force=False):
+    """Строит варианты картинок рецептов, у которых они устарели.
+
+    Варианты сохраняются вместе с именем исходного файла; если картинку
+    успели заменить, результат отбрасывается. Старые файлы не удаляются:
+    одинаковые картинки разных рецептов хранятся одним файлом, их удаляет
+    команда collect_media_garbage. Возвращает число рецептов с
+    обновлёнными вариантами.
+    """
+    updated = []
+    for recipe_id, source, old in Recipe.objects.filter(
+            pk__in=recipe_ids).values_list('pk', 'image', 'image_variants'):
+        if not source or (old.get('source') == source and not force):
+            continue
+        try:
+            variants = render_variants(source, force)
+        except (OSError, ValueError, Image.DecompressionBombError):
+            logger.exception('Не удалось обработать картинку %s', source)
+            variants = {}
+        variants['source'] = source
+        if Recipe.objects.filter(pk=recipe_id, image=source).update(
+                image_variants=variants):
+            updated.append(recipe_id)
+    if updated:
+        invalidate_responses(RECIPES_CACHE_NAMESPACE, updated)
+    return len(updated)
+
+
+def generate_in_background(recipe_ids):
+    close_old_connections()
+    try:
+        generate_image_variants(recipe_ids)
+    except Exception:
+        logger.exception('Не удалось построить варианты картинок')
+    finally:
+        connection.close()
+
+
+def schedule_image_variants(recipe_ids):
+    """Строит варианты вне запроса, в отдельном потоке процесса."""
+    recipe_ids = list(recipe_ids)
+    if settings.IMAGE_VARIANTS_BACKGROUND:
+        executor.submit(generate_in_background, recipe_ids)
+    else:
+        generate_image_variants(recipe_ids)
+
+
+def image_urls(recipe):
+    """Карта размеров: пока варианты не готовы, отдаётся оригинал."""
+    original = recipe.image.url
+    variants = recipe.image_variants
+    if variants.get('source') != recipe.image.name:
+        variants = {}
+    urls = {'original': original}
+    for size in IMAGE_SIZES:
+        names = variants.get(size, {})
+        urls[size] = {
+            extension: (default_storage.url(names[extension])
+                        if extension in names else original)
+            for extension in IMAGE_FORMATS}
+    return urls
+
+
+def image_url(recipe, size=None):
+    if size is None:
+        return recipe.image.url
+    return image_urls(recipe)[size]['jpeg']
@@ -0,0 +1,68 @@
+# Generated by Django 3.2.25 on 2026-10-18 03:53
+
+from collections import defaultdict
+
+from django.db import migrations, models
+
+POSTGRESQL_FORWARD = (
+    'ALTER TABLE recipes_recipe ADD COLUMN search_vector tsvector '
+    'GENERATED ALWAYS AS ('
+    "setweight(to_tsvector('russian', coalesce(name, '')), 'A') || "
+    "setweight(to_tsvector('russian', coalesce(search_document, '')), 'B')"
+    ') STORED',
+    'CREATE INDEX recipe_search_vector_idx ON recipes_recipe '
+    'USING GIN (search_vector)',
+)
+POSTGRESQL_REVERSE = (
+    'DROP INDEX IF EXISTS recipe_search_vector_idx',
+    'ALTER TABLE recipes_recipe DROP COLUMN IF EXISTS search_vector',
+)
+SQLITE_REVERSE = (
+    'DROP TRIGGER IF EXISTS recipes_recipe_fts_insert',
+    'DROP TRIGGER IF EXISTS recipes_recipe_fts_delete',
+    'DROP TRIGGER IF EXISTS recipes_recipe_fts_update',
+    'DROP TABLE IF EXISTS recipes_recipe_fts',
+)
+
+
+def fill_search_documents(apps, schema_editor):
+    Recipe = apps.get_model('recipes', 'Recipe')
+    IngredientRecipe = apps.get_model('recipes', 'IngredientRecipe')
+    names = defaultdict(list)
+    for recipe_id, name in IngredientRecipe.objects.order_by(
+            'id').values_list('recipe_id', 'ingredient__name').iterator():
+        names[recipe_id].append(name)
+    recipes = []
+    for recipe in Recipe.objects.only('id', 'text').iterator():
+        recipe.search_document = '\n'.join([recipe.text, *names[recipe.id]])
+        recipes.append(recipe)
+    Recipe.objects.bulk_update(recipes, ['search_document'], batch_size=500)
+
+
+def run_vendor_sql(statements):
+    def run(apps, schema_editor):
+        for statement in statements.get(schema_editor.connection.vendor, ()):
+            schema_editor.execute(statement)
+    return run
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipes', '0005_recipe_counters'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='recipe',
+            name='search_document',
+            field=models.TextField(blank=True, editable=False, verbose_name='поисковый документ'),
+        ),
+        migrations.RunPython(
+            fill_search_documents, migrations.RunPython.noop),
+        # На SQLite таблицу FTS5 создаёт обработчик post_migrate.
+        migrations.RunPython(
+            run_vendor_sql({'postgresql': POSTGRESQL_FORWARD}),
+            run_vendor_sql({'postgresql': POSTGRESQL_REVERSE,
+                            'sqlite': SQLITE_REVERSE})),
+    ]
@@ -0,0 +1,19 @@
+# Generated by Django 3.2.25 on 2026-10-18 04:05
+
+import core.storage
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipes', '0007_recipe_image_variants'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='recipe',
+            name='image',
+            field=models.ImageField(help_text='Добавьте картинку', storage=core.storage.ContentHashStorage(), upload_to='static/images/', verbose_name='картинкa'),
+        ),
+    ]
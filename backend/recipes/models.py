@@ -1,7 +1,12 @@
+from collections import defaultdict
+
 from django.core.validators import MaxValueValidator, MinValueValidator
-from django.db import models
+from django.db import models, transaction
+from django.db.models.functions import RowNumber
 
 from core import constants
+from core.models import CounterFieldsMixin
+from core.storage import ContentHashStorage
 from core.validators import validate_hexname
 from users.models import User
 
@@ -60,6 +65,31 @@ class Ingredient(models.Model):
 
 
 class RecipeQuerySet(models.QuerySet):
+    def tag_ids(self, recipes):
+        tag_ids = defaultdict(list)
+        for recipe_id, tag_id in Recipe.tags.through.objects.filter(
+                recipe_id__in=[recipe.id for recipe in recipes]
+        ).values_list('recipe_id', 'tag_id').order_by('tag_id'):
+            tag_ids[recipe_id].append(tag_id)
+        return tag_ids
+
+    def limit_per_author(self, author_ids, limit=None):
+        recipes = self.filter(author_id__in=author_ids)
+        if limit is None or not author_ids:
+            return recipes
+        ranked = recipes.annotate(
+            author_position=models.Window(
+                expression=RowNumber(),
+                partition_by=models.F('author_id'),
+                order_by=(models.F('pub_date').desc(),
+                          models.F('id').desc())))
+        sql, params = ranked.query.sql_with_params()
+        return self.raw(
+            f'SELECT * FROM ({sql}) ranked '
+            f'WHERE ranked.author_position <= %s '
+            f'ORDER BY ranked.author_id, ranked.author_position',
+            (*params, limit))
+
     def annotate_is_fav_and_is_in_shop_cart(self, user):
         if user.is_authenticated:
             return self.annotate(
@@ -70,10 +100,16 @@ class RecipeQuerySet(models.QuerySet):
                     user.shopping_cart.filter(
                         recipe__pk=models.OuterRef('pk')))
             )
+        return self.annotate(
+            is_favorited=models.Value(False),
+            is_in_shopping_cart=models.Value(False),
+        )
 
 
-class Recipe(models.Model):
+class Recipe(CounterFieldsMixin, models.Model):
     objects = RecipeQuerySet.as_manager()
+    counter_fields = ('favorites_count', 'shopping_cart_count')
+    derived_fields = ('image_variants', )
 
     author = models.ForeignKey(
         User,
@@ -90,6 +126,7 @@ class Recipe(models.Model):
     )
     image = models.ImageField(
         upload_to='static/images/',
+        storage=ContentHashStorage(),
         verbose_name='картинкa',
         help_text='Добавьте картинку',
     )
@@ -117,12 +154,36 @@ class Recipe(models.Model):
     pub_date = models.DateTimeField(
         verbose_name='Дата публикации',
         auto_now_add=True)
+    favorites_count = models.PositiveIntegerField(
+        'в избранном',
+        default=0,
+        editable=False,
+    )
+    shopping_cart_count = models.PositiveIntegerField(
+        'в списках покупок',
+        default=0,
+        editable=False,
+    )
+    search_document = models.TextField(
+        'поисковый документ',
+        blank=True,
+        editable=False,
+    )
+    image_variants = models.JSONField(
+        'уменьшенные картинки',
+        default=dict,
+        blank=True,
+        editable=False,
+    )
 
     class Meta:
-        ordering = ('-pub_date', )
+        ordering = ('-pub_date', '-id')
         default_related_name = 'recipe'
         verbose_name = 'Рецепт'
         verbose_name_plural = 'Рецепты'
+        indexes = [
+            models.Index(fields=['-pub_date', '-id'],
+                         name='recipe_pub_date_id_idx')]
         constraints = [
             models.UniqueConstraint(
                 fields=['name', 'author'],
@@ -163,6 +224,82 @@ class IngredientRecipe(models.Model):
         return f'{self.ingredient} {self.amount}'
 
 
+class ShoppingCartIngredientQuerySet(models.QuerySet):
+    def apply_amounts(self, user_ids, amounts):
+        amounts = {
+            ingredient_id: amount
+            for ingredient_id, amount in amounts.items() if amount}
+        user_ids = list(user_ids)
+        if not user_ids or not amounts:
+            return
+        with transaction.atomic(savepoint=False):
+            # Строки создаются заранее и затем меняются под блокировкой:
+            # одновременное добавление того же ингредиента пропускает
+            # вставку, а не нарушает уникальность.
+            self.bulk_create(
+                (self.model(user_id=user_id, ingredient_id=ingredient_id,
+                            amount=0)
+                 for user_id in user_ids
+                 for ingredient_id, amount in amounts.items() if amount > 0),
+                ignore_conflicts=True)
+            changed, emptied = [], []
+            for row in self.select_for_update().filter(
+                    user_id__in=user_ids, ingredient_id__in=amounts):
+                row.amount += amounts[row.ingredient_id]
+                if row.amount > 0:
+                    changed.append(row)
+                else:
+                    emptied.append(row.pk)
+            self.bulk_update(changed, ['amount'])
+            self.filter(pk__in=emptied).delete()
+
+    def add_recipe(self, user_id, recipe_id, sign=1):
+        self.apply_amounts(
+            [user_id],
+            {ingredient_id: sign * amount
+             for ingredient_id, amount in IngredientRecipe.objects.filter(
+                 recipe_id=recipe_id).values_list('ingredient_id', 'amount')})
+
+    def remove_recipe(self, user_id, recipe_id):
+        self.add_recipe(user_id, recipe_id, sign=-1)
+
+    def change_recipe(self, recipe, old_amounts, new_amounts):
+        self.apply_amounts(
+            recipe.shopping_cart.values_list('user_id', flat=True),
+            {ingredient_id: (new_amounts.get(ingredient_id, 0)
+                             - old_amounts.get(ingredient_id, 0))
+             for ingredient_id in old_amounts.keys() | new_amounts.keys()})
+
+
+class ShoppingCartIngredient(models.Model):
+    objects = ShoppingCartIngredientQuerySet.as_manager()
+
+    user = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='shopping_cart_ingredients',
+        verbose_name='покупатель',
+    )
+    ingredient = models.ForeignKey(
+        Ingredient,
+        on_delete=models.CASCADE,
+        related_name='shopping_cart_ingredients',
+        verbose_name='ингредиент',
+    )
+    amount = models.PositiveIntegerField('количество')
+
+    class Meta:
+        verbose_name = 'ингредиент списка покупок'
+        verbose_name_plural = 'ингредиенты списка покупок'
+        constraints = [
+            models.UniqueConstraint(
+                fields=['user', 'ingredient'],
+                name='unique_shopping_cart_ingredient')]
+
+    def __str__(self):
+        return f'{self.ingredient} {self.amount}'
+
+
 class UserRecipe(models.Model):
     user = models.ForeignKey(
         User,
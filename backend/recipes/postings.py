@@ -0,0 +1,298 @@
+import threading
+from array import array
+from collections import defaultdict, namedtuple
+from collections.abc import Sequence
+from time import monotonic
+
+from django.core.cache import cache
+
+from core.cache import get_version
+from core.db.replicas import use_primary
+from .models import IngredientRecipe
+
+VERSION_CHECK_INTERVAL = 1
+MAX_LOG_ENTRIES = 1000
+LOG_TIMEOUT = 60 * 60 * 24
+EPOCH_KEY = 'postings:epoch'
+SEQUENCE_KEY = 'postings:sequence'
+DENSE_RATIO = 64
+
+PostingsState = namedtuple('PostingsState', (
+    'epoch', 'sequence', 'ids', 'positions', 'recipes', 'postings',
+    'size_masks'))
+
+
+def log_key(sequence):
+    return f'postings:log:{sequence}'
+
+
+def get_sequence():
+    cache.add(SEQUENCE_KEY, 0, None)
+    return cache.get(SEQUENCE_KEY) or 0
+
+
+def to_posting(positions, total):
+    """Плотные списки хранятся битовой маской, редкие - массивом позиций."""
+    positions = sorted(positions)
+    if len(positions) * DENSE_RATIO > total:
+        return to_mask(positions, total)
+    return array('l', positions)
+
+
+def to_mask(posting, total):
+    if isinstance(posting, int):
+        return posting
+    bits = bytearray((total + 7) // 8)
+    for position in posting:
+        bits[position >> 3] |= 1 << (position & 7)
+    return int.from_bytes(bits, 'little')
+
+
+def count_bits(mask):
+    return bin(mask).count('1')
+
+
+def iter_bits(mask):
+    """Перебирает номера установленных битов от старшего к младшему."""
+    digits = bin(mask)
+    top = len(digits) - 1
+    index = digits.find('1', 2)
+    while index != -1:
+        yield top - index
+        index = digits.find('1', index + 1)
+
+
+def add_masks(masks):
+    """Складывает маски поразрядно: plane[k] - k-й бит суммы для рецепта."""
+    planes = []
+    for mask in masks:
+        carry = mask
+        for level, plane in enumerate(planes):
+            if not carry:
+                break
+            planes[level], carry = plane ^ carry, plane & carry
+        if carry:
+            planes.append(carry)
+    return planes
+
+
+def equal_to(planes, value, mask):
+    if value >> len(planes):
+        return 0
+    for level, plane in enumerate(planes):
+        mask &= plane if value >> level & 1 else ~plane
+        if not mask:
+            break
+    return mask
+
+
+def patch_postings(postings, size_masks, changes, total):
+    """Копирует списки и маски размеров, применяя к ним изменения."""
+    postings = dict(postings)
+    size_masks = dict(size_masks)
+    for key, (removed, added) in changes.items():
+        if isinstance(key, tuple):
+            mask = size_masks.get(key[1], 0)
+            for position in removed:
+                mask &= ~(1 << position)
+            for position in added:
+                mask |= 1 << position
+            size_masks[key[1]] = mask
+            continue
+        members = set(iter_bits(to_mask(postings.get(key, 0), total)))
+        members = (members - removed) | added
+        if members:
+            postings[key] = to_posting(members, total)
+        else:
+            postings.pop(key, None)
+    size_masks.pop(0, None)
+    return postings, size_masks
+
+
+class RankedRecipes(Sequence):
+    """Ленивый список пар (id рецепта, недостающие ингредиенты)."""
+
+    def __init__(self, ids, groups):
+        self.ids = ids
+        self.groups = groups
+
+    def __len__(self):
+        return sum(count for _, _, count in self.groups)
+
+    def __getitem__(self, index):
+        if not isinstance(index, slice):
+            length = len(self)
+            if index < 0:
+                index += length
+            if not 0 <= index < length:
+                raise IndexError('Индекс вне списка.')
+            return self[index:index + 1][0]
+        start, stop, _ = index.indices(len(self))
+        items = []
+        for missing, mask, count in self.groups:
+            if start >= count:
+                start -= count
+                stop -= count
+                continue
+            for number, position in enumerate(iter_bits(mask)):
+                if number >= stop:
+                    break
+                if number >= start:
+                    items.append((self.ids[position], missing))
+            if stop <= count:
+                break
+            start = 0
+            stop -= count
+        return items
+
+
+class RecipePostings:
+    """Обратный индекс ингредиент -> рецепты в памяти процесса.
+
+    Рецепты пронумерованы по возрастанию id. Для каждого ингредиента
+    хранится массив номеров его рецептов или, если рецептов много,
+    битовая маска; для каждого размера рецепта - маска рецептов с таким
+    числом ингредиентов. Изменённые рецепты записываются в журнал в общем
+    кэше Django; процессы применяют журнал к своему индексу, а при его
+    потере строят индекс заново.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.state = None
+        self.checked_at = 0
+
+    def record_change(self, recipe_ids):
+        epoch = get_version(EPOCH_KEY)
+        try:
+            sequence = cache.incr(SEQUENCE_KEY)
+        except ValueError:
+            cache.add(SEQUENCE_KEY, 0, None)
+            sequence = cache.incr(SEQUENCE_KEY)
+        cache.set(log_key(sequence), (epoch, list(recipe_ids)), LOG_TIMEOUT)
+
+    def build(self, epoch, sequence):
+        recipes = defaultdict(list)
+        for recipe_id, ingredient_id in IngredientRecipe.objects.order_by(
+                'recipe_id', 'ingredient_id').values_list(
+                'recipe_id', 'ingredient_id').iterator(chunk_size=10000):
+            recipes[recipe_id].append(ingredient_id)
+        ids = array('q', sorted(recipes))
+        positions = {recipe_id: position
+                     for position, recipe_id in enumerate(ids)}
+        postings = defaultdict(list)
+        sizes = defaultdict(list)
+        for position, recipe_id in enumerate(ids):
+            sizes[len(recipes[recipe_id])].append(position)
+            for ingredient_id in recipes[recipe_id]:
+                postings[ingredient_id].append(position)
+        return PostingsState(
+            epoch, sequence, ids, positions,
+            {key: tuple(value) for key, value in recipes.items()},
+            {key: to_posting(value, len(ids))
+             for key, value in postings.items()},
+            {key: to_mask(value, len(ids)) for key, value in sizes.items()})
+
+    def apply(self, state, sequence, recipe_ids):
+        current = defaultdict(list)
+        for recipe_id, ingredient_id in IngredientRecipe.objects.filter(
+                recipe_id__in=recipe_ids).order_by(
+                'ingredient_id').values_list('recipe_id', 'ingredient_id'):
+            current[recipe_id].append(ingredient_id)
+        ids = state.ids
+        positions = state.positions
+        new_ids = sorted(set(current) - positions.keys())
+        if new_ids:
+            ids = array('q', ids)
+            positions = dict(positions)
+            for recipe_id in new_ids:
+                positions[recipe_id] = len(ids)
+                ids.append(recipe_id)
+        total = len(ids)
+        recipes = dict(state.recipes)
+        changes = defaultdict(lambda: (set(), set()))
+        for recipe_id in recipe_ids:
+            if recipe_id not in positions:
+                continue
+            position = positions[recipe_id]
+            old = recipes.pop(recipe_id, ())
+            new = current.get(recipe_id, ())
+            if new:
+                recipes[recipe_id] = tuple(new)
+            for ingredient_id in set(old).difference(new):
+                changes[ingredient_id][0].add(position)
+            for ingredient_id in set(new).difference(old):
+                changes[ingredient_id][1].add(position)
+            if len(old) != len(new):
+                changes[('size', len(old))][0].add(position)
+                changes[('size', len(new))][1].add(position)
+        postings, size_masks = patch_postings(
+            state.postings, state.size_masks, changes, total)
+        return state._replace(
+            sequence=sequence, ids=ids, positions=positions,
+            recipes=recipes, postings=postings, size_masks=size_masks)
+
+    def refresh(self):
+        with self.lock, use_primary():
+            state = self.state
+            epoch = get_version(EPOCH_KEY)
+            sequence = get_sequence()
+            if (state is None or state.epoch != epoch
+                    or not 0 <= sequence - state.sequence <= MAX_LOG_ENTRIES):
+                state = self.build(epoch, sequence)
+            elif sequence > state.sequence:
+                keys = [log_key(number) for number in range(
+                    state.sequence + 1, sequence + 1)]
+                entries = cache.get_many(keys)
+                if len(entries) < len(keys) or any(
+                        entry_epoch != epoch
+                        for entry_epoch, _ in entries.values()):
+                    state = self.build(epoch, sequence)
+                else:
+                    state = self.apply(state, sequence, {
+                        recipe_id for _, recipe_ids in entries.values()
+                        for recipe_id in recipe_ids})
+            self.state = state
+            self.checked_at = monotonic()
+            return state
+
+    def get_state(self):
+        state = self.state
+        if (state is None
+                or monotonic() - self.checked_at > VERSION_CHECK_INTERVAL):
+            state = self.refresh()
+        return state
+
+    def cook(self, ingredient_ids, max_missing=None):
+        """Ранжирует рецепты по доступным ингредиентам.
+
+        Для каждого рецепта число совпавших ингредиентов считается
+        поразрядным сложением масок. Сначала идут рецепты, для которых
+        всего хватает, затем с наименьшим числом недостающих; при равенстве
+        - с большим числом совпавших и более новые. max_missing больше
+        числа ингредиентов самого большого рецепта ничего не добавляет и
+        уменьшается до него.
+        """
+        state = self.get_state()
+        total = len(state.ids)
+        planes = add_masks(
+            to_mask(state.postings[ingredient_id], total)
+            for ingredient_id in set(ingredient_ids)
+            if ingredient_id in state.postings)
+        sizes = sorted(state.size_masks, reverse=True)
+        largest = sizes[0] if sizes else 0
+        if max_missing is None or max_missing > largest:
+            max_missing = largest
+        groups = []
+        for missing in range(max_missing + 1):
+            for size in sizes:
+                if size - missing < 1:
+                    break
+                mask = equal_to(
+                    planes, size - missing, state.size_masks[size])
+                if mask:
+                    groups.append((missing, mask, count_bits(mask)))
+        return RankedRecipes(state.ids, groups)
+
+
+recipe_postings = RecipePostings()
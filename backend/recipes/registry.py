@@ -0,0 +1,65 @@
+import threading
+from time import monotonic
+
+from core.cache import bump_version, get_version
+from core.db.replicas import use_primary
+from .models import Ingredient, Tag
+
+VERSION_CHECK_INTERVAL = 1
+
+
+class ReferenceRegistry:
+    """Кэш справочника в памяти процесса.
+
+    Версия справочника хранится в кэше Django (CACHES): сохранение записи
+    меняет версию, и процессы, видящие этот кэш, перечитывают справочник
+    не позже чем через VERSION_CHECK_INTERVAL секунд. Изменения из других
+    процессов (worker'ы gunicorn, команда csv_in_db) видны только при
+    общем для процессов кэше - memcached или FileBasedCache; с LocMemCache
+    каждый процесс замечает лишь собственные изменения.
+    """
+
+    def __init__(self, model):
+        self.model = model
+        self.version_key = f'registry:{model._meta.label_lower}:version'
+        self.lock = threading.Lock()
+        self.items = None
+        self.version = None
+        self.checked_at = 0
+
+    def invalidate(self):
+        bump_version(self.version_key)
+        self.items = None
+
+    def load(self):
+        with self.lock, use_primary():
+            version = get_version(self.version_key)
+            if self.items is None or version != self.version:
+                self.items = {
+                    item.pk: item
+                    for item in self.model.objects.order_by('pk')}
+                self.version = version
+            self.checked_at = monotonic()
+            return self.items
+
+    def all(self):
+        items = self.items
+        if (items is None
+                or monotonic() - self.checked_at > VERSION_CHECK_INTERVAL):
+            items = self.load()
+        return items
+
+    def get_many(self, pks):
+        items = self.all()
+        if any(pk not in items for pk in pks):
+            self.items = None
+            items = self.all()
+        return [items[pk] for pk in pks if pk in items]
+
+    def get(self, pk):
+        items = self.get_many([pk])
+        return items[0] if items else None
+
+
+tag_registry = ReferenceRegistry(Tag)
+ingredient_registry = ReferenceRegistry(Ingredient)
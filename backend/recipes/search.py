@@ -0,0 +1,105 @@
+import re
+from collections import defaultdict
+
+from django.db import connection
+from django.db.models import FloatField
+from django.db.models.expressions import RawSQL
+
+from .models import IngredientRecipe, Recipe
+
+SEARCH_CONFIG = 'russian'
+FTS_TABLE = 'recipes_recipe_fts'
+NAME_WEIGHT = 10.0
+RANKED_ORDERING = ('-search_rank', '-pub_date', '-id')
+
+SQLITE_INDEX_SQL = (
+    f'CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} USING fts5('
+    'name, search_document, content=recipes_recipe, content_rowid=id, '
+    "tokenize='unicode61')",
+    f'CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_insert '
+    'AFTER INSERT ON recipes_recipe BEGIN '
+    f'INSERT INTO {FTS_TABLE}(rowid, name, search_document) '
+    'VALUES (new.id, new.name, new.search_document); END',
+    f'CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_delete '
+    'AFTER DELETE ON recipes_recipe BEGIN '
+    f'INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, name, search_document) '
+    "VALUES ('delete', old.id, old.name, old.search_document); END",
+    f'CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_update '
+    'AFTER UPDATE ON recipes_recipe BEGIN '
+    f'INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, name, search_document) '
+    "VALUES ('delete', old.id, old.name, old.search_document); "
+    f'INSERT INTO {FTS_TABLE}(rowid, name, search_document) '
+    'VALUES (new.id, new.name, new.search_document); END',
+    f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES ('rebuild')",
+)
+
+
+def install_sqlite_index(connection):
+    """Создаёт таблицу FTS5 с триггерами и перестраивает её.
+
+    Вызывается после каждого migrate: пересоздание таблицы рецептов
+    миграциями SQLite удаляет триггеры.
+    """
+    with connection.cursor() as cursor:
+        for statement in SQLITE_INDEX_SQL:
+            cursor.execute(statement)
+
+
+def build_documents(recipe_ids):
+    """Собирает поисковые документы: описание и названия ингредиентов."""
+    documents = defaultdict(list)
+    for recipe_id, text in Recipe.objects.filter(
+            pk__in=recipe_ids).values_list('pk', 'text'):
+        documents[recipe_id].append(text)
+    for recipe_id, name in IngredientRecipe.objects.filter(
+            recipe_id__in=documents).order_by('id').values_list(
+            'recipe_id', 'ingredient__name'):
+        documents[recipe_id].append(name)
+    return {recipe_id: '\n'.join(parts)
+            for recipe_id, parts in documents.items()}
+
+
+def update_search_documents(recipe_ids, batch_size=500):
+    recipe_ids = list(recipe_ids)
+    for start in range(0, len(recipe_ids), batch_size):
+        documents = build_documents(recipe_ids[start:start + batch_size])
+        Recipe.objects.bulk_update(
+            [Recipe(pk=recipe_id, search_document=document)
+             for recipe_id, document in documents.items()],
+            ['search_document'])
+
+
+def get_terms(query):
+    return re.findall(r'[^\W_]+', query.lower())
+
+
+def search_recipes(queryset, query):
+    """Фильтрует рецепты по словам запроса и сортирует по релевантности.
+
+    На PostgreSQL используется столбец search_vector с GIN-индексом, на
+    SQLite - таблица FTS5. Слова запроса ищутся как префиксы.
+    """
+    terms = get_terms(query)
+    if not terms:
+        return queryset
+    table = Recipe._meta.db_table
+    if connection.vendor == 'postgresql':
+        tsquery = ' & '.join(f'{term}:*' for term in terms)
+        matches = (
+            f'SELECT id FROM {table} WHERE search_vector @@ '
+            f"to_tsquery('{SEARCH_CONFIG}', %s)")
+        rank = (
+            f'ts_rank({table}.search_vector, '
+            f"to_tsquery('{SEARCH_CONFIG}', %s))")
+        params = (tsquery, )
+    else:
+        fts_query = ' '.join(f'"{term}"*' for term in terms)
+        matches = f'SELECT rowid FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s'
+        rank = (
+            f'(SELECT -bm25({FTS_TABLE}, {NAME_WEIGHT}, 1.0) '
+            f'FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s '
+            f'AND rowid = {table}.id)')
+        params = (fts_query, )
+    return queryset.filter(pk__in=RawSQL(matches, params)).annotate(
+        search_rank=RawSQL(rank, params, output_field=FloatField())
+    ).order_by(*RANKED_ORDERING)
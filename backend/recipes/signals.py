@@ -0,0 +1,203 @@
+from functools import partial
+
+from django.db import connections, transaction
+from django.db.models.signals import (m2m_changed, post_delete,
+                                      post_migrate, post_save, pre_delete)
+from django.dispatch import receiver
+
+from core.cache import invalidate_details, invalidate_responses
+from core.constants import RECIPES_CACHE_NAMESPACE
+from core.utils import change_counter
+from users.models import User
+from .models import (Favorite, Ingredient, IngredientRecipe, Recipe,
+                     ShoppingCart, ShoppingCartIngredient, Tag)
+from .images import schedule_image_variants
+from .postings import recipe_postings
+from .registry import ingredient_registry, tag_registry
+from .search import install_sqlite_index, update_search_documents
+
+AUTHOR_FIELDS = frozenset(
+    ('email', 'username', 'first_name', 'last_name', 'password'))
+
+
+def invalidate_recipes(recipe_ids):
+    transaction.on_commit(partial(
+        invalidate_responses, RECIPES_CACHE_NAMESPACE, list(recipe_ids)))
+
+
+def invalidate_recipe_counters(recipe_id):
+    """Счётчики меняются от действий любого пользователя, поэтому сброс
+    всех списков обнулял бы их кэш; в списках счётчики отстают не больше
+    чем на RESPONSE_CACHE_TIMEOUT."""
+    transaction.on_commit(partial(
+        invalidate_details, RECIPES_CACHE_NAMESPACE, [recipe_id]))
+
+
+@receiver(post_save, sender=ShoppingCart)
+def add_to_shopping_cart_totals(sender, instance, created, **kwargs):
+    if created:
+        ShoppingCartIngredient.objects.add_recipe(
+            instance.user_id, instance.recipe_id)
+
+
+@receiver(pre_delete, sender=ShoppingCart)
+def remove_from_shopping_cart_totals(sender, instance, **kwargs):
+    ShoppingCartIngredient.objects.remove_recipe(
+        instance.user_id, instance.recipe_id)
+
+
+@receiver(post_save, sender=Favorite)
+@receiver(post_delete, sender=Favorite)
+def count_favorites(sender, instance, signal, created=False, **kwargs):
+    delta = -1 if signal is post_delete else int(created)
+    change_counter(Recipe.objects.filter(pk=instance.recipe_id),
+                   'favorites_count', delta)
+    invalidate_recipe_counters(instance.recipe_id)
+
+
+@receiver(post_save, sender=ShoppingCart)
+@receiver(post_delete, sender=ShoppingCart)
+def count_shopping_carts(sender, instance, signal, created=False, **kwargs):
+    delta = -1 if signal is post_delete else int(created)
+    change_counter(Recipe.objects.filter(pk=instance.recipe_id),
+                   'shopping_cart_count', delta)
+    invalidate_recipe_counters(instance.recipe_id)
+
+
+@receiver(post_save, sender=Recipe)
+@receiver(post_delete, sender=Recipe)
+def count_recipes(sender, instance, signal, created=False, **kwargs):
+    delta = -1 if signal is post_delete else int(created)
+    change_counter(User.objects.filter(pk=instance.author_id),
+                   'recipes_count', delta)
+
+
+@receiver(post_save, sender=Ingredient)
+@receiver(post_delete, sender=Ingredient)
+def invalidate_ingredient_registry(sender, **kwargs):
+    transaction.on_commit(ingredient_registry.invalidate)
+
+
+@receiver(post_save, sender=Tag)
+@receiver(post_delete, sender=Tag)
+def invalidate_tag_registry(sender, **kwargs):
+    transaction.on_commit(tag_registry.invalidate)
+
+
+@receiver(post_save, sender=Recipe)
+@receiver(post_delete, sender=Recipe)
+def invalidate_recipe_cache(sender, instance, **kwargs):
+    invalidate_recipes([instance.pk])
+
+
+@receiver(post_save, sender=IngredientRecipe)
+@receiver(post_delete, sender=IngredientRecipe)
+def invalidate_recipe_ingredient_cache(sender, instance, **kwargs):
+    invalidate_recipes([instance.recipe_id])
+
+
+@receiver(m2m_changed, sender=Recipe.tags.through)
+@receiver(m2m_changed, sender=Recipe.ingredients.through)
+def invalidate_recipe_relations_cache(sender, instance, action, reverse,
+                                      pk_set, **kwargs):
+    if not action.startswith('post_'):
+        return
+    if not reverse:
+        invalidate_recipes([instance.pk])
+    elif pk_set:
+        invalidate_recipes(pk_set)
+    else:
+        invalidate_recipes([])
+
+
+@receiver(post_save, sender=Tag)
+@receiver(pre_delete, sender=Tag)
+def invalidate_tag_recipes_cache(sender, instance, **kwargs):
+    invalidate_recipes(instance.recipe.values_list('pk', flat=True))
+
+
+@receiver(post_save, sender=Ingredient)
+@receiver(pre_delete, sender=Ingredient)
+def invalidate_ingredient_recipes_cache(sender, instance, **kwargs):
+    invalidate_recipes(IngredientRecipe.objects.filter(
+        ingredient=instance).values_list('recipe_id', flat=True))
+
+
+@receiver(post_save, sender=User)
+def invalidate_author_recipes_cache(sender, instance, created,
+                                    update_fields, **kwargs):
+    if created or (update_fields and not AUTHOR_FIELDS & update_fields):
+        return
+    invalidate_recipes(instance.recipe.values_list('pk', flat=True))
+
+
+def refresh_search(recipe_ids):
+    transaction.on_commit(partial(update_search_documents, list(recipe_ids)))
+
+
+@receiver(post_save, sender=Recipe)
+def refresh_recipe_search(sender, instance, **kwargs):
+    refresh_search([instance.pk])
+
+
+@receiver(post_save, sender=IngredientRecipe)
+@receiver(post_delete, sender=IngredientRecipe)
+def refresh_recipe_ingredient_search(sender, instance, **kwargs):
+    refresh_search([instance.recipe_id])
+
+
+@receiver(m2m_changed, sender=Recipe.ingredients.through)
+def refresh_recipe_ingredients_search(sender, instance, action, reverse,
+                                      pk_set, **kwargs):
+    if action.startswith('post_') and not reverse:
+        refresh_search([instance.pk])
+
+
+@receiver(post_save, sender=Ingredient)
+def refresh_ingredient_search(sender, instance, created, **kwargs):
+    if not created:
+        refresh_search(IngredientRecipe.objects.filter(
+            ingredient=instance).values_list('recipe_id', flat=True))
+
+
+def refresh_postings(recipe_ids):
+    transaction.on_commit(partial(
+        recipe_postings.record_change, list(recipe_ids)))
+
+
+@receiver(post_save, sender=Recipe)
+@receiver(post_delete, sender=Recipe)
+def refresh_recipe_postings(sender, instance, **kwargs):
+    refresh_postings([instance.pk])
+
+
+@receiver(post_save, sender=IngredientRecipe)
+@receiver(post_delete, sender=IngredientRecipe)
+def refresh_recipe_ingredient_postings(sender, instance, **kwargs):
+    refresh_postings([instance.recipe_id])
+
+
+@receiver(m2m_changed, sender=Recipe.ingredients.through)
+def refresh_recipe_ingredients_postings(sender, instance, action, reverse,
+                                        pk_set, **kwargs):
+    if not action.startswith('post_'):
+        return
+    refresh_postings((pk_set or ()) if reverse else [instance.pk])
+
+
+@receiver(post_save, sender=Recipe)
+def refresh_image_variants(sender, instance, **kwargs):
+    if instance.image and (
+            instance.image_variants.get('source') != instance.image.name):
+        transaction.on_commit(partial(
+            schedule_image_variants, [instance.pk]))
+
+
+@receiver(post_migrate)
+def install_search_index(sender, using, apps, **kwargs):
+    connection = connections[using]
+    if sender.name != 'recipes' or connection.vendor != 'sqlite':
+        return
+    fields = apps.get_model('recipes', 'Recipe')._meta.get_fields()
+    if any(field.name == 'search_document' for field in fields):
+        install_sqlite_index(connection)
@@ -0,0 +1,315 @@
+import asyncio
+import csv
+import json
+import os
+import random
+from concurrent.futures import ThreadPoolExecutor
+from io import StringIO
+from pathlib import Path
+from time import perf_counter
+
+import pytest
+from asgiref.sync import async_to_sync
+from django.core.cache import cache
+from django.core.management import call_command
+from django.contrib.auth.hashers import make_password
+from django.db import connection, connections
+from django.test import AsyncClient, Client
+from django.test.utils import CaptureQueriesContext
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient
+
+from recipes.models import (Favorite, Ingredient, IngredientRecipe, Recipe,
+                            ShoppingCart, Tag)
+from recipes.registry import ingredient_registry, tag_registry
+from users.models import Follow, User
+
+DATA_DIR = Path(__file__).resolve().parent.parent.parent / 'data'
+BASELINE_FILE = Path(__file__).resolve().parent / 'benchmark_baseline.json'
+
+USERS = 50
+RECIPES_PER_USER = 12
+INGREDIENTS_PER_RECIPE = (4, 12)
+FOLLOWS = 30
+FAVORITES = 60
+CART = 40
+PASSWORD = 'benchmark-password'
+
+ROUNDS = int(os.getenv('BENCHMARK_ROUNDS', 20))
+LATENCY_TOLERANCE = float(os.getenv('BENCHMARK_LATENCY_TOLERANCE', 2.5))
+TAIL_LATENCY_TOLERANCE = float(
+    os.getenv('BENCHMARK_TAIL_LATENCY_TOLERANCE', 4))
+LATENCY_SLACK_MS = float(os.getenv('BENCHMARK_LATENCY_SLACK_MS', 5))
+UPDATE_BASELINE = os.getenv('BENCHMARK_UPDATE_BASELINE') == 'True'
+CHECK_LATENCY = os.getenv('BENCHMARK_CHECK_LATENCY') == 'True'
+LOAD_CONCURRENCY = int(os.getenv('BENCHMARK_LOAD_CONCURRENCY', 16))
+LOAD_REQUESTS = int(os.getenv('BENCHMARK_LOAD_REQUESTS', 160))
+
+
+def seed():
+    rnd = random.Random(42)
+    with open(DATA_DIR / 'ingredients.csv', encoding='utf-8') as file:
+        Ingredient.objects.bulk_create(
+            Ingredient(name=name, measurement_unit=unit)
+            for name, unit in csv.reader(file))
+    with open(DATA_DIR / 'tags.csv', encoding='utf-8') as file:
+        Tag.objects.bulk_create(
+            Tag(name=name, color=color, slug=slug)
+            for name, color, slug in csv.reader(file))
+    password = make_password(PASSWORD)
+    User.objects.bulk_create(
+        User(email=f'user{i}@foodgram.ru', username=f'user{i}',
+             first_name=f'Имя{i}', last_name=f'Фамилия{i}',
+             password=password)
+        for i in range(USERS))
+    users = list(User.objects.order_by('id'))
+    ingredient_ids = list(Ingredient.objects.values_list('id', flat=True))
+    tag_ids = list(Tag.objects.values_list('id', flat=True))
+    Recipe.objects.bulk_create(
+        Recipe(author=author,
+               name=f'Рецепт {author.id}-{number}',
+               image='static/images/temp.jpeg',
+               text='Нарезать, смешать и запечь до готовности. ' * 20,
+               cooking_time=rnd.randint(5, 180))
+        for author in users for number in range(RECIPES_PER_USER))
+    recipe_ids = list(Recipe.objects.values_list('id', flat=True))
+    IngredientRecipe.objects.bulk_create(
+        IngredientRecipe(recipe_id=recipe_id, ingredient_id=ingredient_id,
+                         amount=rnd.randint(1, 500))
+        for recipe_id in recipe_ids
+        for ingredient_id in rnd.sample(
+            ingredient_ids, rnd.randint(*INGREDIENTS_PER_RECIPE)))
+    Recipe.tags.through.objects.bulk_create(
+        Recipe.tags.through(recipe_id=recipe_id, tag_id=tag_id)
+        for recipe_id in recipe_ids
+        for tag_id in rnd.sample(tag_ids, rnd.randint(1, 3)))
+    main_user = users[0]
+    Token.objects.create(user=main_user)
+    Follow.objects.bulk_create(
+        Follow(user=main_user, author=author)
+        for author in users[1:FOLLOWS + 1])
+    Favorite.objects.bulk_create(
+        Favorite(user=main_user, recipe_id=recipe_id)
+        for recipe_id in rnd.sample(recipe_ids, FAVORITES))
+    ShoppingCart.objects.bulk_create(
+        ShoppingCart(user=main_user, recipe_id=recipe_id)
+        for recipe_id in rnd.sample(recipe_ids, CART))
+    call_command('reconcile_shopping_carts', verbosity=0, stdout=StringIO())
+    call_command('repair_counters', stdout=StringIO())
+    call_command('rebuild_search_index', stdout=StringIO())
+
+
+@pytest.fixture(scope='session')
+def django_db_setup(django_db_setup, django_db_blocker):
+    with django_db_blocker.unblock():
+        seed()
+
+
+@pytest.fixture(autouse=True)
+def clear_cache():
+    yield
+    cache.clear()
+    tag_registry.invalidate()
+    ingredient_registry.invalidate()
+
+
+@pytest.fixture
+def user(db):
+    return User.objects.order_by('id').first()
+
+
+@pytest.fixture
+def anon_client(db):
+    return APIClient()
+
+
+@pytest.fixture
+def user_client(user):
+    client = APIClient()
+    client.force_authenticate(user)
+    return client
+
+
+@pytest.fixture
+def admin_client(db):
+    client = Client()
+    client.force_login(User.objects.create_superuser(
+        email='admin@foodgram.ru', username='admin', password=PASSWORD,
+        first_name='Админ', last_name='Админов'))
+    return client
+
+
+def percentile(timings, percent):
+    ordered = sorted(timings)
+    index = max(0, round(percent / 100 * len(ordered)) - 1)
+    return ordered[index] * 1000
+
+
+def load_baseline():
+    if BASELINE_FILE.exists():
+        with open(BASELINE_FILE, encoding='utf-8') as file:
+            return json.load(file)
+    return {}
+
+
+def check_regressions(name, result, baseline):
+    """Число запросов проверяется всегда, время - с BENCHMARK_CHECK_LATENCY.
+
+    Время зависит от машины и фоновой нагрузки, поэтому по умолчанию
+    только выводится в отчёте.
+    """
+    expected = baseline.get(name)
+    if expected is None:
+        return []
+    errors = []
+    if result['queries'] > expected['queries']:
+        errors.append(f'{name}: {result["queries"]} SQL queries, '
+                      f'baseline {expected["queries"]}')
+    if not CHECK_LATENCY:
+        return errors
+    for key, tolerance in (('p50_ms', LATENCY_TOLERANCE),
+                           ('p95_ms', TAIL_LATENCY_TOLERANCE)):
+        limit = expected[key] * tolerance + LATENCY_SLACK_MS
+        if result[key] > limit:
+            errors.append(f'{name}: {key} {result[key]:.2f}, '
+                          f'limit {limit:.2f}')
+    return errors
+
+
+@pytest.fixture(scope='session')
+def benchmark_results(pytestconfig):
+    results = pytestconfig.benchmark_results = {}
+    yield results
+    if UPDATE_BASELINE and results:
+        baseline = load_baseline()
+        baseline.update(results)
+        with open(BASELINE_FILE, 'w', encoding='utf-8') as file:
+            json.dump(dict(sorted(baseline.items())), file, indent=2)
+            file.write('\n')
+
+
+@pytest.fixture
+def benchmark(benchmark_results):
+    baseline = load_baseline()
+
+    def run(name, call, rounds=ROUNDS):
+        call()
+        with CaptureQueriesContext(connection) as queries:
+            call()
+        query_count = len(queries)
+        timings = []
+        for _ in range(rounds):
+            start = perf_counter()
+            call()
+            timings.append(perf_counter() - start)
+        result = {
+            'queries': query_count,
+            'p50_ms': round(percentile(timings, 50), 3),
+            'p95_ms': round(percentile(timings, 95), 3),
+            'p99_ms': round(percentile(timings, 99), 3),
+        }
+        benchmark_results[name] = result
+        if not UPDATE_BASELINE:
+            errors = check_regressions(name, result, baseline)
+            assert not errors, '\n'.join(errors)
+        return result
+
+    return run
+
+
+def wsgi_load(url, headers, timings, concurrency, total):
+    """Потоки с синхронным Client, как у worker'а gthread под WSGI."""
+    def worker(requests):
+        client = Client()
+        try:
+            for _ in range(requests):
+                start = perf_counter()
+                response = client.get(url, **headers)
+                timings.append(perf_counter() - start)
+                assert response.status_code == 200, url
+        finally:
+            connections.close_all()
+
+    with ThreadPoolExecutor(concurrency) as executor:
+        executor.submit(worker, 1).result()
+        timings.clear()
+        start = perf_counter()
+        list(executor.map(worker, [total // concurrency] * concurrency))
+        return perf_counter() - start
+
+
+def asgi_load(url, headers, timings, concurrency, total):
+    """Сопрограммы с AsyncClient в одном цикле событий, как под ASGI."""
+    client = AsyncClient()
+
+    async def worker(requests):
+        for _ in range(requests):
+            start = perf_counter()
+            response = await client.get(url, **headers)
+            timings.append(perf_counter() - start)
+            assert response.status_code == 200, url
+
+    async def load():
+        await worker(1)
+        timings.clear()
+        start = perf_counter()
+        await asyncio.gather(*(
+            worker(total // concurrency) for _ in range(concurrency)))
+        return perf_counter() - start
+
+    return async_to_sync(load)()
+
+
+@pytest.fixture
+def load_benchmark(benchmark_results, settings):
+    """Нагрузка из LOAD_CONCURRENCY одновременных клиентов.
+
+    В режиме wsgi клиенты - потоки с Client, в режиме asgi - сопрограммы
+    с AsyncClient и маршрутами ASGI_URLCONF. Каждый клиент отправляет
+    запросы друг за другом. Время ответа измеряется у клиента,
+    пропускная способность - по всей серии. Число запросов к базе
+    считается одним синхронным запросом.
+    """
+    baseline = load_baseline()
+
+    def run(name, url, mode, headers, concurrency=LOAD_CONCURRENCY,
+            total=LOAD_REQUESTS):
+        meta = {'HTTP_' + key.upper(): value
+                for key, value in headers.items()}
+        with CaptureQueriesContext(connection) as queries:
+            Client().get(url, **meta)
+        query_count = len(queries)
+        timings = []
+        if mode == 'asgi':
+            settings.ROOT_URLCONF = settings.ASGI_URLCONF
+            elapsed = asgi_load(url, headers, timings, concurrency, total)
+        else:
+            elapsed = wsgi_load(url, meta, timings, concurrency, total)
+        result = {
+            'queries': query_count,
+            'p50_ms': round(percentile(timings, 50), 3),
+            'p95_ms': round(percentile(timings, 95), 3),
+            'p99_ms': round(percentile(timings, 99), 3),
+            'rps': round(len(timings) / elapsed, 1),
+        }
+        benchmark_results[name] = result
+        if not UPDATE_BASELINE:
+            errors = check_regressions(name, result, baseline)
+            assert not errors, '\n'.join(errors)
+        return result
+
+    return run
+
+
+def pytest_terminal_summary(terminalreporter):
+    results = getattr(terminalreporter.config, 'benchmark_results', None)
+    if not results:
+        return
+    terminalreporter.section('benchmarks')
+    for name, result in sorted(results.items()):
+        terminalreporter.write_line(
+            f'{name:32} queries={result["queries"]:<4} '
+            f'p50={result["p50_ms"]:8.2f}ms '
+            f'p95={result["p95_ms"]:8.2f}ms '
+            f'p99={result["p99_ms"]:8.2f}ms'
+            + (f' rps={result["rps"]:.1f}' if 'rps' in result else ''))
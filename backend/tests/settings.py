@@ -0,0 +1,32 @@
+import tempfile
+
+from foodgram.settings import *  # noqa: F401,F403
+
+DATABASES = {
+    'default': {
+        'ENGINE': 'django.db.backends.sqlite3',
+        'NAME': ':memory:',
+    },
+    'replica': {
+        'ENGINE': 'django.db.backends.sqlite3',
+        'NAME': ':memory:',
+    },
+}
+
+DATABASE_REPLICAS = []
+
+SQL_INSTRUMENTATION_SAMPLE_RATE = 0
+
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    }
+}
+
+PASSWORD_HASHERS = ['django.contrib.auth.hashers.MD5PasswordHasher']
+
+DEBUG = False
+
+IMAGE_VARIANTS_BACKGROUND = False
+
+MEDIA_ROOT = tempfile.mkdtemp(prefix='foodgram-media-')
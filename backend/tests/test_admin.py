@@ -0,0 +1,19 @@
+from recipes.models import Ingredient, IngredientRecipe, Recipe
+
+
+def test_recipe_inline_is_paginated(admin_client):
+    recipe = Recipe.objects.first()
+    recipe.recipe_ingredients.all().delete()
+    IngredientRecipe.objects.bulk_create(
+        IngredientRecipe(recipe=recipe, ingredient=ingredient, amount=1)
+        for ingredient in Ingredient.objects.all()[:45])
+    url = f'/admin/recipes/recipe/{recipe.id}/change/'
+    response = admin_client.get(url)
+    assert response.status_code == 200
+    formset = response.context['inline_admin_formsets'][0].formset
+    assert formset.page.paginator.num_pages == 3
+    assert len(formset.initial_forms) == 20
+    response = admin_client.get(f'{url}?{formset.page_param}=3')
+    formset = response.context['inline_admin_formsets'][0].formset
+    assert len(formset.initial_forms) == 5
+    assert 'Страница 3 из 3' in response.content.decode()
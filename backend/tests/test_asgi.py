@@ -0,0 +1,117 @@
+import asyncio
+import re
+
+import pytest
+from asgiref.sync import async_to_sync
+from asgiref.testing import ApplicationCommunicator
+from django.http import HttpResponse
+from django.test import AsyncClient
+from django.urls import path, resolve
+from rest_framework.authtoken.models import Token
+
+from foodgram.asgi import AsyncReadHandler, application
+from recipes.models import Recipe
+
+
+async def probe(request):
+    return HttpResponse('asgi')
+
+
+urlpatterns = [path('probe/', probe)]
+
+
+@pytest.fixture
+def asgi_urls(settings):
+    settings.ROOT_URLCONF = settings.ASGI_URLCONF
+
+
+@pytest.fixture
+def auth_headers(user):
+    return {'authorization': f'Token {Token.objects.get(user=user).key}'}
+
+
+def get_many(urls, headers):
+    client = AsyncClient()
+
+    async def fetch():
+        return await asyncio.gather(*(
+            client.get(url, **headers) for url in urls))
+    return async_to_sync(fetch)()
+
+
+@pytest.mark.parametrize('url', [
+    '/api/recipes/', '/api/tags/', '/api/ingredients/?name=мол',
+    '/api/users/subscriptions/'])
+def test_read_routes_are_async(url):
+    match = resolve(url.split('?')[0], urlconf='foodgram.asgi_urls')
+    assert asyncio.iscoroutinefunction(match.func)
+    sync_match = resolve(url.split('?')[0])
+    assert match.url_name == sync_match.url_name
+
+
+def test_other_routes_stay_sync():
+    match = resolve('/api/users/me/', urlconf='foodgram.asgi_urls')
+    assert not asyncio.iscoroutinefunction(match.func)
+
+
+def asgi_get(url, query_string='', headers=None):
+    communicator = ApplicationCommunicator(application, {
+        'type': 'http', 'asgi': {'version': '3'}, 'http_version': '1.1',
+        'method': 'GET', 'scheme': 'http', 'path': url,
+        'query_string': query_string.encode(),
+        'headers': [(b'host', b'testserver')] + [
+            (key.encode(), value.encode())
+            for key, value in (headers or {}).items()],
+        'server': ('testserver', 80), 'client': ('127.0.0.1', 0),
+    })
+
+    async def request():
+        await communicator.send_input(
+            {'type': 'http.request', 'body': b'', 'more_body': False})
+        start = await communicator.receive_output(5)
+        body = b''
+        while True:
+            message = await communicator.receive_output(5)
+            body += message.get('body', b'')
+            if not message.get('more_body'):
+                break
+        await communicator.wait()
+        return start['status'], body
+    return async_to_sync(request)()
+
+
+def test_handler_uses_asgi_urlconf(db, settings):
+    assert isinstance(application, AsyncReadHandler)
+    settings.ASGI_URLCONF = __name__
+    assert asgi_get('/probe/') == (200, b'asgi')
+    settings.ASGI_URLCONF = settings.ROOT_URLCONF
+    assert asgi_get('/probe/')[0] == 404
+
+
+def test_async_reads_match_sync(asgi_urls, user_client, auth_headers):
+    recipe = Recipe.objects.order_by('id').first()
+    urls = ['/api/recipes/', f'/api/recipes/{recipe.id}/', '/api/tags/',
+            '/api/users/subscriptions/?recipes_limit=2']
+    responses = get_many(urls, auth_headers)
+    for url, response in zip(urls, responses):
+        assert response.status_code == 200, url
+        assert response.json() == user_client.get(url).json(), url
+
+
+def test_offloaded_queries_are_recorded(asgi_urls, auth_headers, settings):
+    settings.DEBUG = True
+    [response] = get_many(['/api/recipes/'], auth_headers)
+    assert response.status_code == 200
+    queries = re.search(r'"(\d+) queries"', response['Server-Timing'])
+    assert int(queries[1]) > 0
+
+
+@pytest.mark.parametrize('file_format', ['txt', 'csv'])
+def test_streamed_shopping_cart(user_client, auth_headers, file_format):
+    url = '/api/recipes/download_shopping_cart/'
+    status, body = asgi_get(url, f'format={file_format}', auth_headers)
+    assert status == 200
+    expected = b''.join(
+        user_client.get(url, {'format': file_format}).streaming_content)
+    assert body == expected
+    assert body.count(b'\n') > 10
@@ -0,0 +1,227 @@
+from http import HTTPStatus
+from urllib.parse import urlsplit
+
+import pytest
+from django.db.utils import ConnectionHandler
+from rest_framework.authtoken.models import Token
+
+from core.db.pool import pools
+from recipes.models import IngredientRecipe, Recipe, Tag
+from users.models import User
+
+from .conftest import PASSWORD
+
+
+def call(client, method, url, status=HTTPStatus.OK, **kwargs):
+    def send():
+        response = getattr(client, method)(url, **kwargs)
+        assert response.status_code == status, (
+            f'{method.upper()} {url}: {response.status_code}')
+        if response.streaming:
+            b''.join(response.streaming_content)
+        return response
+    return send
+
+
+def toggle(client, url):
+    create = call(client, 'post', url, HTTPStatus.CREATED)
+    delete = call(client, 'delete', url, HTTPStatus.NO_CONTENT)
+
+    def send():
+        create()
+        delete()
+    return send
+
+
+@pytest.fixture
+def recipe(user):
+    return Recipe.objects.exclude(favorite__user=user).exclude(
+        shopping_cart__user=user).order_by('id').last()
+
+
+@pytest.fixture
+def author(user):
+    return User.objects.exclude(following__user=user).exclude(
+        pk=user.pk).first()
+
+
+@pytest.mark.parametrize('name, url', [
+    ('recipes_list', '/api/recipes/'),
+    ('recipes_list_page', '/api/recipes/?page=5&limit=12'),
+])
+def test_recipes_list_anonymous(benchmark, anon_client, name, url):
+    benchmark(name, call(anon_client, 'get', url))
+
+
+@pytest.mark.parametrize('name, url', [
+    ('recipes_list_auth', '/api/recipes/'),
+    ('recipes_list_favorited', '/api/recipes/?is_favorited=1'),
+    ('recipes_list_in_cart', '/api/recipes/?is_in_shopping_cart=1'),
+])
+def test_recipes_list(benchmark, user_client, name, url):
+    benchmark(name, call(user_client, 'get', url))
+
+
+def test_recipes_list_instrumented(benchmark, user_client, settings):
+    settings.SQL_INSTRUMENTATION_SAMPLE_RATE = 1
+    benchmark('recipes_list_auth_instrumented',
+              call(user_client, 'get', '/api/recipes/'))
+
+
+def test_recipes_list_cursor(benchmark, user_client):
+    url = '/api/recipes/?cursor=&limit=6'
+    for _ in range(50):
+        next_url = user_client.get(url).data['next']
+        url = '{0.path}?{0.query}'.format(urlsplit(next_url))
+    benchmark('recipes_list_cursor_deep', call(user_client, 'get', url))
+
+
+def test_recipes_list_deep_page(benchmark, user_client):
+    benchmark('recipes_list_deep_page',
+              call(user_client, 'get', '/api/recipes/?page=51&limit=6'))
+
+
+def test_recipes_list_tags(benchmark, user_client):
+    slugs = Tag.objects.values_list('slug', flat=True)[:2]
+    url = '/api/recipes/?' + '&'.join(f'tags={slug}' for slug in slugs)
+    benchmark('recipes_list_tags', call(user_client, 'get', url))
+
+
+@pytest.mark.parametrize('name, url', [
+    ('recipes_search', '/api/recipes/?search=мол'),
+    ('recipes_search_words', '/api/recipes/?search=запечь мука'),
+])
+def test_recipes_search(benchmark, user_client, name, url):
+    benchmark(name, call(user_client, 'get', url))
+
+
+def test_recipes_cook(benchmark, user_client):
+    ingredient_ids = IngredientRecipe.objects.order_by(
+        'ingredient_id').values_list('ingredient_id', flat=True).distinct()
+    url = '/api/recipes/cook/?ingredients=' + ','.join(
+        map(str, ingredient_ids[:40]))
+    benchmark('recipes_cook', call(user_client, 'get', url))
+
+
+def test_recipes_list_author(benchmark, user_client, author):
+    benchmark('recipes_list_author',
+              call(user_client, 'get', f'/api/recipes/?author={author.id}'))
+
+
+def test_recipe_detail(benchmark, user_client, recipe):
+    benchmark('recipe_detail',
+              call(user_client, 'get', f'/api/recipes/{recipe.id}/'))
+
+
+def test_recipe_detail_anonymous(benchmark, anon_client, recipe):
+    benchmark('recipe_detail_anonymous',
+              call(anon_client, 'get', f'/api/recipes/{recipe.id}/'))
+
+
+def test_tags_list(benchmark, anon_client):
+    benchmark('tags_list', call(anon_client, 'get', '/api/tags/'))
+
+
+@pytest.mark.parametrize('name, url', [
+    ('ingredients_search', '/api/ingredients/?name=мол'),
+    ('ingredients_list', '/api/ingredients/'),
+])
+def test_ingredients(benchmark, anon_client, name, url):
+    benchmark(name, call(anon_client, 'get', url))
+
+
+def test_users_list(benchmark, user_client):
+    benchmark('users_list', call(user_client, 'get', '/api/users/'))
+
+
+def test_token_login(benchmark, anon_client, user):
+    benchmark('token_login', call(
+        anon_client, 'post', '/api/auth/token/login/',
+        data={'email': user.email, 'password': PASSWORD}))
+
+
+def test_users_me(benchmark, user_client):
+    benchmark('users_me', call(user_client, 'get', '/api/users/me/'))
+
+
+def test_subscriptions(benchmark, user_client):
+    benchmark('subscriptions', call(
+        user_client, 'get', '/api/users/subscriptions/?recipes_limit=3'))
+
+
+def test_subscribe_toggle(benchmark, user_client, author):
+    benchmark('subscribe_toggle',
+              toggle(user_client, f'/api/users/{author.id}/subscribe/'))
+
+
+@pytest.mark.parametrize('name, url', [
+    ('admin_recipes', '/admin/recipes/recipe/'),
+    ('admin_favorites', '/admin/recipes/favorite/'),
+    ('admin_shopping_carts', '/admin/recipes/shoppingcart/'),
+    ('admin_recipe_ingredients', '/admin/recipes/ingredientrecipe/'),
+    ('admin_ingredients', '/admin/recipes/ingredient/'),
+    ('admin_users', '/admin/users/user/'),
+    ('admin_follows', '/admin/users/follow/'),
+])
+def test_admin_changelists(benchmark, admin_client, name, url):
+    benchmark(name, call(admin_client, 'get', url), rounds=5)
+
+
+def test_admin_recipe_change(benchmark, admin_client, recipe):
+    benchmark('admin_recipe_change', call(
+        admin_client, 'get', f'/admin/recipes/recipe/{recipe.id}/change/'),
+        rounds=5)
+
+
+@pytest.mark.parametrize('name, url', [
+    ('download_shopping_cart', '/api/recipes/download_shopping_cart/'),
+    ('download_shopping_cart_csv',
+     '/api/recipes/download_shopping_cart/?format=csv'),
+])
+def test_download_shopping_cart(benchmark, user_client, name, url):
+    benchmark(name, call(user_client, 'get', url))
+
+
+def test_favorite_toggle(benchmark, user_client, recipe):
+    benchmark('favorite_toggle',
+              toggle(user_client, f'/api/recipes/{recipe.id}/favorite/'))
+
+
+def test_shopping_cart_toggle(benchmark, user_client, recipe):
+    benchmark('shopping_cart_toggle',
+              toggle(user_client, f'/api/recipes/{recipe.id}/shopping_cart/'))
+
+
+@pytest.fixture
+def token_headers(user):
+    return {'authorization': f'Token {Token.objects.get(user=user).key}'}
+
+
+@pytest.mark.parametrize('mode', ['wsgi', 'asgi'])
+@pytest.mark.parametrize('name, url', [
+    ('recipes_list', '/api/recipes/'),
+    ('subscriptions', '/api/users/subscriptions/'),
+])
+def test_concurrent_reads(load_benchmark, token_headers, mode, name, url):
+    load_benchmark(f'{name}_load_{mode}', url, mode, token_headers)
+
+
+@pytest.mark.parametrize('name, engine', [
+    ('connection_cycle', 'django.db.backends.sqlite3'),
+    ('connection_cycle_pooled', 'core.db.backends.sqlite3'),
+])
+def test_connection_cycle(benchmark, tmp_path, django_db_blocker, name,
+                          engine):
+    connection = ConnectionHandler({'default': {
+        'ENGINE': engine, 'NAME': str(tmp_path / 'cycle.sqlite3')}})[
+        'default']
+
+    def request_cycle():
+        with connection.cursor() as cursor:
+            cursor.execute('SELECT 1')
+        connection.close()
+
+    with django_db_blocker.unblock():
+        benchmark(name, request_cycle, rounds=200)
+    if engine.startswith('core.'):
+        pools.pop('default').close_idle()
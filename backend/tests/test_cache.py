@@ -0,0 +1,88 @@
+import pytest
+
+from core.cache import get_stats
+from core.constants import RECIPES_CACHE_NAMESPACE
+from recipes.models import Recipe, Tag
+
+
+@pytest.fixture
+def recipe(db):
+    return Recipe.objects.select_related('author').order_by('id').first()
+
+
+@pytest.fixture
+def on_commit(django_capture_on_commit_callbacks):
+    return lambda: django_capture_on_commit_callbacks(execute=True)
+
+
+def get(client, url):
+    response = client.get(url)
+    assert response.status_code == 200
+    return response
+
+
+def test_anonymous_list_is_cached(anon_client, user_client):
+    before = get_stats(RECIPES_CACHE_NAMESPACE)
+    assert get(anon_client, '/api/recipes/?limit=3&page=2')['X-Cache'] == (
+        'MISS')
+    assert get(anon_client, '/api/recipes/?page=2&limit=3')['X-Cache'] == (
+        'HIT')
+    assert 'X-Cache' not in get(user_client, '/api/recipes/')
+    assert 'X-Cache' not in get(anon_client, '/api/recipes/?unknown=1')
+    after = get_stats(RECIPES_CACHE_NAMESPACE)
+    assert after['hits'] - before['hits'] == 1
+    assert after['misses'] - before['misses'] == 1
+
+
+def test_recipe_change_invalidates_cache(anon_client, recipe, on_commit):
+    url = f'/api/recipes/{recipe.id}/'
+    get(anon_client, url)
+    get(anon_client, '/api/recipes/')
+    with on_commit():
+        recipe.name = 'Новое название'
+        recipe.save()
+    response = get(anon_client, url)
+    assert response['X-Cache'] == 'MISS'
+    assert response.data['name'] == 'Новое название'
+    assert get(anon_client, '/api/recipes/')['X-Cache'] == 'MISS'
+
+
+def test_favorite_invalidates_only_detail(anon_client, user_client,
+                                          recipe, on_commit):
+    url = f'/api/recipes/{recipe.id}/'
+    favorites = get(anon_client, url).data['favorites_count']
+    assert get(anon_client, url)['X-Cache'] == 'HIT'
+    get(anon_client, '/api/recipes/')
+    with on_commit():
+        user_client.post(f'{url}favorite/')
+    assert get(anon_client, '/api/recipes/')['X-Cache'] == 'HIT'
+    response = get(anon_client, url)
+    assert response['X-Cache'] == 'MISS'
+    assert response.data['favorites_count'] == favorites + 1
+    with on_commit():
+        user_client.delete(f'{url}favorite/')
+    assert get(anon_client, url).data['favorites_count'] == favorites
+
+
+def test_tags_change_invalidates_cache(anon_client, recipe, on_commit):
+    url = f'/api/recipes/{recipe.id}/'
+    get(anon_client, url)
+    tag = Tag.objects.exclude(recipe=recipe).first()
+    with on_commit():
+        recipe.tags.add(tag)
+    response = get(anon_client, url)
+    assert response['X-Cache'] == 'MISS'
+    assert tag.id in [item['id'] for item in response.data['tags']]
+
+
+def test_author_change_invalidates_cache(anon_client, recipe, on_commit):
+    url = f'/api/recipes/{recipe.id}/'
+    get(anon_client, url)
+    with on_commit():
+        recipe.author.first_name = 'Другое'
+        recipe.author.save()
+    response = get(anon_client, url)
+    assert response.data['author']['first_name'] == 'Другое'
+    with on_commit():
+        recipe.author.save(update_fields=['last_login'])
+    assert get(anon_client, url)['X-Cache'] == 'HIT'
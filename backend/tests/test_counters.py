@@ -0,0 +1,74 @@
+from io import StringIO
+
+import pytest
+from django.core.management import CommandError, call_command
+
+from recipes.models import Recipe
+from users.models import User
+
+
+@pytest.fixture
+def recipe(user):
+    return Recipe.objects.exclude(favorite__user=user).exclude(
+        shopping_cart__user=user).exclude(author=user).first()
+
+
+def test_seeded_counters_are_consistent(db):
+    call_command('repair_counters', check=True, stdout=StringIO())
+
+
+def test_favorite_and_cart_counters(user_client, recipe):
+    url = f'/api/recipes/{recipe.id}/'
+    for action, field in (('favorite', 'favorites_count'),
+                          ('shopping_cart', 'shopping_cart_count')):
+        before = getattr(recipe, field)
+        user_client.post(f'{url}{action}/')
+        recipe.refresh_from_db()
+        assert getattr(recipe, field) == before + 1
+        user_client.delete(f'{url}{action}/')
+        recipe.refresh_from_db()
+        assert getattr(recipe, field) == before
+
+
+@pytest.mark.parametrize('cursor', ['', '&cursor='])
+def test_ordering_by_favorites_count(anon_client, user_client, recipe,
+                                     cursor):
+    user_client.post(f'/api/recipes/{recipe.id}/favorite/')
+    counts = []
+    url = f'/api/recipes/?ordering=-favorites_count&limit=2{cursor}'
+    while url:
+        data = anon_client.get(url).data
+        counts += [item['favorites_count'] for item in data['results']]
+        url = data['next']
+    assert len(counts) == Recipe.objects.count()
+    assert counts == sorted(counts, reverse=True)
+    assert counts[0] >= 1
+
+
+def test_follow_and_recipe_counters(user, recipe):
+    author = recipe.author
+    user.follower.create(author=author)
+    author.refresh_from_db()
+    assert author.followers_count == author.following.count()
+    recipe.delete()
+    author.refresh_from_db()
+    assert author.recipes_count == author.recipe.count()
+
+
+def test_save_keeps_counters(recipe):
+    stale = Recipe.objects.get(pk=recipe.pk)
+    Recipe.objects.filter(pk=recipe.pk).update(favorites_count=100)
+    stale.name = 'Новое название'
+    stale.save()
+    recipe.refresh_from_db()
+    assert recipe.favorites_count == 100
+    assert recipe.name == 'Новое название'
+
+
+def test_repair_counters(user):
+    User.objects.filter(pk=user.pk).update(followers_count=99)
+    with pytest.raises(CommandError):
+        call_command('repair_counters', check=True, stdout=StringIO())
+    call_command('repair_counters', stdout=StringIO())
+    user.refresh_from_db()
+    assert user.followers_count == user.following.count()
@@ -0,0 +1,100 @@
+import json
+import re
+from io import StringIO
+
+import pytest
+from django.core.management import CommandError, call_command
+
+from recipes.models import Ingredient, Tag
+from recipes.registry import ReferenceRegistry, ingredient_registry
+
+SUMMARY = re.compile(
+    r'(?P<file>\S+): (?P<created>\d+) created, (?P<skipped>\d+) skipped '
+    r'\((?P<duplicates>\d+) duplicates in file\)')
+
+
+def load(**paths):
+    out = StringIO()
+    call_command('csv_in_db', stdout=out, **paths)
+    return {match['file']: (int(match['created']), int(match['skipped']),
+                            int(match['duplicates']))
+            for match in SUMMARY.finditer(out.getvalue())}
+
+
+@pytest.fixture
+def files(tmp_path):
+    ingredients = tmp_path / 'ingredients.csv'
+    ingredients.write_text(
+        'соль,г\n'
+        'тестовый ингредиент,г\n'
+        'тестовый ингредиент,г\n'
+        '  другой ингредиент , шт \n'
+        '\n', encoding='utf-8')
+    tags = tmp_path / 'tags.csv'
+    tags.write_text('Тестовый,#123456,test-tag\n', encoding='utf-8')
+    return {'ingredients': ingredients, 'tags': tags}
+
+
+def test_reload_seeded_files_creates_nothing(db):
+    ingredients = Ingredient.objects.count()
+    tags = Tag.objects.count()
+    summary = load()
+    assert summary['ingredients.csv'] == (0, ingredients, 0)
+    assert summary['tags.csv'] == (0, tags, 0)
+    assert Ingredient.objects.count() == ingredients
+    assert Tag.objects.count() == tags
+
+
+def test_load_csv(db, files):
+    Ingredient.objects.get_or_create(name='соль', measurement_unit='г')
+    ingredients = Ingredient.objects.count()
+    ingredient_registry.all()
+    summary = load(**files)
+    assert summary['ingredients.csv'] == (2, 2, 1)
+    assert summary['tags.csv'] == (1, 0, 0)
+    assert Ingredient.objects.count() == ingredients + 2
+    assert Ingredient.objects.filter(
+        name='другой ингредиент', measurement_unit='шт').exists()
+    assert Tag.objects.filter(slug='test-tag', color='#123456').exists()
+    assert any(ingredient.name == 'тестовый ингредиент'
+               for ingredient in ingredient_registry.all().values())
+    summary = load(**files)
+    assert summary['ingredients.csv'] == (0, 4, 1)
+    assert summary['tags.csv'] == (0, 1, 0)
+    assert Ingredient.objects.count() == ingredients + 2
+
+
+def test_load_visible_to_other_processes(
+        db, files, settings, tmp_path, monkeypatch):
+    settings.CACHES = {'default': {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': str(tmp_path / 'cache'),
+    }}
+    monkeypatch.setattr('recipes.registry.VERSION_CHECK_INTERVAL', 0)
+    worker_registry = ReferenceRegistry(Ingredient)
+    assert not any(ingredient.name == 'тестовый ингредиент'
+                   for ingredient in worker_registry.all().values())
+    load(**files)
+    assert worker_registry.items is not None
+    assert any(ingredient.name == 'тестовый ингредиент'
+               for ingredient in worker_registry.all().values())
+
+
+def test_load_json(db, files, tmp_path):
+    path = tmp_path / 'ingredients.json'
+    path.write_text(json.dumps([
+        {'name': 'ингредиент из json', 'measurement_unit': 'мл'},
+        {'name': 'ингредиент из json', 'measurement_unit': 'мл'},
+    ], ensure_ascii=False), encoding='utf-8')
+    summary = load(ingredients=path, tags=files['tags'])
+    assert summary['ingredients.json'] == (1, 1, 1)
+    assert Ingredient.objects.filter(name='ингредиент из json').count() == 1
+    assert load(ingredients=path, tags=files['tags'])[
+        'ingredients.json'] == (0, 2, 1)
+
+
+def test_invalid_file(db, files, tmp_path):
+    path = tmp_path / 'broken.json'
+    path.write_text('[{"name": "без единицы"}]', encoding='utf-8')
+    with pytest.raises(CommandError):
+        load(ingredients=path, tags=files['tags'])
@@ -0,0 +1,65 @@
+from rest_framework import serializers
+
+from api.serializers import ReadRecipeSerialzer, WriteRecipeSerialzer
+from core.eager_loading import get_loading_plan
+from core.mixins import EagerLoadingMixin
+from recipes.models import IngredientRecipe, Recipe
+from users.models import Follow, User
+from users.serializers import FollowUserSerializer, UserSerializer
+
+
+class IngredientNameSerializer(serializers.ModelSerializer):
+    name = serializers.CharField(source='ingredient.name')
+
+    class Meta:
+        model = IngredientRecipe
+        fields = ('name', 'amount')
+
+
+class NestedRecipeSerializer(serializers.ModelSerializer):
+    ingredients = IngredientNameSerializer(
+        many=True, source='recipe_ingredients')
+    author_email = serializers.EmailField(source='author.email')
+
+    class Meta:
+        model = Recipe
+        fields = ('ingredients', 'author_email')
+
+
+class FollowAuthorSerializer(serializers.ModelSerializer):
+    author = UserSerializer()
+    recipes = NestedRecipeSerializer(many=True, source='author.recipe')
+
+    class Meta:
+        model = Follow
+        fields = ('user', 'author', 'recipes')
+
+
+def test_read_recipe_plan():
+    plan = get_loading_plan(Recipe, ReadRecipeSerialzer())
+    assert plan.select == {'author'}
+    assert list(plan.prefetch) == ['recipe_ingredients']
+    model, child = plan.prefetch['recipe_ingredients']
+    assert model is IngredientRecipe
+    assert not child.select and not child.prefetch
+
+
+def test_write_recipe_plan_skips_write_only_fields():
+    plan = get_loading_plan(Recipe, WriteRecipeSerialzer())
+    assert not plan.select
+    assert list(plan.prefetch) == ['tags']
+
+
+def test_dotted_sources_and_nested_prefetch():
+    plan = get_loading_plan(Follow, FollowAuthorSerializer())
+    assert plan.select == {'author'}
+    assert list(plan.prefetch) == ['author__recipe']
+    _, recipes = plan.prefetch['author__recipe']
+    assert recipes.select == {'author'}
+    _, ingredients = recipes.prefetch['recipe_ingredients']
+    assert ingredients.select == {'ingredient'}
+
+
+def test_subscriptions_use_loading_plan(user_client):
+    assert user_client.get('/api/users/subscriptions/').status_code == 200
+    assert (User, FollowUserSerializer) in EagerLoadingMixin.loading_plans
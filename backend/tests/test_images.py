@@ -0,0 +1,119 @@
+from io import BytesIO, StringIO
+
+import pytest
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.core.management import call_command
+from PIL import Image, features
+
+from core.constants import IMAGE_SIZES
+from recipes.images import generate_image_variants, image_urls
+from recipes.models import Recipe
+
+requires_webp = pytest.mark.skipif(
+    not features.check('webp'), reason='Pillow собран без WebP')
+
+
+@pytest.fixture(autouse=True)
+def media_root(settings, tmp_path):
+    settings.MEDIA_ROOT = str(tmp_path)
+
+
+@pytest.fixture
+def on_commit(django_capture_on_commit_callbacks):
+    return lambda: django_capture_on_commit_callbacks(execute=True)
+
+
+def save_image(name, size=(2000, 1500)):
+    buffer = BytesIO()
+    Image.new('RGB', size, 'orange').save(buffer, 'PNG')
+    return default_storage.save(
+        f'static/images/{name}', ContentFile(buffer.getvalue()))
+
+
+@requires_webp
+def test_generate_variants(db):
+    recipe = Recipe.objects.order_by('id').first()
+    Recipe.objects.filter(pk=recipe.pk).update(image=save_image('big.png'))
+    assert generate_image_variants([recipe.pk]) == 1
+    variants = Recipe.objects.get(pk=recipe.pk).image_variants
+    for size, width in IMAGE_SIZES.items():
+        with default_storage.open(variants[size]['webp']) as file:
+            image = Image.open(file)
+            assert image.format == 'WEBP'
+            assert max(image.size) == width
+        with default_storage.open(variants[size]['jpeg']) as file:
+            assert Image.open(file).format == 'JPEG'
+    assert generate_image_variants([recipe.pk]) == 0
+
+
+def test_variants_without_webp_support(db, monkeypatch):
+    monkeypatch.setattr('recipes.images.VARIANT_FORMATS', {'jpeg': 'JPEG'})
+    recipe = Recipe.objects.order_by('id').first()
+    Recipe.objects.filter(pk=recipe.pk).update(image=save_image('jpeg.png'))
+    assert generate_image_variants([recipe.pk]) == 1
+    recipe.refresh_from_db()
+    assert set(recipe.image_variants['small']) == {'jpeg'}
+    urls = image_urls(recipe)
+    assert urls['small']['webp'] == urls['original']
+    assert urls['small']['jpeg'] != urls['original']
+
+
+def test_small_image_is_not_upscaled(db):
+    recipe = Recipe.objects.order_by('id').first()
+    Recipe.objects.filter(pk=recipe.pk).update(
+        image=save_image('tiny.png', (100, 80)))
+    generate_image_variants([recipe.pk])
+    variants = Recipe.objects.get(pk=recipe.pk).image_variants
+    with default_storage.open(variants['large']['jpeg']) as file:
+        assert Image.open(file).size == (100, 80)
+
+
+def test_new_image_gets_new_variants(db, on_commit):
+    recipe = Recipe.objects.order_by('id').first()
+    with on_commit():
+        recipe.image = save_image('first.png')
+        recipe.save()
+    recipe.refresh_from_db()
+    old = recipe.image_variants['small']['jpeg']
+    assert default_storage.exists(old)
+    with on_commit():
+        recipe.image = save_image('second.png')
+        recipe.save()
+    recipe.refresh_from_db()
+    assert recipe.image_variants['source'] == recipe.image.name
+    assert recipe.image_variants['small']['jpeg'] != old
+
+
+@requires_webp
+def test_list_uses_small_variant(anon_client, on_commit):
+    recipe = Recipe.objects.order_by('-pub_date', '-id').first()
+    with on_commit():
+        recipe.image = save_image('list.png')
+        recipe.save()
+    recipe.refresh_from_db()
+    small = default_storage.url(recipe.image_variants['small']['jpeg'])
+    data = anon_client.get('/api/recipes/').data['results'][0]
+    assert data['image'].endswith(small)
+    assert data['images']['medium']['webp'].endswith(
+        default_storage.url(recipe.image_variants['medium']['webp']))
+    data = anon_client.get(f'/api/recipes/{recipe.pk}/').data
+    assert data['image'].endswith(recipe.image.url)
+
+
+def test_broken_image_falls_back_to_original(anon_client):
+    recipe = Recipe.objects.order_by('id').first()
+    assert generate_image_variants([recipe.pk]) == 1
+    recipe.refresh_from_db()
+    assert recipe.image_variants == {'source': recipe.image.name}
+    data = anon_client.get(f'/api/recipes/{recipe.pk}/').data
+    assert data['images']['small']['webp'] == data['images']['original']
+
+
+def test_backfill_command(db):
+    recipe = Recipe.objects.order_by('id').first()
+    Recipe.objects.filter(pk=recipe.pk).update(image=save_image('old.png'))
+    out = StringIO()
+    call_command('build_image_variants', '--batch-size', 50, stdout=out)
+    assert f'of {Recipe.objects.count()} recipe images' in out.getvalue()
+    assert 'small' in Recipe.objects.get(pk=recipe.pk).image_variants
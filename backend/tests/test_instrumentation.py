@@ -0,0 +1,102 @@
+import json
+import logging
+
+import pytest
+from django.http import HttpResponse
+from django.test import RequestFactory
+from rest_framework.test import APIClient
+
+from core.db.instrumentation import (QueryInstrumentationMiddleware,
+                                     fingerprint)
+from recipes.models import Recipe
+from users.models import User
+
+URL = '/api/recipes/'
+
+
+@pytest.fixture
+def staff_client(db):
+    client = APIClient()
+    client.force_authenticate(User.objects.create_user(
+        email='staff@foodgram.ru', username='staff', password='password',
+        is_staff=True))
+    return client
+
+
+@pytest.fixture
+def sample_all(settings):
+    settings.SQL_INSTRUMENTATION_SAMPLE_RATE = 1
+
+
+def slow_requests(caplog):
+    return [json.loads(record.message) for record in caplog.records
+            if record.name == 'core.db.instrumentation']
+
+
+def test_fingerprint():
+    assert fingerprint(
+        'SELECT "id" FROM "t" WHERE "id" IN (%s, %s, %s) AND "x" = 10 '
+        "AND  \"name\" = 'it''s' LIMIT 21"
+    ) == 'SELECT "id" FROM "t" WHERE "id" IN (...) AND "x" = ? ' \
+         'AND "name" = ? LIMIT ?'
+    assert fingerprint('SELECT 1 FROM "t" WHERE "id" IN (%s)') == \
+        fingerprint('SELECT 1 FROM "t" WHERE "id" IN (%s, %s)')
+
+
+def test_server_timing_for_staff(staff_client, sample_all):
+    response = staff_client.get(URL)
+    assert response.status_code == 200
+    metrics = response['Server-Timing'].split(', ')
+    assert metrics[0].startswith('app;dur=')
+    assert metrics[1].startswith('db;dur=')
+    assert 'queries"' in metrics[1]
+
+
+def test_no_server_timing_for_users(user_client, sample_all):
+    assert 'Server-Timing' not in user_client.get(URL)
+
+
+def test_sampling(staff_client, settings):
+    settings.SQL_INSTRUMENTATION_SAMPLE_RATE = 0
+    assert 'Server-Timing' not in staff_client.get(URL)
+    assert 'Server-Timing' in staff_client.get(URL, HTTP_X_SERVER_TIMING='1')
+
+
+def test_slow_request_log(user_client, user, sample_all, settings, caplog):
+    settings.SLOW_REQUEST_MS = 0
+    with caplog.at_level(logging.WARNING):
+        user_client.get(URL)
+    [entry] = slow_requests(caplog)
+    assert entry['event'] == 'slow_request'
+    assert entry['path'] == URL
+    assert entry['status'] == 200
+    assert entry['user'] == user.pk
+    assert entry['queries'] > 0
+    assert entry['repeated'] == []
+
+
+def test_fast_request_not_logged(user_client, sample_all, caplog):
+    with caplog.at_level(logging.WARNING):
+        user_client.get(URL)
+    assert slow_requests(caplog) == []
+
+
+def test_repeated_queries(db, sample_all, settings, caplog):
+    settings.DEBUG = True
+    settings.REPEATED_QUERY_THRESHOLD = 5
+    ids = list(Recipe.objects.values_list('id', flat=True)[:12])
+
+    def view(request):
+        for recipe_id in ids:
+            Recipe.objects.filter(id=recipe_id).exists()
+        return HttpResponse()
+
+    with caplog.at_level(logging.WARNING):
+        response = QueryInstrumentationMiddleware(view)(
+            RequestFactory().get(URL))
+    [entry] = slow_requests(caplog)
+    [repeated] = entry['repeated']
+    assert repeated['count'] == len(ids)
+    assert 'FROM "recipes_recipe"' in repeated['sql']
+    assert 'sql;dur=' in response['Server-Timing']
+    assert f'desc="{len(ids)}x SELECT' in response['Server-Timing']
@@ -0,0 +1,80 @@
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+from prometheus_client import REGISTRY
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+WORKER_SCRIPT = '''
+import django
+django.setup()
+from core.metrics import REQUEST_DURATION
+REQUEST_DURATION.labels('TagViewSet.list', 'GET', 200).observe(0.01)
+'''
+
+
+def sample(name, **labels):
+    return REGISTRY.get_sample_value(name, labels) or 0
+
+
+@pytest.mark.parametrize('client_name, url, view', [
+    ('user_client', '/api/recipes/download_shopping_cart/',
+     'RecipeViewSet.download_shopping_cart'),
+    ('anon_client', '/api/tags/', 'TagViewSet.list'),
+    ('admin_client', '/admin/recipes/recipe/',
+     'admin:recipes_recipe_changelist'),
+])
+def test_view_metrics(request, client_name, url, view):
+    client = request.getfixturevalue(client_name)
+    count = sample('foodgram_request_duration_seconds_count',
+                   view=view, method='GET', status='200')
+    size = sample('foodgram_response_size_bytes_sum', view=view)
+    queries = sample('foodgram_db_queries_count', view=view)
+    response = client.get(url)
+    assert response.status_code == 200
+    if response.streaming:
+        b''.join(response.streaming_content)
+    assert sample('foodgram_request_duration_seconds_count',
+                  view=view, method='GET', status='200') == count + 1
+    assert sample('foodgram_response_size_bytes_sum', view=view) > size
+    assert sample('foodgram_db_queries_count', view=view) == queries + 1
+
+
+def test_cache_lookups(anon_client):
+    labels = {'namespace': 'recipes'}
+    misses = sample('foodgram_response_cache_lookups_total',
+                    result='miss', **labels)
+    hits = sample('foodgram_response_cache_lookups_total',
+                  result='hit', **labels)
+    anon_client.get('/api/recipes/')
+    anon_client.get('/api/recipes/')
+    assert sample('foodgram_response_cache_lookups_total',
+                  result='miss', **labels) == misses + 1
+    assert sample('foodgram_response_cache_lookups_total',
+                  result='hit', **labels) == hits + 1
+
+
+def test_metrics_endpoint(anon_client):
+    anon_client.get('/api/tags/')
+    response = anon_client.get('/metrics')
+    assert response.status_code == 200
+    assert response['Content-Type'].startswith('text/plain')
+    assert (b'foodgram_request_duration_seconds_bucket{'
+            b'le="0.005",method="GET",status="200",view="TagViewSet.list"}'
+            in response.content)
+
+
+def test_metrics_are_aggregated_across_processes(
+        anon_client, tmp_path, monkeypatch):
+    env = {**os.environ, 'PROMETHEUS_MULTIPROC_DIR': str(tmp_path),
+           'DJANGO_SETTINGS_MODULE': 'tests.settings'}
+    for _ in range(2):
+        subprocess.run([sys.executable, '-c', WORKER_SCRIPT], env=env,
+                       cwd=BACKEND_DIR, check=True)
+    monkeypatch.setenv('PROMETHEUS_MULTIPROC_DIR', str(tmp_path))
+    response = anon_client.get('/metrics')
+    assert (b'foodgram_request_duration_seconds_count{'
+            b'method="GET",status="200",view="TagViewSet.list"} 2.0'
+            in response.content)
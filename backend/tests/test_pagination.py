@@ -0,0 +1,54 @@
+from urllib.parse import urlsplit
+
+import pytest
+
+from recipes.models import Recipe
+from users.models import Follow
+
+
+def follow(client, url, key='next'):
+    pages = []
+    while url:
+        response = client.get(url)
+        assert response.status_code == 200
+        assert 'count' not in response.data
+        pages.append([item['id'] for item in response.data['results']])
+        link = response.data[key]
+        url = link and '{0.path}?{0.query}'.format(urlsplit(link))
+    return pages
+
+
+@pytest.fixture
+def last_page_url(user_client):
+    url = '/api/recipes/?cursor=&limit=50'
+    while True:
+        response = user_client.get(url)
+        if not response.data['next']:
+            return url
+        url = '{0.path}?{0.query}'.format(urlsplit(response.data['next']))
+
+
+def test_recipes_cursor_walks_whole_feed(user_client):
+    pages = follow(user_client, '/api/recipes/?cursor=&limit=7')
+    expected = list(Recipe.objects.order_by(
+        '-pub_date', '-id').values_list('id', flat=True))
+    assert sum(pages, []) == expected
+    assert all(len(page) == 7 for page in pages[:-1])
+
+
+def test_recipes_cursor_walks_back(user_client, last_page_url):
+    pages = follow(user_client, last_page_url, key='previous')
+    expected = list(Recipe.objects.order_by(
+        '-pub_date', '-id').values_list('id', flat=True))
+    assert sum(reversed(pages), []) == expected
+
+
+def test_subscriptions_cursor(user_client, user):
+    pages = follow(user_client, '/api/users/subscriptions/?cursor=&limit=4')
+    expected = list(Follow.objects.filter(user=user).order_by(
+        '-id').values_list('author_id', flat=True))
+    assert sum(pages, []) == expected
+
+
+def test_invalid_cursor(anon_client):
+    assert anon_client.get('/api/recipes/?cursor=abc').status_code == 404
@@ -0,0 +1,102 @@
+import threading
+
+import pytest
+from django.db.utils import ConnectionHandler
+
+from core.db import pool as pool_module
+from core.db.pool import PoolTimeout, pool_stats
+
+
+def reset_pools():
+    for pool in pool_module.pools.values():
+        pool.close_idle()
+    pool_module.pools.clear()
+
+
+@pytest.fixture
+def make_connections(tmp_path, django_db_blocker):
+    reset_pools()
+    handlers = []
+
+    def make(**options):
+        handler = ConnectionHandler({'default': {
+            'ENGINE': 'core.db.backends.sqlite3',
+            'NAME': str(tmp_path / 'pool.sqlite3'),
+            'POOL': {'MAX_SIZE': 2, 'TIMEOUT': 0.2, **options},
+        }})
+        handlers.append(handler)
+        return handler
+    with django_db_blocker.unblock():
+        yield make
+    for handler in handlers:
+        handler.close_all()
+    reset_pools()
+
+
+def query(connection):
+    with connection.cursor() as cursor:
+        cursor.execute('SELECT 1')
+        return cursor.fetchone()[0]
+
+
+def test_connection_is_reused(make_connections):
+    connection = make_connections()['default']
+    query(connection)
+    raw = connection.connection
+    connection.close()
+    assert query(connection) == 1
+    assert connection.connection is raw
+    stats = pool_stats()['default']
+    assert (stats['created'], stats['checkouts'], stats['in_use']) == (
+        1, 2, 1)
+
+
+def test_pool_is_bounded(make_connections):
+    handler = make_connections()
+    connections = [ConnectionHandler(handler.settings)['default']
+                   for _ in range(3)]
+    query(connections[0])
+    query(connections[1])
+    with pytest.raises(PoolTimeout):
+        query(connections[2])
+    connections[0].inc_thread_sharing()
+    timer = threading.Timer(0.05, connections[0].close)
+    timer.start()
+    assert query(connections[2]) == 1
+    timer.join()
+    stats = pool_stats()['default']
+    assert stats['size'] == 2
+    assert (stats['waits'], stats['timeouts']) == (2, 1)
+    for connection in connections:
+        connection.close()
+
+
+def test_broken_connection_is_replaced(make_connections):
+    connection = make_connections(HEALTH_CHECK_INTERVAL=0)['default']
+    query(connection)
+    raw = connection.connection
+    connection.close()
+    raw.close()
+    assert query(connection) == 1
+    assert connection.connection is not raw
+    stats = pool_stats()['default']
+    assert (stats['health_checks'], stats['discarded']) == (1, 1)
+
+
+def test_old_connection_is_recycled(make_connections):
+    connection = make_connections(MAX_LIFETIME=0)['default']
+    query(connection)
+    raw = connection.connection
+    connection.close()
+    query(connection)
+    assert connection.connection is not raw
+    assert pool_stats()['default']['created'] == 2
+
+
+def test_new_pool_after_fork(make_connections, monkeypatch):
+    connection = make_connections()['default']
+    query(connection)
+    pool = connection.pool
+    monkeypatch.setattr(pool_module.os, 'getpid', lambda: pool.pid + 1)
+    assert connection.pool is not pool
+    assert pool_stats() == {'default': connection.pool.get_stats()}
@@ -0,0 +1,109 @@
+from collections import Counter, defaultdict
+
+import pytest
+
+from recipes.models import Ingredient, IngredientRecipe, Recipe
+from recipes.postings import recipe_postings
+
+
+def expected_ranking(ingredient_ids):
+    ingredients = defaultdict(set)
+    for recipe_id, ingredient_id in IngredientRecipe.objects.values_list(
+            'recipe_id', 'ingredient_id'):
+        ingredients[recipe_id].add(ingredient_id)
+    ranked = []
+    for recipe_id, recipe_ingredients in ingredients.items():
+        count = len(recipe_ingredients & ingredient_ids)
+        if count:
+            missing = len(recipe_ingredients) - count
+            ranked.append((missing, -count, -recipe_id))
+    return [(-recipe_id, missing) for missing, _, recipe_id in sorted(ranked)]
+
+
+@pytest.fixture
+def pantry(db):
+    usage = Counter(
+        IngredientRecipe.objects.values_list('ingredient_id', flat=True))
+    return {ingredient_id for ingredient_id, _ in usage.most_common(30)}
+
+
+def test_cook_matches_brute_force(pantry):
+    assert list(recipe_postings.cook(pantry)) == expected_ranking(pantry)
+
+
+def test_cook_max_missing(pantry):
+    ranked = recipe_postings.cook(pantry, max_missing=1)
+    expected = [item for item in expected_ranking(pantry) if item[1] <= 1]
+    assert len(ranked) == len(expected)
+    assert ranked[3:9] == expected[3:9]
+
+
+def test_cook_indexing(pantry):
+    ranked = recipe_postings.cook(pantry)
+    expected = expected_ranking(pantry)
+    assert ranked[-1] == expected[-1]
+    assert ranked[-len(expected)] == expected[0]
+    assert ranked[len(expected) - 1] == expected[-1]
+    for index in (len(expected), -len(expected) - 1):
+        with pytest.raises(IndexError):
+            ranked[index]
+
+
+def test_cook_endpoint(user_client, pantry):
+    response = user_client.get(
+        '/api/recipes/cook/',
+        {'ingredients': ','.join(map(str, pantry)), 'limit': 10})
+    assert response.status_code == 200
+    expected = expected_ranking(pantry)[:10]
+    assert [(recipe['id'], recipe['missing_ingredients'])
+            for recipe in response.data['results']] == expected
+
+
+def test_cook_requires_ingredients(user_client):
+    assert user_client.get('/api/recipes/cook/').status_code == 400
+    assert user_client.get(
+        '/api/recipes/cook/?ingredients=a').status_code == 400
+
+
+def test_cook_max_missing_bounds(user_client, pantry):
+    url = f'/api/recipes/cook/?ingredients={",".join(map(str, pantry))}'
+    assert user_client.get(f'{url}&max_missing=-1').status_code == 400
+    response = user_client.get(f'{url}&max_missing=1000000000&limit=1000')
+    assert response.status_code == 200
+    assert [(recipe['id'], recipe['missing_ingredients'])
+            for recipe in response.data['results']] == expected_ranking(
+        pantry)
+    assert list(recipe_postings.cook(pantry, 10 ** 9)) == expected_ranking(
+        pantry)
+
+
+def test_incremental_refresh(pantry):
+    recipe_postings.refresh()
+    state = recipe_postings.state
+    recipe = Recipe.objects.order_by('id').first()
+    recipe.recipe_ingredients.all().delete()
+    ingredient = Ingredient.objects.exclude(pk__in=pantry).first()
+    IngredientRecipe.objects.create(
+        recipe=recipe, ingredient=ingredient, amount=1)
+    recipe_postings.record_change([recipe.id])
+    assert recipe_postings.refresh().epoch == state.epoch
+    assert recipe_postings.cook([ingredient.id])[0] == (recipe.id, 0)
+    assert list(recipe_postings.cook(pantry)) == expected_ranking(pantry)
+
+
+def test_refresh_after_create_and_delete(pantry):
+    recipe_postings.refresh()
+    first, last = Recipe.objects.order_by('id')[::Recipe.objects.count() - 1]
+    new = Recipe.objects.create(
+        author=last.author, name='new', text='new', cooking_time=1)
+    IngredientRecipe.objects.bulk_create(
+        IngredientRecipe(recipe=new, ingredient_id=ingredient_id, amount=1)
+        for ingredient_id in pantry)
+    deleted = first.id
+    first.delete()
+    recipe_postings.record_change([new.id, deleted])
+    recipe_postings.refresh()
+    ranked = list(recipe_postings.cook(pantry))
+    assert ranked[0] == (new.id, 0)
+    assert deleted not in {recipe_id for recipe_id, _ in ranked}
+    assert ranked == expected_ranking(pantry)
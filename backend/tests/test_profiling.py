@@ -0,0 +1,107 @@
+import pstats
+from types import SimpleNamespace
+
+import pytest
+from rest_framework import serializers
+from rest_framework.test import APIClient
+
+from core.profiling import (ProfiledModelSerializer, SerializerProfiler,
+                            active_profiler)
+from recipes.models import Recipe
+from users.models import User
+
+URL = '/api/recipes/?limit=3'
+
+
+@pytest.fixture(autouse=True)
+def profiling(settings):
+    settings.SERIALIZER_PROFILING = True
+
+
+@pytest.fixture
+def staff_client(db):
+    client = APIClient()
+    client.force_authenticate(User.objects.create_user(
+        email='staff@foodgram.ru', username='staff', password='password',
+        is_staff=True))
+    return client
+
+
+class AuthorRecipesSerializer(ProfiledModelSerializer):
+    recipes_count = serializers.SerializerMethodField()
+
+    class Meta:
+        model = User
+        fields = ('id', 'recipes_count')
+
+    def get_recipes_count(self, user):
+        return Recipe.objects.filter(author=user).count()
+
+
+def test_profile_tree(staff_client):
+    expected = staff_client.get(URL).data
+    response = staff_client.get(URL + '&profile=serializers')
+    assert response.status_code == 200
+    assert response.data['data']['results'] == expected['results']
+    root = response.data['profile']['ReadRecipeSerialzer']
+    author = root['fields']['author']
+    assert author['field'] == 'UserSerializer'
+    assert author['calls'] == 3
+    assert author['fields']['is_subscribed']['field'] == (
+        'SerializerMethodField')
+    assert root['fields']['ingredients']['field'] == 'ListSerializer'
+    assert 'name' in root['fields']['ingredients']['fields']
+    assert root['time_ms'] >= author['time_ms'] > 0
+
+
+def test_profile_header(staff_client):
+    response = staff_client.get(URL, HTTP_X_PROFILE='serializers')
+    assert 'ReadRecipeSerialzer' in response.data['profile']
+
+
+def test_profile_ignored_for_users(user_client):
+    response = user_client.get(URL + '&profile=serializers')
+    assert 'profile' not in response.data
+    assert 'X-Serializer-Profile' not in user_client.get(
+        URL + '&profile=cprofile')
+
+
+def test_profiling_disabled(staff_client, settings):
+    settings.SERIALIZER_PROFILING = False
+    response = staff_client.get(URL + '&profile=serializers')
+    assert 'profile' not in response.data
+    assert serializers.Serializer._readable_fields.fget.__module__ == (
+        'rest_framework.serializers')
+
+
+def test_cprofile_dump(staff_client, settings, tmp_path):
+    settings.SERIALIZER_PROFILE_DIR = str(tmp_path)
+    response = staff_client.get(URL + '&profile=cprofile')
+    assert 'results' in response.data
+    name = response['X-Serializer-Profile']
+    stats = pstats.Stats(str(tmp_path / f'{name}.prof'))
+    assert any(function == 'to_representation'
+               for _, _, function in stats.stats)
+    lines = (tmp_path / f'{name}.folded').read_text().splitlines()
+    stacks = dict(line.rsplit(' ', 1) for line in lines)
+    assert 'ReadRecipeSerialzer;author;is_subscribed' in stacks
+    assert all(value.lstrip('-').isdigit() for value in stacks.values())
+
+
+def test_queries_attributed_to_fields(db):
+    staff = SimpleNamespace(is_staff=True)
+    profiler = SerializerProfiler(SimpleNamespace(user=staff), 'serializers')
+    users = User.objects.order_by('id')[:4]
+    token = active_profiler.set(profiler)
+    try:
+        with profiler.recorder.record():
+            AuthorRecipesSerializer(users, many=True).data
+    finally:
+        active_profiler.reset(token)
+    tree = profiler.tree()['AuthorRecipesSerializer']
+    assert tree['queries'] == 4
+    assert tree['fields']['recipes_count'] == {
+        'field': 'SerializerMethodField', 'calls': 4,
+        'time_ms': tree['fields']['recipes_count']['time_ms'],
+        'queries': 4}
+    assert tree['fields']['id']['queries'] == 0
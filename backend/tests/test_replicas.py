@@ -0,0 +1,125 @@
+import pytest
+from asgiref.local import Local
+from django.core.cache import caches
+from django.core.cache.backends import locmem
+from django.core.exceptions import ImproperlyConfigured
+from django.db import OperationalError, connections, router
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient
+
+from core.db import replicas
+from core.db.replicas import ReplicaMiddleware
+from recipes.models import Favorite, Recipe, Tag
+
+pytestmark = pytest.mark.django_db(databases=['default', 'replica'])
+
+TAGS_URL = '/api/tags/'
+FAVORITES_URL = '/api/recipes/?is_favorited=1'
+
+
+@pytest.fixture(autouse=True)
+def replica(settings, tmp_path):
+    settings.CACHES = {'default': {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': str(tmp_path / 'cache'),
+    }}
+    settings.DATABASE_REPLICAS = ['replica']
+    replicas.down_until.clear()
+    yield 'replica'
+    replicas.down_until.clear()
+
+
+@pytest.fixture
+def token_client(user):
+    client = APIClient()
+    client.credentials(
+        HTTP_AUTHORIZATION=f'Token {Token.objects.get(user=user).key}')
+    return client
+
+
+def test_reads_outside_requests_use_primary():
+    assert router.db_for_read(Tag) == 'default'
+    assert router.db_for_write(Tag) == 'default'
+
+
+def test_safe_requests_read_from_replica(anon_client):
+    assert Tag.objects.exists()
+    assert anon_client.get(TAGS_URL).data == []
+    Tag.objects.using('replica').create(
+        name='Реплика', color='#000000', slug='replica')
+    assert len(anon_client.get(TAGS_URL).data) == 1
+
+
+def test_token_is_read_from_primary(token_client, user):
+    response = token_client.get(FAVORITES_URL)
+    assert response.status_code == 200
+    assert response.data['count'] == 0
+
+
+def test_write_pins_client_to_primary(token_client, user):
+    recipe = Recipe.objects.exclude(favorite__user=user).first()
+    favorites = Favorite.objects.filter(user=user).count()
+    response = token_client.post(f'/api/recipes/{recipe.id}/favorite/')
+    assert response.status_code == 201
+    assert Favorite.objects.using('replica').count() == 0
+    assert token_client.get(FAVORITES_URL).data['count'] == favorites + 1
+    assert APIClient().get(TAGS_URL).data == []
+
+
+def test_pin_is_seen_by_other_processes(token_client, user):
+    recipe = Recipe.objects.exclude(favorite__user=user).first()
+    response = token_client.post(f'/api/recipes/{recipe.id}/favorite/')
+    assert response.status_code == 201
+    locmem._caches.clear()
+    caches._connections = Local()
+    assert token_client.get(FAVORITES_URL).data['count'] > 0
+
+
+def test_local_cache_is_refused(settings):
+    settings.CACHES = {'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}}
+    with pytest.raises(ImproperlyConfigured):
+        ReplicaMiddleware(lambda request: None)
+    settings.DATABASE_REPLICAS = []
+    ReplicaMiddleware(lambda request: None)
+
+
+def test_pin_expires(token_client, user, settings):
+    settings.REPLICA_PIN_SECONDS = 0
+    recipe = Recipe.objects.exclude(shopping_cart__user=user).first()
+    response = token_client.post(f'/api/recipes/{recipe.id}/shopping_cart/')
+    assert response.status_code == 201
+    assert token_client.get(FAVORITES_URL).data['count'] == 0
+
+
+def test_failed_write_does_not_pin(token_client):
+    response = token_client.post('/api/recipes/0/favorite/')
+    assert response.status_code == 404
+    assert token_client.get(FAVORITES_URL).data['count'] == 0
+
+
+def test_unavailable_replica_falls_back_to_primary(anon_client, monkeypatch):
+    attempts = []
+
+    def refuse():
+        attempts.append(1)
+        raise OperationalError('replica is down')
+
+    monkeypatch.setattr(connections['replica'], 'ensure_connection', refuse)
+    tags = Tag.objects.count()
+    assert len(anon_client.get(TAGS_URL).data) == tags
+    assert len(anon_client.get(TAGS_URL).data) == tags
+    assert len(attempts) == 1
+    assert 'replica' not in replicas.available_replicas()
+
+
+def test_replica_failure_during_request_is_retried(anon_client, monkeypatch):
+    def fail(*args, **kwargs):
+        raise OperationalError('replica is down')
+
+    connections['replica'].ensure_connection()
+    monkeypatch.setattr(connections['replica'], 'create_cursor', fail)
+    response = anon_client.get(TAGS_URL)
+    assert response.status_code == 200
+    assert len(response.data) == Tag.objects.count()
+    assert 'replica' in replicas.down_until
@@ -0,0 +1,81 @@
+import pytest
+
+from recipes.models import Ingredient, IngredientRecipe, Recipe
+
+
+@pytest.fixture
+def on_commit(django_capture_on_commit_callbacks):
+    return lambda: django_capture_on_commit_callbacks(execute=True)
+
+
+def search(client, query):
+    response = client.get('/api/recipes/', {'search': query, 'limit': 1000})
+    assert response.status_code == 200
+    return [recipe['id'] for recipe in response.data['results']]
+
+
+def test_search_by_ingredient(user_client):
+    ingredient = Ingredient.objects.filter(
+        recipe__isnull=False).order_by('id').first()
+    word = ingredient.name.split()[0]
+    expected = set(IngredientRecipe.objects.filter(
+        ingredient__name__icontains=word).values_list('recipe_id', flat=True))
+    assert set(search(user_client, word)) >= expected
+
+
+def test_name_match_ranks_first(user_client, on_commit):
+    recipe = Recipe.objects.order_by('id').last()
+    with on_commit():
+        recipe.name = 'Борщ украинский'
+        recipe.save()
+    other = Recipe.objects.order_by('id').first()
+    with on_commit():
+        other.text = 'Подавать как борщ, со сметаной.'
+        other.save()
+    assert search(user_client, 'борщ')[:2] == [recipe.id, other.id]
+
+
+def test_ingredient_change_updates_document(user_client, on_commit):
+    recipe = Recipe.objects.order_by('id').first()
+    ingredient = Ingredient.objects.create(
+        name='квазиингредиент', measurement_unit='г')
+    with on_commit():
+        IngredientRecipe.objects.create(
+            recipe=recipe, ingredient=ingredient, amount=1)
+    assert search(user_client, 'квазиингр') == [recipe.id]
+
+
+def test_search_ignores_query_syntax(user_client, on_commit):
+    recipe = Recipe.objects.order_by('id').first()
+    with on_commit():
+        recipe.text = 'Near: молоко or сливки.'
+        recipe.save()
+    assert search(user_client, 'NEAR("молоко" *) OR (') == [recipe.id]
+    assert search(user_client, 'молоко AND NOT') == []
+    assert len(search(user_client, '"*) :^(-')) == Recipe.objects.count()
+
+
+def test_cursor_pages_keep_relevance_order(user_client, on_commit):
+    recipes = list(Recipe.objects.order_by('id')[:4])
+    with on_commit():
+        for number, recipe in enumerate(recipes):
+            recipe.text = 'Подавать как борщ. ' * (number + 1)
+            recipe.save()
+        recipes[0].name = 'Борщ украинский'
+        recipes[0].save()
+    ranked = search(user_client, 'борщ')
+    assert ranked[0] == recipes[0].id
+    assert ranked != sorted(ranked, reverse=True)
+    data = user_client.get(
+        '/api/recipes/', {'search': 'борщ', 'limit': 1, 'cursor': ''}).data
+    pages = [recipe['id'] for recipe in data['results']]
+    while data['next']:
+        data = user_client.get(data['next']).data
+        pages += [recipe['id'] for recipe in data['results']]
+    assert pages == ranked
+
+
+def test_search_rejects_explicit_ordering(user_client):
+    response = user_client.get(
+        '/api/recipes/', {'search': 'борщ', 'ordering': '-pub_date'})
+    assert response.status_code == 400
@@ -0,0 +1,52 @@
+from io import StringIO
+
+from django.core.management import call_command
+
+from recipes.models import (Ingredient, IngredientRecipe, Recipe,
+                            ShoppingCart, ShoppingCartIngredient,
+                            ShoppingCartIngredientQuerySet)
+from users.models import User
+
+
+def test_reconcile_user_counts_each_cart_once(db):
+    users = list(User.objects.order_by('id')[1:4])
+    ingredient = Ingredient.objects.first()
+    recipe = Recipe.objects.create(
+        author=users[0], name='Проверка корзины', text='Текст',
+        cooking_time=5, image='static/images/temp.jpeg')
+    IngredientRecipe.objects.create(
+        recipe=recipe, ingredient=ingredient, amount=5)
+    for user in users:
+        ShoppingCart.objects.create(user=user, recipe=recipe)
+
+    def amount(user):
+        return ShoppingCartIngredient.objects.filter(
+            user=user, ingredient=ingredient).values_list(
+            'amount', flat=True).get()
+
+    expected = {user.pk: 5 for user in users}
+    assert {user.pk: amount(user) for user in users} == expected
+    ShoppingCartIngredient.objects.filter(user=users[0]).delete()
+    call_command('reconcile_shopping_carts', user=[users[0].pk],
+                 stdout=StringIO())
+    assert {user.pk: amount(user) for user in users} == expected
+    call_command('reconcile_shopping_carts', stdout=StringIO())
+    assert {user.pk: amount(user) for user in users} == expected
+
+
+def test_concurrent_insert_of_same_ingredient(db, monkeypatch):
+    user = User.objects.order_by('id')[5]
+    ingredient = Ingredient.objects.exclude(
+        shopping_cart_ingredients__user=user).first()
+    bulk_create = ShoppingCartIngredientQuerySet.bulk_create
+
+    def insert_first(queryset, objs, *args, **kwargs):
+        ShoppingCartIngredient.objects.create(
+            user=user, ingredient=ingredient, amount=3)
+        return bulk_create(queryset, objs, *args, **kwargs)
+
+    monkeypatch.setattr(
+        ShoppingCartIngredientQuerySet, 'bulk_create', insert_first)
+    ShoppingCartIngredient.objects.apply_amounts([user.pk], {ingredient.pk: 5})
+    assert ShoppingCartIngredient.objects.get(
+        user=user, ingredient=ingredient).amount == 8
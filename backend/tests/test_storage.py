@@ -0,0 +1,91 @@
+from io import BytesIO, StringIO
+
+import pytest
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from PIL import Image
+
+from core.constants import IMAGE_SIZES
+from recipes.images import (VARIANT_FORMATS, generate_image_variants,
+                            variant_files)
+from recipes.models import Recipe
+
+
+@pytest.fixture(autouse=True)
+def media_root(settings, tmp_path):
+    settings.MEDIA_ROOT = str(tmp_path)
+
+
+@pytest.fixture
+def storage():
+    return Recipe._meta.get_field('image').storage
+
+
+def upload(color):
+    buffer = BytesIO()
+    Image.new('RGB', (40, 40), color).save(buffer, 'PNG')
+    return SimpleUploadedFile('Photo.PNG', buffer.getvalue(), 'image/png')
+
+
+def collect(*args):
+    out = StringIO()
+    call_command('collect_media_garbage', '--min-age', '0', *args,
+                 stdout=out)
+    return out.getvalue()
+
+
+def test_names_by_content_hash(db, storage):
+    first, second = Recipe.objects.order_by('id')[:2]
+    first.image = upload('red')
+    first.save()
+    second.image = upload('red')
+    second.save()
+    assert first.image.name == second.image.name
+    assert first.image.name.startswith('static/images/')
+    assert first.image.name.endswith('.png')
+    assert len(storage.listdir('static/images')[1]) == 1
+    second.image = upload('blue')
+    second.save()
+    assert second.image.name != first.image.name
+
+
+def test_concurrent_saves_share_name(storage, monkeypatch):
+    first = storage.save('static/images/photo.png', upload('red'))
+    monkeypatch.setattr(storage, 'exists', lambda name: False)
+    second = storage.save('static/images/photo.png', upload('red'))
+    assert first == second
+    assert storage.listdir('static/images')[1] == [first.split('/')[-1]]
+    with storage.open(first) as file:
+        assert Image.open(file).getpixel((0, 0)) == (255, 0, 0)
+
+
+def test_collect_garbage(db, storage):
+    first, second = Recipe.objects.order_by('id')[:2]
+    first.image = upload('red')
+    first.save()
+    second.image = upload('green')
+    second.save()
+    generate_image_variants([first.pk, second.pk])
+    second.refresh_from_db()
+    orphan, variants = second.image.name, second.image_variants
+    second.image = upload('red')
+    second.save()
+    generate_image_variants([second.pk])
+    removed = f'{len(IMAGE_SIZES) * len(VARIANT_FORMATS) + 1} files'
+    assert removed in collect('--dry-run')
+    assert storage.exists(orphan)
+    assert removed in collect()
+    assert not storage.exists(orphan)
+    assert not any(storage.exists(name) for name in variant_files(variants))
+    first.refresh_from_db()
+    assert storage.exists(first.image.name)
+    assert all(storage.exists(name)
+               for name in variant_files(first.image_variants))
+
+
+def test_collect_garbage_keeps_recent_files(db, storage):
+    name = storage.save('static/images/new.png', upload('red'))
+    out = StringIO()
+    call_command('collect_media_garbage', stdout=out)
+    assert '0 files' in out.getvalue()
+    assert storage.exists(name)
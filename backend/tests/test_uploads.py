@@ -0,0 +1,101 @@
+import base64
+from io import BytesIO
+
+import pytest
+from django.core.files.uploadedfile import SimpleUploadedFile
+from PIL import Image
+
+from core.uploads import INVALID_IMAGE_MESSAGE
+from recipes.models import Ingredient, Recipe, Tag
+
+
+@pytest.fixture(autouse=True)
+def media_root(settings, tmp_path):
+    settings.MEDIA_ROOT = str(tmp_path)
+
+
+def png(size=(64, 64)):
+    buffer = BytesIO()
+    Image.new('RGB', size, 'green').save(buffer, 'PNG')
+    return buffer.getvalue()
+
+
+def payload(name):
+    ingredient, other = Ingredient.objects.order_by('id')[:2]
+    return {
+        'name': name,
+        'text': 'Описание',
+        'cooking_time': 10,
+        'tags': [Tag.objects.order_by('id').first().id],
+        'ingredients': [{'id': ingredient.id, 'amount': 5},
+                        {'id': other.id, 'amount': 7}],
+    }
+
+
+def multipart(data, image):
+    form = {key: value for key, value in data.items()
+            if key != 'ingredients'}
+    for index, item in enumerate(data['ingredients']):
+        form[f'ingredients[{index}]id'] = item['id']
+        form[f'ingredients[{index}]amount'] = item['amount']
+    form['image'] = image
+    return form
+
+
+def test_base64_upload(user_client):
+    data = payload('Рецепт base64')
+    data['image'] = (
+        'data:image/png;base64,' + base64.b64encode(png()).decode())
+    response = user_client.post('/api/recipes/', data, format='json')
+    assert response.status_code == 201, response.data
+    assert Recipe.objects.get(pk=response.data['id']).image.name.endswith(
+        '.png')
+
+
+def test_multipart_upload(user_client):
+    data = payload('Рецепт multipart')
+    response = user_client.post(
+        '/api/recipes/',
+        multipart(data, SimpleUploadedFile('dish.png', png(), 'image/png')),
+        format='multipart')
+    assert response.status_code == 201, response.data
+    recipe = Recipe.objects.get(pk=response.data['id'])
+    assert recipe.image.name.endswith('.png')
+    assert dict(recipe.recipe_ingredients.values_list(
+        'ingredient_id', 'amount')) == {
+            item['id']: item['amount'] for item in data['ingredients']}
+
+
+def test_multipart_rejects_non_image(user_client):
+    response = user_client.post(
+        '/api/recipes/',
+        multipart(payload('Не картинка'), SimpleUploadedFile(
+            'dish.png', b'<?php echo 1; ?>' * 10, 'image/png')),
+        format='multipart')
+    assert response.status_code == 400
+    assert response.data['image'] == [INVALID_IMAGE_MESSAGE]
+
+
+def test_oversized_uploads_rejected(user_client, settings):
+    settings.MAX_IMAGE_UPLOAD_SIZE = 1024
+    image = png((512, 512)) + b'\0' * 2048
+    response = user_client.post(
+        '/api/recipes/',
+        multipart(payload('Большая'), SimpleUploadedFile(
+            'dish.png', image, 'image/png')),
+        format='multipart')
+    assert response.status_code == 400
+    assert 'image' in response.data
+    data = payload('Большая base64')
+    data['image'] = base64.b64encode(image).decode()
+    response = user_client.post('/api/recipes/', data, format='json')
+    assert response.status_code == 400
+    assert 'image' in response.data
+
+
+def test_base64_rejects_non_image(user_client):
+    data = payload('Не картинка base64')
+    data['image'] = base64.b64encode(b'#!/bin/sh\necho 1\n').decode()
+    response = user_client.post('/api/recipes/', data, format='json')
+    assert response.status_code == 400
+    assert 'image' in response.data
@@ -0,0 +1,64 @@
+import runpy
+from pathlib import Path
+from types import SimpleNamespace
+
+import pytest
+from django.core.exceptions import ImproperlyConfigured
+from django.db import connections
+
+from core import warmup as warmup_module
+from recipes.autocomplete import ingredient_index
+from recipes.postings import recipe_postings
+from recipes.registry import tag_registry
+
+GUNICORN_CONFIG = Path(__file__).resolve().parent.parent / 'gunicorn.conf.py'
+
+
+@pytest.fixture
+def config(monkeypatch, tmp_path):
+    monkeypatch.setenv('GUNICORN_WORKERS', '3')
+    monkeypatch.setenv('PROMETHEUS_MULTIPROC_DIR', str(tmp_path))
+    monkeypatch.setenv('GUNICORN_PRELOAD', 'True')
+    return runpy.run_path(str(GUNICORN_CONFIG))
+
+
+@pytest.mark.django_db(databases=['default', 'replica'])
+def test_warmup_primes_caches(django_assert_num_queries):
+    tag_registry.invalidate()
+    ingredient_index.state = None
+    recipe_postings.state = None
+    warmup_module.warmup()
+    assert tag_registry.items is not None
+    assert ingredient_index.state is not None
+    assert recipe_postings.state is not None
+    with django_assert_num_queries(0):
+        warmup_module.warmup()
+
+
+def test_gunicorn_config(config):
+    assert config['workers'] == 3
+    assert config['preload_app'] is True
+    assert config['max_requests_jitter'] > 0
+
+
+def test_gunicorn_hooks(config, monkeypatch):
+    calls = []
+    monkeypatch.setattr(
+        warmup_module, 'warmup', lambda prime=True: calls.append(prime))
+    monkeypatch.setattr(connections, 'close_all', lambda: calls.append(0))
+    server = SimpleNamespace(cfg=SimpleNamespace(preload_app=True))
+    config['when_ready'](server)
+    config['post_worker_init'](server)
+    assert calls == [True, 0, False]
+
+
+def test_gunicorn_requires_shared_cache(config, settings, tmp_path):
+    server = SimpleNamespace(cfg=SimpleNamespace(workers=3))
+    with pytest.raises(ImproperlyConfigured):
+        config['on_starting'](server)
+    config['on_starting'](SimpleNamespace(cfg=SimpleNamespace(workers=1)))
+    settings.CACHES = {'default': {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': str(tmp_path / 'cache'),
+    }}
+    config['on_starting'](server)
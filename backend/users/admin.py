@@ -7,23 +7,18 @@ from .models import Follow, User
 @admin.register(User)
 class UserAdmin(BaseUserAdmin):
     list_display = ('id', 'username', 'first_name',
-                    'last_name', 'get_recipes',
-                    'get_followers', 'email')
+                    'last_name', 'recipes_count',
+                    'followers_count', 'email')
     search_fields = ('username', 'email')
-    list_filter = ('username', 'email',)
+    list_filter = ('is_staff', 'is_active')
+    show_full_result_count = False
     empty_value_display = '-пусто-'
 
-    @admin.display(description='рецепты')
-    def get_recipes(self, obj):
-        return obj.recipe.all().count()
-
-    @admin.display(description='подписчики')
-    def get_followers(self, obj):
-        return obj.following.all().count()
-
 
 @admin.register(Follow)
 class FollowAdmin(admin.ModelAdmin):
     list_display = ('user', 'author')
-    list_filter = ('author',)
-    search_fields = ('user',)
+    list_select_related = ('user', 'author')
+    autocomplete_fields = ('user', 'author')
+    search_fields = ('user__username', 'author__username')
+    show_full_result_count = False
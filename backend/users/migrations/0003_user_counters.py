@@ -0,0 +1,45 @@
+# Generated by Django 3.2.25 on 2026-10-18 03:49
+
+from django.db import migrations, models
+from django.db.models import OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+def count_related(model, related_field):
+    return Coalesce(Subquery(
+        model.objects.filter(
+            **{related_field: OuterRef('pk')}
+        ).order_by().values(related_field).annotate(
+            total=models.Count('pk')).values('total')), 0)
+
+
+def fill_user_counters(apps, schema_editor):
+    User = apps.get_model('users', 'User')
+    User.objects.update(
+        recipes_count=count_related(
+            apps.get_model('recipes', 'Recipe'), 'author'),
+        followers_count=count_related(
+            apps.get_model('users', 'Follow'), 'author'))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0002_follow_follow_user_id_idx'),
+        ('recipes', '0005_recipe_counters'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='user',
+            name='followers_count',
+            field=models.PositiveIntegerField(default=0, editable=False, verbose_name='подписчики'),
+        ),
+        migrations.AddField(
+            model_name='user',
+            name='recipes_count',
+            field=models.PositiveIntegerField(default=0, editable=False, verbose_name='рецепты'),
+        ),
+        migrations.RunPython(
+            fill_user_counters, migrations.RunPython.noop),
+    ]
@@ -2,10 +2,13 @@ from django.contrib.auth.models import AbstractUser
 from django.db import models
 
 from core import constants
+from core.models import CounterFieldsMixin
 from core.validators import validate_username
 
 
-class User(AbstractUser):
+class User(CounterFieldsMixin, AbstractUser):
+    counter_fields = ('recipes_count', 'followers_count')
+
     username = models.SlugField(
         'имя пользователя',
         validators=(validate_username,),
@@ -29,6 +32,16 @@ class User(AbstractUser):
         'пароль',
         max_length=constants.NAME_LIMIT,
     )
+    recipes_count = models.PositiveIntegerField(
+        'рецепты',
+        default=0,
+        editable=False,
+    )
+    followers_count = models.PositiveIntegerField(
+        'подписчики',
+        default=0,
+        editable=False,
+    )
 
     REQUIRED_FIELDS = ['username', 'first_name', 'last_name']
 
@@ -65,6 +78,8 @@ class Follow(models.Model):
 
     class Meta:
         verbose_name_plural = 'подписки'
+        indexes = [
+            models.Index(fields=['user', '-id'], name='follow_user_id_idx')]
         constraints = [
             models.UniqueConstraint(
                 name='unique_following',
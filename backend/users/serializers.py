@@ -1,11 +1,17 @@
+from collections import defaultdict
+
 from rest_framework import serializers, status
 from rest_framework.exceptions import ValidationError
 
+from core.constants import LIST_IMAGE_SIZE
+from core.profiling import ProfiledModelSerializer
+from core.serializers import load_for_page
+from recipes.images import image_url, image_urls
 from recipes.models import Recipe
 from .models import Follow, User
 
 
-class UserSerializer(serializers.ModelSerializer):
+class UserSerializer(ProfiledModelSerializer):
     is_subscribed = serializers.SerializerMethodField(read_only=True)
 
     class Meta:
@@ -14,28 +20,36 @@ class UserSerializer(serializers.ModelSerializer):
                   'first_name', 'last_name', 'is_subscribed')
 
     def get_is_subscribed(self, obj):
+        if hasattr(obj, 'is_subscribed'):
+            return obj.is_subscribed
         request = self.context.get('request')
-        return (request
-                and request.user.is_authenticated
-                and request.user.follower.filter(author=obj).exists())
+        if not request or not request.user.is_authenticated:
+            return False
+        if not hasattr(request, 'following_ids'):
+            request.following_ids = set(
+                request.user.follower.values_list('author_id', flat=True))
+        return obj.id in request.following_ids
 
 
-class MiniRecipeSerialzer(serializers.ModelSerializer):
+class MiniRecipeSerialzer(ProfiledModelSerializer):
     image = serializers.SerializerMethodField()
+    images = serializers.SerializerMethodField()
 
     class Meta:
         model = Recipe
-        fields = ('id', 'name', 'image', 'cooking_time')
+        fields = ('id', 'name', 'image', 'images', 'cooking_time')
         read_only_fields = fields
 
     def get_image(self, recipe):
-        return recipe.image.url
+        return image_url(recipe, LIST_IMAGE_SIZE)
+
+    def get_images(self, recipe):
+        return image_urls(recipe)
 
 
 class FollowUserSerializer(UserSerializer):
-    is_subscribed = serializers.SerializerMethodField()
     recipes = serializers.SerializerMethodField()
-    recipes_count = serializers.SerializerMethodField()
+    recipes_count = serializers.IntegerField(read_only=True)
 
     class Meta:
         model = User
@@ -44,47 +58,30 @@ class FollowUserSerializer(UserSerializer):
         read_only_fields = ('__all__', )
 
     def get_recipes(self, obj):
-        request = self.context.get('request')
-        limit = request.GET.get('recipes_limit')
-        recipes = obj.recipe.all()
-        if limit and limit.isdigit():
-            recipes = recipes[:int(limit)]
-        return MiniRecipeSerialzer(recipes, many=True).data
-
-    def get_recipes_count(self, obj):
-        return obj.recipe.count()
-
-
-class FollowSerializer(serializers.ModelSerializer):
-    email = serializers.ReadOnlyField(source='author.email')
-    id = serializers.ReadOnlyField(source='author.id')
-    username = serializers.ReadOnlyField(source='author.username')
-    first_name = serializers.ReadOnlyField(source='author.first_name')
-    last_name = serializers.ReadOnlyField(source='author.last_name')
-    is_subscribed = serializers.SerializerMethodField()
-    recipes = serializers.SerializerMethodField()
-    recipes_count = serializers.ReadOnlyField(
-        source='author.recipe.all().count()')
+        recipes = load_for_page(self, 'recipes', self.get_recipes_by_author)
+        return MiniRecipeSerialzer(recipes.get(obj.id, []), many=True).data
+
+    def get_recipes_by_author(self, authors):
+        limit = self.context.get('request').GET.get('recipes_limit', '')
+        recipes_by_author = defaultdict(list)
+        for recipe in Recipe.objects.limit_per_author(
+                [author.id for author in authors],
+                int(limit) if limit.isdigit() else None):
+            recipes_by_author[recipe.author_id].append(recipe)
+        return recipes_by_author
+
+
+class FollowSerializer(ProfiledModelSerializer):
 
     class Meta:
-        fields = ('email', 'id', 'username', 'first_name',
-                  'last_name', 'is_subscribed', 'recipes', 'recipes_count')
+        fields = ('user', 'author')
+        read_only_fields = fields
         model = Follow
 
-    def get_is_subscribed(self, obj):
-        request = self.context.get('request')
-        return (request
-                and request.user.is_authenticated
-                and request.user.follower.filter(
-                    author=self.context.get('author')).exists())
-
-    def get_recipes(self, obj):
-        request = self.context.get('request')
-        limit = request.GET.get('recipes_limit')
-        recipes = obj.author.recipe.all()
-        if limit and limit.isdigit():
-            recipes = recipes[:int(limit)]
-        return MiniRecipeSerialzer(recipes, many=True).data
+    def to_representation(self, instance):
+        return FollowUserSerializer(
+            instance.author,
+            context={'request': self.context.get('request')}).data
 
     def validate(self, data):
         author = self.context.get('author')
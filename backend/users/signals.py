@@ -0,0 +1,13 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from core.utils import change_counter
+from .models import Follow, User
+
+
+@receiver(post_save, sender=Follow)
+@receiver(post_delete, sender=Follow)
+def count_followers(sender, instance, signal, created=False, **kwargs):
+    delta = -1 if signal is post_delete else int(created)
+    change_counter(User.objects.filter(pk=instance.author_id),
+                   'followers_count', delta)
@@ -1,3 +1,4 @@
+from django.db.models import Exists, F, OuterRef, Value
 from django.shortcuts import get_object_or_404
 from djoser.views import UserViewSet
 from rest_framework import status
@@ -6,13 +7,30 @@ from rest_framework.permissions import AllowAny, IsAuthenticated
 from rest_framework.response import Response
 
 from api.paginations import ApiPagination
+from core.eager_loading import apply_loading_plan
+from core.mixins import EagerLoadingMixin
 from .models import Follow, User
 from .serializers import FollowSerializer, FollowUserSerializer
 
 
-class CustomUserViewSet(UserViewSet):
+class CustomUserViewSet(EagerLoadingMixin, UserViewSet):
     pagination_class = ApiPagination
     permission_classes = (AllowAny, )
+    keyset_ordering = None
+
+    def get_serializer_class(self):
+        if self.action == 'subscriptions':
+            return FollowUserSerializer
+        return super().get_serializer_class()
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        user = self.request.user
+        if user.is_authenticated:
+            return queryset.annotate(
+                is_subscribed=Exists(
+                    user.follower.filter(author=OuterRef('pk'))))
+        return queryset.annotate(is_subscribed=Value(False))
 
     @action(detail=True,
             methods=['post'],
@@ -38,13 +56,16 @@ class CustomUserViewSet(UserViewSet):
 
     @action(detail=False,
             methods=['get'],
-            permission_classes=[IsAuthenticated])
+            permission_classes=[IsAuthenticated],
+            keyset_ordering=('-follow_id', ))
     def subscriptions(self, request):
         follows = User.objects.filter(
-            following__user=self.request.user)
-        pages = self.paginate_queryset(follows)
-        serializer = FollowUserSerializer(
-            pages,
-            many=True,
-            context={'request': request})
+            following__user=self.request.user
+        ).annotate(
+            follow_id=F('following__id'),
+            is_subscribed=Value(True)
+        ).order_by(*User._meta.ordering)
+        pages = self.paginate_queryset(apply_loading_plan(
+            follows, self.get_loading_plan(User)))
+        serializer = self.get_serializer(pages, many=True)
         return self.get_paginated_response(serializer.data)